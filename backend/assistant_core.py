@@ -1,37 +1,17 @@
+import re
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from contextlib import asynccontextmanager
 from pydantic import BaseModel
 from datetime import date
-import pymysql
-import os
-from dotenv import load_dotenv
-import chromadb
-from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
-from gemini_utils import send_to_gemini
-
-# Load environment variables
-load_dotenv()
-
-# MySQL connection settings
-MYSQL_HOST = os.environ.get('MYSQL_HOST', 'localhost')
-MYSQL_USER = os.environ.get('MYSQL_USER', 'root')
-MYSQL_PASSWORD = os.environ.get('MYSQL_PASSWORD', 'your_mysql_password')
-MYSQL_DB = os.environ.get('MYSQL_DB', 'your_database_name')
-
-# FastAPI app with lifespan
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # ✅ Startup logic: Create table if not exists
-    conn = get_connection()
-    with conn:
-        with conn.cursor() as cursor:
-            cursor.execute(CREATE_TABLE_SQL)
-        conn.commit()
-    yield
-    # 🔻 Add shutdown logic if needed
-
-app = FastAPI(lifespan=lifespan)
+from typing import List, Optional
+from gemini_utils import send_to_gemini, get_model
+from name_matcher import get_name_matcher
+from employee_indexer import get_chroma_client, get_embedding_function, get_synced_company_collection
+from config import ASSISTANT_COMPANY_ID
+from database import SlotConflictError
+from availability import availability_engine
+
+app = FastAPI()
 
 # Enable CORS for local development
 app.add_middleware(
@@ -44,6 +24,7 @@ app.add_middleware(
 
 # Appointment model
 class AppointmentBooking(BaseModel):
+    employee_id: Optional[int] = None
     employee_name: str
     department: str
     reason: str
@@ -52,55 +33,66 @@ class AppointmentBooking(BaseModel):
     email: str
     phone: str
     appointment_date: str
+    company_id: Optional[int] = None
 
-# SQL to create bookings table
-CREATE_TABLE_SQL = '''
-CREATE TABLE IF NOT EXISTS bookings (
-    id INT AUTO_INCREMENT PRIMARY KEY,
-    name VARCHAR(100),
-    email VARCHAR(100),
-    phone VARCHAR(20),
-    department VARCHAR(100),
-    employee VARCHAR(100),
-    date DATE,
-    time TIME,
-    reason TEXT
-)
-'''
-
-def get_connection():
-    return pymysql.connect(
-        host=MYSQL_HOST,
-        user=MYSQL_USER,
-        password=MYSQL_PASSWORD,
-        database=MYSQL_DB,
-        cursorclass=pymysql.cursors.DictCursor
-    )
+def booking_to_appointment(booking: AppointmentBooking, index: Optional[int] = None) -> dict:
+    """Map an assistant booking onto an appointments row (shared data layer, booking_method='voice')
+
+    An appointment_time that isn't a clock time ("after lunch") is rejected with a 422 naming
+    the field (and the item's position in a batch) rather than reaching MySQL as a TIME value.
+    """
+    appointment_time = parse_appointment_time(booking.appointment_time)
+    if appointment_time is None:
+        loc = ["body", "appointment_time"] if index is None else ["body", index, "appointment_time"]
+        raise HTTPException(status_code=422, detail=[{
+            "loc": loc,
+            "msg": f"could not read {booking.appointment_time!r} as a time (e.g. 2:30 PM or 14:30)",
+            "type": "value_error",
+        }])
+    return {
+        "employee_id": booking.employee_id,
+        "employee_name": booking.employee_name,
+        "department": booking.department,
+        "reason": booking.reason,
+        "appointment_date": booking.appointment_date,
+        "appointment_time": appointment_time,
+        "visitor_name": booking.visitor_name,
+        "visitor_email": booking.email,
+        "visitor_phone": booking.phone,
+        "company_id": booking.company_id or ASSISTANT_COMPANY_ID,
+        "booking_method": "voice",
+    }
 
 @app.post("/api/appointments")
 def create_appointment(booking: AppointmentBooking):
+    appointment = booking_to_appointment(booking)
+    # Same path as the SaaS API: business hours, then the slot check inside the insert transaction
+    try:
+        appointment_id = availability_engine.book(**appointment)
+    except SlotConflictError as e:
+        free_slots = availability_engine.free_slots(
+            appointment["company_id"], appointment["employee_name"], appointment["appointment_date"], appointment["employee_id"]
+        )
+        raise HTTPException(status_code=409, detail={"message": str(e), "free_slots": free_slots})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not appointment_id:
+        raise HTTPException(status_code=500, detail="Failed to save appointment")
+    return {"message": "Appointment saved successfully", "appointment_id": appointment_id}
+
+@app.post("/api/appointments/batch")
+def create_appointments_batch(bookings: List[AppointmentBooking]):
+    """Save several bookings (e.g. queued by a kiosk) in one transaction; a taken slot rejects the batch"""
+    appointments = [booking_to_appointment(b, i) for i, b in enumerate(bookings)]
     try:
-        conn = get_connection()
-        with conn:
-            with conn.cursor() as cursor:
-                sql = '''
-                INSERT INTO bookings (name, email, phone, department, employee, date, time, reason)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                '''
-                cursor.execute(sql, (
-                    booking.visitor_name,
-                    booking.email,
-                    booking.phone,
-                    booking.department,
-                    booking.employee_name,
-                    booking.appointment_date,
-                    booking.appointment_time,
-                    booking.reason
-                ))
-            conn.commit()
-        return {"message": "Appointment saved successfully"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        appointment_ids = availability_engine.book_many(appointments)
+    except SlotConflictError as e:
+        raise HTTPException(status_code=409, detail={"message": str(e)})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if bookings and not appointment_ids:
+        raise HTTPException(status_code=500, detail="Failed to save appointments")
+    return {"message": f"{len(appointment_ids)} appointments saved successfully", "appointment_ids": appointment_ids}
 
 @app.get("/ping")
 def ping():
@@ -108,6 +100,33 @@ def ping():
 
 # ---- Appointment Assistant Logic ----
 
+CONFIRM_WORDS = {"yes", "haan", "ho", "chalega", "done", "ok", "okay", "yup", "sure", "si", "oui", "да", "はい", "evet", "correct", "confirm"}
+
+def is_confirmation_reply(messages, text):
+    """True if `text` answers the assistant's "Type yes to confirm" prompt (last message in `messages`)"""
+    return bool(
+        messages and messages[-1]["role"] == "assistant" and
+        messages[-1]["content"].lower().endswith("type yes to confirm") and
+        text.strip().lower() in CONFIRM_WORDS
+    )
+
+def parse_appointment_time(text):
+    """Parse a spoken/typed time ("3 pm", "10:30am", "14:15") into HH:MM:SS, or None"""
+    text = str(text or "").lower()
+    match = (re.search(r"\b(\d{1,2})(?:[:.](\d{2}))?\s*(a\.?m\b\.?|p\.?m\b\.?)", text) or
+             re.search(r"\b(\d{1,2})[:.](\d{2})()\b", text))
+    if not match:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    meridiem = (match.group(3) or "").replace(".", "")
+    if meridiem == "pm" and hour < 12:
+        hour += 12
+    elif meridiem == "am" and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        return None
+    return f"{hour:02d}:{minute:02d}:00"
+
 def is_valid_value(val):
     return bool(val and str(val).strip().lower() not in ["none", "null"])
 
@@ -139,9 +158,55 @@ def build_dynamic_prompt(state):
             f"Date: {state['appointment_date']} (today)"
         )
 
-def run_assistant(messages, state=None, confirmed=False):
+def warm_up():
+    """Load the LLM client and embedding model now instead of on the first assistant turn"""
+    get_model()
+    get_embedding_function()
+
+def get_employee_collection(company_id=None):
+    """Vector search collection (fallback for names the fuzzy matcher can't resolve)"""
+    if company_id is not None:
+        return get_synced_company_collection(company_id)
+    return get_chroma_client().get_or_create_collection(
+        name="employee_collection",
+        embedding_function=get_embedding_function()
+    )
+
+def find_employee_matches(possible_name, company_id=None):
+    """Resolve a spoken/typed name to (confident_match, top_matches), trying the fuzzy matcher before vector search"""
+    matcher = get_name_matcher(company_id)
+    confident = matcher.best(possible_name)
+    if confident:
+        return confident, [confident]
+    top_matches = [m.employee for m in matcher.match(possible_name, limit=3)]
+    if top_matches:
+        return None, top_matches
+    result = get_employee_collection(company_id).query(query_texts=[possible_name], n_results=3)
+    return None, result["metadatas"][0] if result["metadatas"][0] else []
+
+def pick_department_employee(text, possible_name=None, company_id=None):
+    """If the visitor asked for a department rather than a person, pick its employee with the earliest free slot
+
+    Checked against the whole message, so "I want to meet someone in HR" routes to HR. A confidently
+    named employee of that department ("Priya from HR") is returned as-is instead.
+    """
+    matcher = get_name_matcher(company_id)
+    department = matcher.find_department(text)
+    if not department:
+        return None
+    named = matcher.best(possible_name) if possible_name else None
+    if named and named["department"] == department:
+        return named
+    employees = [e for e in matcher.employees if e["department"] == department]
+    result = availability_engine.department_free_slots(
+        company_id or ASSISTANT_COMPANY_ID, department, date.today(), limit=1, employees=employees
+    )
+    return result["slots"][0] if result["slots"] else None
+
+def run_assistant(messages, state=None, confirmed=False, company_id=None):
     if state is None:
         state = {
+            "employee_id": None,
             "employee_name": None,
             "department": None,
             "reason": None,
@@ -152,12 +217,6 @@ def run_assistant(messages, state=None, confirmed=False):
             "appointment_date": str(date.today())
         }
 
-    client = chromadb.PersistentClient(path="./employee_db")
-    collection = client.get_or_create_collection(
-        name="employee_collection",
-        embedding_function=SentenceTransformerEmbeddingFunction("all-MiniLM-L6-v2")
-    )
-
     conversation = [{
         "role": "system",
         "content": (
@@ -171,7 +230,6 @@ def run_assistant(messages, state=None, confirmed=False):
     }] + messages
 
     def extract_possible_name(text):
-        import re
         text = text.strip()
         if not text or "@" in text or any(char.isdigit() for char in text):
             return None
@@ -189,9 +247,25 @@ def run_assistant(messages, state=None, confirmed=False):
 
     if not state["employee_name"] and last_user_msg:
         possible_name = extract_possible_name(last_user_msg)
+        # Department first: full sentences usually yield no possible_name at all
+        available = pick_department_employee(last_user_msg, possible_name, company_id)
+        if available:
+            state["employee_id"] = available.get("employee_id")
+            state["employee_name"] = available["employee_name"]
+            state["department"] = available["department"]
+            if "slot" not in available:
+                return build_dynamic_prompt(state), state, None, False
+            return (
+                f"{available['employee_name']} from {available['department']} is free from {available['slot']} today. "
+                + build_dynamic_prompt(state)
+            ), state, None, False
         if possible_name:
-            result = collection.query(query_texts=[possible_name], n_results=3)
-            top_matches = result["metadatas"][0] if result["metadatas"][0] else []
+            confident, top_matches = find_employee_matches(possible_name, company_id)
+            if confident:
+                state["employee_id"] = confident.get("employee_id")
+                state["employee_name"] = confident["employee_name"]
+                state["department"] = confident["department"]
+                return build_dynamic_prompt(state), state, None, False
             if top_matches:
                 options = ", ".join(f"{e['employee_name']} ({e['department']})" for e in top_matches)
                 ask = (
@@ -202,9 +276,12 @@ def run_assistant(messages, state=None, confirmed=False):
                 gemini_choice, _, _ = send_to_gemini(conversation)
                 if '|' in gemini_choice:
                     emp, dept = map(str.strip, gemini_choice.split('|', 1))
+                    chosen = next((e for e in top_matches if e["employee_name"] == emp), {})
+                    state["employee_id"] = chosen.get("employee_id")
                     state["employee_name"] = emp
                     state["department"] = dept
                 else:
+                    state["employee_id"] = top_matches[0].get("employee_id")
                     state["employee_name"] = top_matches[0]["employee_name"]
                     state["department"] = top_matches[0]["department"]
                 return build_dynamic_prompt(state), state, None, False
@@ -7,7 +7,8 @@ from config import JWT_SECRET_KEY, JWT_ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, O
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from config import EMAIL_HOST, EMAIL_PORT, EMAIL_USER, EMAIL_PASSWORD
+from config import EMAIL_HOST, EMAIL_PORT, EMAIL_USER, EMAIL_PASSWORD, EMAIL_DELIVERY
+from instrumentation import track
 
 def create_access_token(data: Dict[str, Any]) -> str:
     """Create JWT access token"""
@@ -36,6 +37,8 @@ def get_otp_expiry() -> str:
 
 def send_otp_email(email: str, otp: str, company_name: str) -> bool:
     """Send OTP email to user"""
+    if EMAIL_DELIVERY == "disabled":
+        return True
     try:
         # Create message
         msg = MIMEMultipart()
@@ -59,12 +62,13 @@ def send_otp_email(email: str, otp: str, company_name: str) -> bool:
         msg.attach(MIMEText(body, 'plain'))
         
         # Send email
-        server = smtplib.SMTP(EMAIL_HOST, EMAIL_PORT)
-        server.starttls()
-        server.login(EMAIL_USER, EMAIL_PASSWORD)
-        text = msg.as_string()
-        server.sendmail(EMAIL_USER, email, text)
-        server.quit()
+        with track("smtp"):
+            server = smtplib.SMTP(EMAIL_HOST, EMAIL_PORT)
+            server.starttls()
+            server.login(EMAIL_USER, EMAIL_PASSWORD)
+            text = msg.as_string()
+            server.sendmail(EMAIL_USER, email, text)
+            server.quit()
         
         return True
     except Exception as e:
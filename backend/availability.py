@@ -0,0 +1,281 @@
+"""
+Appointment availability and slot-conflict checks.
+
+Booked appointments for a (company, date) are loaded with a single query into
+a DaySchedule that keeps a sorted list of booked start minutes per employee,
+so "is this slot free" is a bisect and "free slots for X on D" is one linear
+pass over the business day. The cache only serves reads; the authoritative
+conflict check happens in the same transaction as the insert
+(database.create_appointment with slot_minutes).
+"""
+
+import bisect
+import heapq
+import itertools
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta
+from datetime import time as dt_time
+from typing import Optional, List, Dict, Any
+
+from config import APPOINTMENT_SLOT_MINUTES, BUSINESS_HOURS_START, BUSINESS_HOURS_END, AVAILABILITY_CACHE_SECONDS
+from database import create_appointment, create_appointments, get_booked_slots, get_employees_by_company, SlotConflictError
+
+logger = logging.getLogger(__name__)
+
+# Number of striped locks serializing in-process bookings per employee-day
+_LOCK_STRIPES = 64
+
+
+def to_minutes(value) -> int:
+    """Minutes since midnight for "HH:MM[:SS]" strings, datetime.time or the timedelta mysql.connector returns"""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, timedelta):
+        return int(value.total_seconds()) // 60
+    if isinstance(value, dt_time):
+        return value.hour * 60 + value.minute
+    parts = str(value).split(":")
+    return int(parts[0]) * 60 + int(parts[1])
+
+
+def format_minutes(minutes: int) -> str:
+    """Minutes since midnight as HH:MM"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def date_key(value) -> str:
+    """ISO date string for date objects or strings"""
+    return value.isoformat() if isinstance(value, date) else str(value)
+
+
+def employee_key(employee_name: str) -> str:
+    """Case/whitespace-insensitive key for an employee name"""
+    return " ".join(str(employee_name).lower().split())
+
+
+def schedule_key(employee_id: Optional[int], employee_name: Optional[str] = None):
+    """Schedule key: the employee's integer id, or the normalized name for free-text bookings"""
+    return employee_id if employee_id else employee_key(employee_name)
+
+
+class DaySchedule:
+    """Sorted booked start times (minutes) per employee (see schedule_key) for one company and date"""
+
+    def __init__(self, bookings: List[Dict[str, Any]]):
+        self.loaded_at = time.monotonic()
+        self.booked: Dict[Any, List[int]] = {}
+        for booking in bookings:
+            key = schedule_key(booking.get("employee_id"), booking["employee_name"])
+            self.add(key, to_minutes(booking["appointment_time"]))
+
+    def add(self, key, start: int) -> None:
+        bisect.insort(self.booked.setdefault(key, []), start)
+
+    def is_free(self, key, start: int, slot_minutes: int) -> bool:
+        starts = self.booked.get(key)
+        if not starts:
+            return True
+        # First booking that starts late enough to overlap [start, start + slot)
+        i = bisect.bisect_right(starts, start - slot_minutes)
+        return i == len(starts) or starts[i] >= start + slot_minutes
+
+    def free_slots(self, key, slot_minutes: int, opens: int, closes: int, not_before: int = 0) -> List[int]:
+        starts = self.booked.get(key, [])
+        free = []
+        i = 0
+        start = opens
+        while start + slot_minutes <= closes:
+            # Skip bookings that end before this candidate slot starts
+            while i < len(starts) and starts[i] + slot_minutes <= start:
+                i += 1
+            if start >= not_before and (i == len(starts) or starts[i] >= start + slot_minutes):
+                free.append(start)
+            start += slot_minutes
+        return free
+
+
+class AvailabilityEngine:
+    """Cached per-day schedules plus conflict-checked booking"""
+
+    def __init__(
+        self,
+        slot_minutes: int = APPOINTMENT_SLOT_MINUTES,
+        opens: str = BUSINESS_HOURS_START,
+        closes: str = BUSINESS_HOURS_END,
+        cache_seconds: int = AVAILABILITY_CACHE_SECONDS
+    ):
+        self.slot_minutes = slot_minutes
+        self.opens = to_minutes(opens)
+        self.closes = to_minutes(closes)
+        self.cache_seconds = cache_seconds
+        self._days: Dict[tuple, DaySchedule] = {}
+        self._days_lock = threading.Lock()
+        self._rosters: Dict[int, tuple] = {}
+        self._rosters_lock = threading.Lock()
+        self._booking_locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+
+    def day_schedule(self, company_id: int, appointment_date) -> DaySchedule:
+        """Cached schedule for a company and date, reloaded after cache_seconds"""
+        key = (company_id, date_key(appointment_date))
+        schedule = self._days.get(key)
+        if schedule and time.monotonic() - schedule.loaded_at < self.cache_seconds:
+            return schedule
+        schedule = DaySchedule(get_booked_slots(company_id, key[1]))
+        with self._days_lock:
+            self._days[key] = schedule
+            self._evict_stale_locked()
+        return schedule
+
+    def _evict_stale_locked(self) -> None:
+        now = time.monotonic()
+        stale = [k for k, s in self._days.items() if now - s.loaded_at >= self.cache_seconds]
+        for k in stale:
+            del self._days[k]
+
+    def invalidate(self, company_id: int, appointment_date) -> None:
+        """Forget a cached day (after cancellations, reschedules or a lost booking race)"""
+        with self._days_lock:
+            self._days.pop((company_id, date_key(appointment_date)), None)
+
+    def _not_before(self, appointment_date) -> int:
+        if date_key(appointment_date) == date.today().isoformat():
+            now = datetime.now()
+            return now.hour * 60 + now.minute
+        return 0
+
+    def free_slots(self, company_id: int, employee_name: Optional[str], appointment_date, employee_id: Optional[int] = None) -> List[str]:
+        """Free slot start times (HH:MM) for an employee on a date"""
+        schedule = self.day_schedule(company_id, appointment_date)
+        minutes = schedule.free_slots(
+            schedule_key(employee_id, employee_name), self.slot_minutes, self.opens, self.closes, self._not_before(appointment_date)
+        )
+        return [format_minutes(m) for m in minutes]
+
+    def is_free(self, company_id: int, employee_name: Optional[str], appointment_date, appointment_time, employee_id: Optional[int] = None) -> bool:
+        """Whether an employee has no booking overlapping the slot starting at appointment_time"""
+        start = to_minutes(appointment_time)
+        schedule = self.day_schedule(company_id, appointment_date)
+        return schedule.is_free(schedule_key(employee_id, employee_name), start, self.slot_minutes)
+
+    def department_roster(self, company_id: int, department: str) -> List[Dict[str, Any]]:
+        """Active employees of a department (company roster cached for cache_seconds)"""
+        with self._rosters_lock:
+            cached = self._rosters.get(company_id)
+        if not cached or time.monotonic() - cached[0] >= self.cache_seconds:
+            # Loaded outside the lock (like day_schedule); concurrent reloads just store the same roster
+            by_department: Dict[str, List[Dict[str, Any]]] = {}
+            for employee in get_employees_by_company(company_id):
+                by_department.setdefault(employee_key(employee["department"]), []).append(employee)
+            cached = (time.monotonic(), by_department)
+            with self._rosters_lock:
+                self._rosters[company_id] = cached
+        return cached[1].get(employee_key(department), [])
+
+    def department_free_slots(
+        self,
+        company_id: int,
+        department: str,
+        appointment_date,
+        limit: int = 10,
+        offset: int = 0,
+        employees: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """Earliest free slots across a department, ranked by start time then by how busy the employee is
+
+        Every employee is evaluated against the same cached day schedule, so this is
+        one query per (company, date) at most, not one per employee.
+        """
+        if employees is None:
+            employees = self.department_roster(company_id, department)
+        schedule = self.day_schedule(company_id, appointment_date)
+        not_before = self._not_before(appointment_date)
+
+        per_employee = []
+        total = 0
+        for employee in employees:
+            name = employee.get("employee_name") or employee["name"]
+            key = schedule_key(employee.get("employee_id", employee.get("id")), name)
+            load = len(schedule.booked.get(key, ()))
+            starts = schedule.free_slots(key, self.slot_minutes, self.opens, self.closes, not_before)
+            total += len(starts)
+            per_employee.append([(start, load, name, employee) for start in starts])
+
+        # Each per-employee list is already sorted by start, so a lazy k-way merge ranks them
+        ranked = heapq.merge(*per_employee, key=lambda item: item[:3])
+        page = itertools.islice(ranked, offset, offset + limit)
+        return {
+            "total": total,
+            "slots": [
+                {
+                    "employee_id": employee.get("employee_id", employee.get("id")),
+                    "employee_name": name,
+                    "department": employee["department"],
+                    "slot": format_minutes(start),
+                }
+                for start, _, name, employee in page
+            ],
+        }
+
+    def validate_time(self, appointment_time) -> int:
+        """Minutes since midnight for a requested time; ValueError outside business hours"""
+        start = to_minutes(appointment_time)
+        if start < self.opens or start + self.slot_minutes > self.closes:
+            raise ValueError(
+                f"Appointments must be between {format_minutes(self.opens)} and "
+                f"{format_minutes(self.closes - self.slot_minutes)}"
+            )
+        return start
+
+    def book(self, **appointment) -> Optional[int]:
+        """Create an appointment if the slot is free; raises SlotConflictError otherwise
+
+        Takes the same keyword arguments as database.create_appointment. The cached day is
+        never used to turn a booking away (it may predate a cancellation in another worker);
+        the check in the insert transaction decides.
+        """
+        start = self.validate_time(appointment["appointment_time"])
+        company_id = appointment["company_id"]
+        day = date_key(appointment["appointment_date"])
+        key = schedule_key(appointment.get("employee_id"), appointment["employee_name"])
+        lock = self._booking_locks[hash((company_id, key, day)) % _LOCK_STRIPES]
+
+        with lock:
+            try:
+                appointment_id = create_appointment(**appointment, slot_minutes=self.slot_minutes)
+            except SlotConflictError:
+                # Someone else holds the slot; our cached day may not know about it yet
+                self.invalidate(company_id, day)
+                raise
+            if appointment_id:
+                self._remember(company_id, day, key, start)
+            return appointment_id
+
+    def book_many(self, appointments: List[Dict[str, Any]]) -> List[int]:
+        """Create several appointments in one transaction, each slot-checked like book()
+
+        Raises ValueError for a time outside business hours and SlotConflictError if any
+        slot is taken (nothing is saved in either case).
+        """
+        starts = [self.validate_time(a["appointment_time"]) for a in appointments]
+        try:
+            appointment_ids = create_appointments(appointments, slot_minutes=self.slot_minutes)
+        except SlotConflictError:
+            for a in appointments:
+                self.invalidate(a["company_id"], a["appointment_date"])
+            raise
+        if appointment_ids:
+            for a, start in zip(appointments, starts):
+                key = schedule_key(a.get("employee_id"), a["employee_name"])
+                self._remember(a["company_id"], date_key(a["appointment_date"]), key, start)
+        return appointment_ids
+
+    def _remember(self, company_id: int, day: str, key, start: int) -> None:
+        schedule = self._days.get((company_id, day))
+        if schedule:
+            schedule.add(key, start)
+
+
+# Global availability engine instance
+availability_engine = AvailabilityEngine()
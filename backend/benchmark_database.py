@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark the database.py helpers against seeded data at several sizes
+
+For every size in --sizes a benchmark company is seeded (benchmark_seed.py)
+with that many appointments, and each helper below is called --repeat times
+against it. Per helper and size the harness records latency (mean, p50, p95),
+database round trips per call (statements executed, as counted by the timed
+cursor; commits are not included), pooled connections acquired per call and
+rows returned per call. Results are written as JSON; pass an earlier results
+file with --compare to print the change per helper and size.
+
+Usage: python benchmark_database.py [--sizes 100,1000,10000] [--employees E] [--repeat N]
+                                    [--only NAME[,NAME...]] [--output FILE] [--compare FILE]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from benchmark_seed import seed, cleanup, BENCH_DOMAIN
+
+import database
+from instrumentation import collect_timings
+from config import APPOINTMENT_SLOT_MINUTES
+
+
+def build_cases(company_id, employees, sample):
+    """(name, callable(i)) pairs; i is the repetition index, used to keep writes distinct"""
+    admin_email = sample["admin_email"]
+    employee = employees[0]
+    visitor_email = sample["visitor_email"]
+    appointment_id = sample["appointment_id"]
+    today = date.today()
+
+    def future_slot(i):
+        # Distinct slot per repetition, well clear of the seeded (past) appointments
+        target = employees[i % len(employees)]
+        slot = (i // len(employees)) % 16
+        day = today + timedelta(days=400 + i // (len(employees) * 16))
+        return target, day.isoformat(), f"{9 + slot // 2:02d}:{30 * (slot % 2):02d}:00"
+
+    def create_appointment(i, slot_minutes=None):
+        target, day, start = future_slot(i)
+        return database.create_appointment(
+            target["name"], target["department"], "Benchmark", day, start,
+            f"Bench Visitor {i}", f"bench{i}@{BENCH_DOMAIN}", "9800000000", company_id,
+            slot_minutes=slot_minutes, employee_id=target["id"]
+        )
+
+    def create_appointments(i):
+        rows = []
+        for n in range(10):
+            target, day, start = future_slot(100000 + i * 10 + n)
+            rows.append({
+                "employee_id": target["id"], "employee_name": target["name"], "department": target["department"],
+                "appointment_date": day, "appointment_time": start, "visitor_name": f"Batch Visitor {n}",
+                "visitor_email": f"batch{i}_{n}@{BENCH_DOMAIN}", "company_id": company_id,
+            })
+        return database.create_appointments(rows)
+
+    return [
+        ("get_company_by_id", lambda i: database.get_company_by_id(company_id)),
+        ("get_user_by_email_and_role", lambda i: database.get_user_by_email_and_role(admin_email, "admin")),
+        ("get_users_by_company", lambda i: database.get_users_by_company(company_id)),
+        ("update_user_otp", lambda i: database.update_user_otp(
+            sample["admin_id"], "123456", (datetime.now() + timedelta(minutes=10)).strftime("%Y-%m-%d %H:%M:%S"))),
+        ("get_employees_by_company", lambda i: database.get_employees_by_company(company_id)),
+        ("get_employee_by_id_and_company", lambda i: database.get_employee_by_id_and_company(employee["id"], company_id)),
+        ("get_employee_by_name_and_company", lambda i: database.get_employee_by_name_and_company(employee["name"], company_id)),
+        ("get_employees_by_department", lambda i: database.get_employees_by_department(company_id, employee["department"])),
+        ("get_appointment_by_id", lambda i: database.get_appointment_by_id(appointment_id)),
+        ("get_appointments_by_company", lambda i: database.get_appointments_by_company(company_id)),
+        ("get_appointments_by_visitor_email", lambda i: database.get_appointments_by_visitor_email(visitor_email)),
+        ("get_appointments_by_employee", lambda i: database.get_appointments_by_employee(company_id, employee["id"])),
+        ("get_booked_slots", lambda i: database.get_booked_slots(company_id, sample["busy_date"])),
+        ("update_appointment_status", lambda i: database.update_appointment_status(appointment_id, "confirmed")),
+        ("create_appointment", create_appointment),
+        ("create_appointment_checked", lambda i: create_appointment(50000 + i, APPOINTMENT_SLOT_MINUTES)),
+        ("create_appointments_x10", create_appointments),
+    ]
+
+
+def rows_in(result):
+    if isinstance(result, list):
+        return len(result)
+    return 0 if result is None or isinstance(result, bool) else 1
+
+
+def measure(name, size, call, repeat):
+    latencies = []
+    round_trips = connections = rows = 0
+    for i in range(repeat):
+        with collect_timings() as timings:
+            started = time.perf_counter()
+            result = call(i)
+            latencies.append(time.perf_counter() - started)
+        round_trips += timings.components.get("db_query", [0, 0.0])[0]
+        connections += timings.components.get("db_acquire", [0, 0.0])[0]
+        rows += rows_in(result)
+    latencies.sort()
+    return {
+        "function": name,
+        "size": size,
+        "calls": repeat,
+        "mean_ms": round(statistics.mean(latencies) * 1000, 3),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 3),
+        "round_trips_per_call": round(round_trips / repeat, 2),
+        "connections_per_call": round(connections / repeat, 2),
+        "rows_per_call": round(rows / repeat, 2),
+    }
+
+
+def sample_for(company):
+    """Lookup keys for the read helpers, taken from the seeded company"""
+    appointments = database.get_appointments_by_company(company["company_id"])
+    admin = database.get_user_by_email_and_role(company["admin_email"], "admin")
+    busy = appointments[0] if appointments else None
+    return {
+        "admin_email": company["admin_email"],
+        "admin_id": admin["id"],
+        "appointment_id": busy["id"] if busy else 0,
+        "visitor_email": busy["visitor_email"] if busy else "",
+        "busy_date": str(busy["appointment_date"]) if busy else date.today().isoformat(),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r["function"], r["size"]): r for r in json.load(f)["results"]}
+    print(f"\n🔍 Compared with {baseline_path}")
+    print(f"{'function':<36} {'size':>7} {'p50 ms':>18} {'change':>8} {'round trips':>14}")
+    for row in results:
+        before = baseline.get((row["function"], row["size"]))
+        if not before:
+            continue
+        change = (row["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100 if before["p50_ms"] else 0.0
+        print(f"{row['function']:<36} {row['size']:>7} {before['p50_ms']:>8} → {row['p50_ms']:<7} {change:>+7.1f}% "
+              f"{before['round_trips_per_call']:>6} → {row['round_trips_per_call']:<5}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,1000,10000", help="appointments per seeded company, comma-separated")
+    parser.add_argument("--employees", type=int, default=50, help="employees per seeded company")
+    parser.add_argument("--repeat", type=int, default=50, help="calls per helper and size")
+    parser.add_argument("--only", help="comma-separated helper names to run")
+    parser.add_argument("--output", default=f"benchmark_database_{datetime.now():%Y%m%d_%H%M%S}.json")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    only = set(args.only.split(",")) if args.only else None
+    results = []
+
+    try:
+        for size in sizes:
+            print(f"🌱 Seeding company with {args.employees} employees and {size} appointments...")
+            company = seed(companies=1, employees=args.employees, appointments=size)[0]
+            employees = database.get_employees_by_company(company["company_id"])
+            cases = build_cases(company["company_id"], employees, sample_for(company))
+            for name, call in cases:
+                if only and name not in only:
+                    continue
+                row = measure(name, size, call, args.repeat)
+                results.append(row)
+                print(f"   {name:<36} p50 {row['p50_ms']:>8} ms  p95 {row['p95_ms']:>8} ms  "
+                      f"round trips {row['round_trips_per_call']:>5}  rows {row['rows_per_call']:>8}")
+    finally:
+        cleanup()
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "sizes": sizes,
+            "employees": args.employees,
+            "repeat": args.repeat,
+            "results": results,
+        }, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
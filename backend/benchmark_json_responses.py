@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark list response serialization: Pydantic models + FastAPI encoding vs. the fast path
+
+Builds synthetic appointment rows shaped like database.get_appointments_by_company
+output and times, per response:
+  - standard: AppointmentResponse per row, response_model validation,
+    jsonable_encoder and json.dumps (what FastAPI does without FAST_JSON_RESPONSES)
+  - fast:     fast_json.project_rows + dumps (orjson when installed)
+
+Usage: python benchmark_json_responses.py [--rows N] [--repeat N]
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+from datetime import time as dt_time
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from fast_json import dumps, orjson, project_rows
+from models import AppointmentResponse
+
+
+def make_rows(count, seed=42):
+    """Typed rows as returned by the data layer (after map_appointment_row)"""
+    rng = random.Random(seed)
+    today = date.today()
+    created = datetime.now().replace(microsecond=0)
+    return [
+        {
+            "id": i,
+            "employee_id": rng.randrange(1, 200),
+            "employee_name": f"Employee {rng.randrange(1, 200)}",
+            "department": rng.choice(["HR", "IT", "Sales", "Finance", "Marketing"]),
+            "reason": "Interview",
+            "appointment_date": today + timedelta(days=rng.randrange(0, 30)),
+            "appointment_time": dt_time(rng.randrange(9, 17), rng.choice([0, 30])),
+            "visitor_name": f"Visitor {i}",
+            "visitor_email": f"visitor{i}@example.com",
+            "visitor_phone": f"98{i:08d}",
+            "company_id": 1,
+            "company_name": "Kanishka Software",
+            "booking_method": rng.choice(["manual", "voice"]),
+            "status": "confirmed",
+            "qr_code_sent": 1,
+            "email_sent": 1,
+            "created_at": created,
+            "updated_at": created,
+        }
+        for i in range(count)
+    ]
+
+
+def standard_encode(rows, adapter):
+    models = [AppointmentResponse(**row) for row in rows]
+    validated = adapter.validate_python(models)
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_encode(rows):
+    return dumps(project_rows(rows, AppointmentResponse))
+
+
+def time_it(name, encode, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = encode()
+        timings.append((time.perf_counter() - start) * 1e3)
+    print(f"   {name:<10} mean {statistics.mean(timings):8.2f} ms | min {min(timings):8.2f} ms | {len(body) / 1024:,.0f} KiB")
+    return statistics.mean(timings), body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="rows per response")
+    parser.add_argument("--repeat", type=int, default=10, help="encodings per variant")
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    adapter = TypeAdapter(List[AppointmentResponse])
+    print(f"📦 {args.rows:,} appointment rows, {args.repeat} runs each (encoder: {'orjson' if orjson else 'json'})")
+
+    standard_ms, standard_body = time_it("standard", lambda: standard_encode(rows, adapter), args.repeat)
+    fast_ms, fast_body = time_it("fast", lambda: fast_encode(rows), args.repeat)
+
+    if json.loads(standard_body) != json.loads(fast_body):
+        print("❌ Fast path output differs from the standard response")
+        return 1
+    print(f"✅ Identical JSON, fast path {standard_ms / fast_ms:.1f}x faster")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
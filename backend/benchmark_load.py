@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Load-test the running SaaS API against seeded benchmark data
+
+Seeds the local MySQL database (benchmark_seed.py) with N companies, each with
+an admin, E employees and A past appointments, then drives the real HTTP
+endpoints from a pool of client threads and reports, per endpoint, request
+count, errors, throughput and p50/p95/p99 latency. Phases run one after the
+other so their numbers do not mix:
+
+  auth  POST /admin/login + POST /admin/verify-otp (OTP read back from the DB)
+  list  GET /appointments and GET /admin/employees
+  book  POST /appointments into free future slots (409s are counted as errors)
+  csv   POST /admin/employees/upload-csv with a generated CSV
+
+Start the server with EMAIL_DELIVERY=disabled so logins don't send real mail.
+Benchmark data is removed afterwards unless --keep-data is given.
+
+Usage: python benchmark_load.py [--base-url URL] [--concurrency N] [--requests N]
+                                [--companies N] [--employees E] [--appointments A]
+                                [--phases auth,list,book,csv] [--json FILE] [--keep-data]
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import requests
+
+from benchmark_seed import seed, read_otp, cleanup, BENCH_DOMAIN, DEPARTMENTS
+
+PHASES = ("auth", "list", "book", "csv")
+SLOTS_PER_DAY = 16
+CSV_ROWS = 20
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class Recorder:
+    """Latencies and error counts per endpoint label"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.elapsed = {}
+
+    def add(self, label, seconds, ok):
+        with self._lock:
+            self.latencies.setdefault(label, []).append(seconds)
+            if not ok:
+                self.errors[label] = self.errors.get(label, 0) + 1
+
+    def summary(self):
+        report = {}
+        for label, values in self.latencies.items():
+            values = sorted(values)
+            elapsed = self.elapsed.get(label, 0.0)
+            report[label] = {
+                "requests": len(values),
+                "errors": self.errors.get(label, 0),
+                "throughput_rps": round(len(values) / elapsed, 1) if elapsed else 0.0,
+                "p50_ms": round(percentile(values, 0.50) * 1000, 1),
+                "p95_ms": round(percentile(values, 0.95) * 1000, 1),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 1),
+            }
+        return report
+
+
+class LoadClient:
+    def __init__(self, base_url, recorder):
+        self.base_url = base_url.rstrip("/")
+        self.recorder = recorder
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        # One keep-alive session per client thread
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def call(self, label, method, path, token=None, expect=200, **kwargs):
+        headers = kwargs.pop("headers", {})
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, headers=headers, timeout=30, **kwargs)
+        except requests.RequestException:
+            self.recorder.add(label, time.perf_counter() - started, ok=False)
+            return None
+        self.recorder.add(label, time.perf_counter() - started, ok=response.status_code == expect)
+        return response if response.status_code == expect else None
+
+
+def run_phase(recorder, labels, concurrency, tasks):
+    """Run callables on a thread pool; wall time is credited to every label of the phase"""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(task) for task in tasks]:
+            future.result()
+    elapsed = time.perf_counter() - started
+    for label in labels:
+        recorder.elapsed[label] = elapsed
+
+
+def login(client, company, locks):
+    # Logins for the same admin are serialized: a second login would overwrite the OTP
+    with locks[company["admin_email"]]:
+        if not client.call("POST /admin/login", "post", "/admin/login",
+                           json={"email": company["admin_email"], "role": "admin"}):
+            return None
+        otp = read_otp(company["admin_email"])
+        response = client.call("POST /admin/verify-otp", "post", "/admin/verify-otp",
+                               json={"email": company["admin_email"], "otp": otp, "role": "admin"})
+    return response.json()["access_token"] if response else None
+
+
+def booking_payload(company, index):
+    """A distinct future slot for every index: employee round-robin, then slot, then day"""
+    employee_ids = company["employee_ids"]
+    employee_id = employee_ids[index % len(employee_ids)]
+    slot = (index // len(employee_ids)) % SLOTS_PER_DAY
+    day = date.today() + timedelta(days=1 + index // (len(employee_ids) * SLOTS_PER_DAY))
+    return {
+        "employee_id": employee_id,
+        "employee_name": "",
+        "department": "",
+        "reason": "Load test visit",
+        "appointment_date": day.isoformat(),
+        "appointment_time": f"{9 + slot // 2:02d}:{30 * (slot % 2):02d}",
+        "visitor_name": f"Load Visitor {index}",
+        "visitor_email": f"load{company['company_id']}_{index}@{BENCH_DOMAIN}",
+        "visitor_phone": "9800000000",
+        "booking_method": "manual",
+    }
+
+
+def employees_csv(run_id, index):
+    lines = ["name,email,department,designation,phone"]
+    for row in range(CSV_ROWS):
+        lines.append(
+            f"Csv Employee {index}-{row},csv{run_id}_{index}_{row}@{BENCH_DOMAIN},"
+            f"{DEPARTMENTS[row % len(DEPARTMENTS)]},Analyst,91000{row:05d}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def print_report(report, concurrency):
+    print(f"\n📊 Results (concurrency {concurrency})")
+    print(f"{'endpoint':<28} {'reqs':>6} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for label, row in report.items():
+        print(f"{label:<28} {row['requests']:>6} {row['errors']:>6} {row['throughput_rps']:>8} "
+              f"{row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--concurrency", type=int, default=10, help="client threads")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint (per phase)")
+    parser.add_argument("--companies", type=int, default=5)
+    parser.add_argument("--employees", type=int, default=50, help="employees per company")
+    parser.add_argument("--appointments", type=int, default=500, help="seeded appointments per company")
+    parser.add_argument("--phases", default=",".join(PHASES), help="comma-separated subset of " + ",".join(PHASES))
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--keep-data", action="store_true", help="leave the seeded benchmark data in place")
+    args = parser.parse_args()
+
+    phases = [p.strip() for p in args.phases.split(",") if p.strip()]
+    unknown = set(phases) - set(PHASES)
+    if unknown:
+        parser.error(f"unknown phases: {', '.join(sorted(unknown))}")
+
+    try:
+        requests.get(args.base_url.rstrip("/") + "/health", timeout=5).raise_for_status()
+    except requests.RequestException as e:
+        print(f"❌ API not reachable at {args.base_url}: {e}")
+        return 1
+
+    print(f"🌱 Seeding {args.companies} companies ({args.employees} employees, {args.appointments} appointments each)...")
+    companies = seed(args.companies, args.employees, args.appointments)
+    recorder = Recorder()
+    client = LoadClient(args.base_url, recorder)
+    locks = {company["admin_email"]: threading.Lock() for company in companies}
+
+    try:
+        # Every later phase needs one token per company; these logins are not part of the report
+        setup_client = LoadClient(args.base_url, Recorder())
+        tokens = {}
+        for company in companies:
+            tokens[company["company_id"]] = login(setup_client, company, locks)
+        if not all(tokens.values()):
+            print("❌ Could not log in as the benchmark admins (is EMAIL_DELIVERY=disabled set on the server?)")
+            return 1
+
+        def company_for(index):
+            return companies[index % len(companies)]
+
+        if "auth" in phases:
+            print("🔐 auth phase...")
+            run_phase(recorder, ["POST /admin/login", "POST /admin/verify-otp"], args.concurrency,
+                      [lambda i=i: login(client, company_for(i), locks) for i in range(args.requests)])
+
+        if "list" in phases:
+            print("📋 list phase...")
+            tasks = []
+            for i in range(args.requests):
+                token = tokens[company_for(i)["company_id"]]
+                tasks.append(lambda t=token: client.call("GET /appointments", "get", "/appointments", token=t))
+                tasks.append(lambda t=token: client.call("GET /admin/employees", "get", "/admin/employees", token=t))
+            run_phase(recorder, ["GET /appointments", "GET /admin/employees"], args.concurrency, tasks)
+
+        if "book" in phases:
+            print("📅 book phase...")
+            tasks = []
+            for i in range(args.requests):
+                company = company_for(i)
+                payload = booking_payload(company, i // len(companies))
+                tasks.append(lambda c=company, p=payload: client.call(
+                    "POST /appointments", "post", "/appointments", token=tokens[c["company_id"]], json=p))
+            run_phase(recorder, ["POST /appointments"], args.concurrency, tasks)
+
+        if "csv" in phases:
+            print("📤 csv phase...")
+            run_id = uuid.uuid4().hex[:8]
+            tasks = []
+            for i in range(args.requests):
+                token = tokens[company_for(i)["company_id"]]
+                files = {"file": (f"employees_{i}.csv", employees_csv(run_id, i), "text/csv")}
+                tasks.append(lambda t=token, f=files: client.call(
+                    "POST /admin/employees/upload-csv", "post", "/admin/employees/upload-csv", token=t, files=f))
+            run_phase(recorder, ["POST /admin/employees/upload-csv"], args.concurrency, tasks)
+
+        report = recorder.summary()
+        print_report(report, args.concurrency)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({
+                    "base_url": args.base_url,
+                    "concurrency": args.concurrency,
+                    "requests": args.requests,
+                    "companies": args.companies,
+                    "employees": args.employees,
+                    "appointments": args.appointments,
+                    "endpoints": report,
+                }, f, indent=2)
+            print(f"💾 Report written to {args.json}")
+        return 0
+    finally:
+        if not args.keep_data:
+            cleanup()
+            print("🗑️  Benchmark data removed")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
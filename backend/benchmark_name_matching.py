@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark employee name resolution: fuzzy/phonetic matcher vs. Chroma vector search
+
+Builds typo and voice-transcription variants of every name in data/employees.csv
+and reports top-1 accuracy and per-query latency for each engine. The vector
+search column is skipped when chromadb / sentence-transformers are not installed.
+It also checks the matcher's confident pick (best(), which the assistant books
+without asking) on ordinary words that must never resolve to an employee, and
+exits with status 1 if any of them does.
+
+Usage: python benchmark_name_matching.py [--repeat N]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+
+from name_matcher import NameMatcher, load_directory_csv
+
+# Spelling swaps commonly produced by speech-to-text on Indian and English names
+VOICE_SUBSTITUTIONS = [
+    ("v", "w"), ("ee", "i"), ("sh", "s"), ("ph", "f"), ("oo", "u"),
+    ("y", "i"), ("z", "s"), ("aa", "a"), ("a", "aa"), ("k", "c"),
+]
+
+
+# Words the assistant may pass to best() that are not names ("Can I meet ...", "Nice, thanks")
+NEGATIVE_QUERIES = [
+    "Can", "Nice", "Hello", "Please", "Thanks", "Sure", "Okay", "Yes", "Sorry",
+    "Tomorrow", "Morning", "Meeting", "Someone", "Team",
+]
+
+
+def make_variants(name, rng):
+    """Yield (label, query) variants of an employee name"""
+    first = name.split()[0]
+    yield "exact", name
+    yield "lowercase", name.lower()
+    yield "first name", first
+    if len(name) > 4:
+        i = rng.randrange(1, len(name) - 1)
+        yield "dropped letter", name[:i] + name[i + 1:]
+        j = rng.randrange(1, len(name) - 2)
+        yield "swapped letters", name[:j] + name[j + 1] + name[j] + name[j + 2:]
+    lowered = name.lower()
+    for src, dst in VOICE_SUBSTITUTIONS:
+        if src in lowered:
+            yield "voice", lowered.replace(src, dst, 1)
+            break
+
+
+def build_queries(directory, seed=42):
+    rng = random.Random(seed)
+    queries = []
+    for employee in directory:
+        for label, query in make_variants(employee["employee_name"], rng):
+            queries.append((label, query, employee["employee_name"]))
+    return queries
+
+
+def run_engine(name, lookup, queries, repeat):
+    """Time `lookup(query) -> top employee name` over all queries"""
+    latencies = []
+    correct = 0
+    by_label = {}
+    for label, query, expected in queries:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            top = lookup(query)
+        latencies.append((time.perf_counter() - start) / repeat * 1e6)
+        hit = top == expected
+        correct += hit
+        total, hits = by_label.get(label, (0, 0))
+        by_label[label] = (total + 1, hits + hit)
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"\n📊 {name}")
+    print(f"   Accuracy: {correct}/{len(queries)} ({correct / len(queries):.1%})")
+    print(f"   Latency:  mean {statistics.mean(latencies):,.1f} µs | p50 {statistics.median(latencies):,.1f} µs | p95 {p95:,.1f} µs")
+    for label, (total, hits) in sorted(by_label.items()):
+        print(f"   - {label:<16} {hits}/{total}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50, help="lookups per query for the fuzzy matcher")
+    args = parser.parse_args()
+
+    directory = load_directory_csv()
+    queries = build_queries(directory)
+    print(f"🔍 {len(directory)} employees, {len(queries)} queries")
+
+    start = time.perf_counter()
+    matcher = NameMatcher(directory)
+    print(f"⚙️  Fuzzy index built in {(time.perf_counter() - start) * 1e3:.2f} ms")
+
+    def fuzzy_lookup(query):
+        matches = matcher.match(query, limit=1)
+        return matches[0].employee["employee_name"] if matches else None
+
+    run_engine("Fuzzy/phonetic matcher", fuzzy_lookup, queries, args.repeat)
+
+    confident = sum(matcher.best(query) is not None for _, query, _ in queries)
+    false_positives = [(query, matcher.best(query)["employee_name"]) for query in NEGATIVE_QUERIES if matcher.best(query)]
+    print(f"   Confident picks: {confident}/{len(queries)} name variants")
+    print(f"   Non-name words resolved to an employee: {len(false_positives)}/{len(NEGATIVE_QUERIES)}")
+    for query, name in false_positives:
+        print(f"   ❌ {query!r} -> {name}")
+
+    try:
+        import chromadb
+        from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+    except ImportError:
+        print("\n⚠️  chromadb not installed - skipping vector search comparison")
+        return 1 if false_positives else 0
+
+    client = chromadb.EphemeralClient()
+    collection = client.get_or_create_collection(
+        name="benchmark_employees",
+        embedding_function=SentenceTransformerEmbeddingFunction("all-MiniLM-L6-v2")
+    )
+    collection.add(
+        ids=[str(i) for i in range(len(directory))],
+        documents=[e["employee_name"] for e in directory],
+        metadatas=directory,
+    )
+
+    def vector_lookup(query):
+        result = collection.query(query_texts=[query], n_results=1)
+        metadatas = result["metadatas"][0]
+        return metadatas[0]["employee_name"] if metadatas else None
+
+    run_engine("Chroma vector search (all-MiniLM-L6-v2)", vector_lookup, queries, 1)
+    return 1 if false_positives else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark appointment QR generation: legacy text blob vs. signed pass token vs. cache
+
+Times, per QR code, for synthetic appointments:
+  - legacy:  the old multi-line text payload at box_size=10 through qrcode's PIL image factory
+  - token:   qr_codes.render_png of the 32-character pass token (1-bit image, QR_BOX_SIZE)
+  - cached:  qr_cache.png for appointments that were already rendered (resends, reminders)
+and reports the QR version and PNG size of each.
+
+Usage: python benchmark_qr.py [--count N]
+"""
+
+import argparse
+import io
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from datetime import time as dt_time
+
+import qrcode
+import qrcode.constants
+
+from qr_codes import pass_token, render_png, QRCache, QR_MASK_PATTERN
+
+
+def make_appointments(count):
+    today = date.today()
+    return [
+        {
+            "id": 100000 + i,
+            "company_id": 1 + i % 7,
+            "employee_name": f"Employee {i % 200}",
+            "department": "Engineering",
+            "appointment_date": today + timedelta(days=i % 30),
+            "appointment_time": dt_time(9 + i % 8, 30 * (i % 2)),
+            "visitor_name": f"Visitor Number {i}",
+            "company_name": "Kanishka Software Private Limited",
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_png(appointment):
+    """The pre-token implementation of EmailService.generate_qr_code (without the base64 step)"""
+    qr_data = f"""
+            Appointment ID: {appointment['id']}
+            Employee: {appointment['employee_name']}
+            Department: {appointment['department']}
+            Date: {appointment['appointment_date']}
+            Time: {appointment['appointment_time']}
+            Visitor: {appointment['visitor_name']}
+            Company: {appointment['company_name']}
+            """
+    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=10, border=4)
+    qr.add_data(qr_data)
+    qr.make(fit=True)
+    buffer = io.BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(buffer)
+    return buffer.getvalue(), qr.version
+
+
+def token_png(appointment):
+    token = pass_token(appointment)
+    qr = qrcode.QRCode(version=None, error_correction=qrcode.constants.ERROR_CORRECT_M, mask_pattern=QR_MASK_PATTERN)
+    qr.add_data(token)
+    qr.make(fit=True)
+    return render_png(token), qr.version
+
+
+def timed(fn, appointments):
+    times, sizes, version = [], [], None
+    for appointment in appointments:
+        started = time.perf_counter()
+        result = fn(appointment)
+        times.append(time.perf_counter() - started)
+        png = result[0] if isinstance(result, tuple) else result
+        version = result[1] if isinstance(result, tuple) else version
+        sizes.append(len(png))
+    return times, sizes, version
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=500, help="QR codes per variant")
+    args = parser.parse_args()
+
+    appointments = make_appointments(args.count)
+    cache = QRCache(max_entries=args.count)
+    for appointment in appointments:
+        cache.png(appointment)
+
+    print(f"🔳 {args.count} QR codes per variant\n")
+    print(f"{'variant':<8} {'mean ms':>9} {'p95 ms':>9} {'version':>8} {'png bytes':>10}")
+    for name, fn in (("legacy", legacy_png), ("token", token_png), ("cached", cache.png)):
+        times, sizes, version = timed(fn, appointments)
+        times.sort()
+        print(f"{name:<8} {statistics.mean(times) * 1000:>9.3f} {times[int(len(times) * 0.95)] * 1000:>9.3f} "
+              f"{version or '-':>8} {statistics.mean(sizes):>10.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Seed (and remove) synthetic benchmark data in the local MySQL database
+
+Creates N companies, each with one admin user, E employees and A appointments,
+all under the @bench.example email domain so they can be told apart from real
+data and removed again with --cleanup (deleting the companies cascades to
+their users, employees and appointments). Used by benchmark_load.py and
+benchmark_database.py; can also be run on its own.
+
+Usage: python benchmark_seed.py [--companies N] [--employees E] [--appointments A] [--cleanup]
+"""
+
+import argparse
+import os
+import random
+import sys
+from datetime import date, timedelta
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import get_connection
+from setup_analytics_rollups import rebuild as rebuild_rollups
+
+BENCH_DOMAIN = "bench.example"
+BENCH_SUPERADMIN = f"superadmin@{BENCH_DOMAIN}"
+DEPARTMENTS = ["HR", "IT", "Sales", "Finance", "Marketing", "Operations"]
+FIRST_NAMES = ["Ravi", "Priya", "Amit", "Sara", "John", "Neha", "Arjun", "Meera", "Vikram", "Anita"]
+LAST_NAMES = ["Sharma", "Patil", "Johnson", "Kulkarni", "Smith", "Deshpande", "Rao", "Iyer"]
+INSERT_BATCH = 1000
+
+
+def _insert_many(connection, cursor, query, rows):
+    for start in range(0, len(rows), INSERT_BATCH):
+        cursor.executemany(query, rows[start:start + INSERT_BATCH])
+    connection.commit()
+
+
+def bench_superadmin_id(cursor):
+    cursor.execute("SELECT id FROM superadmins WHERE email = %s", (BENCH_SUPERADMIN,))
+    row = cursor.fetchone()
+    if row:
+        return row[0]
+    cursor.execute("INSERT INTO superadmins (email, name) VALUES (%s, %s)", (BENCH_SUPERADMIN, "Benchmark Superadmin"))
+    return cursor.lastrowid
+
+
+def seed(companies=5, employees=50, appointments=500, seed_value=42):
+    """Create benchmark companies and return [{company_id, admin_email, employee_ids}]"""
+    rng = random.Random(seed_value)
+    connection = get_connection()
+    if not connection:
+        raise RuntimeError("Failed to connect to database")
+    cursor = connection.cursor()
+    superadmin_id = bench_superadmin_id(cursor)
+
+    cursor.execute("SELECT COUNT(*) FROM companies WHERE email LIKE %s", (f"%@{BENCH_DOMAIN}",))
+    offset = cursor.fetchone()[0]
+
+    seeded = []
+    for c in range(offset, offset + companies):
+        cursor.execute(
+            "INSERT INTO companies (name, email, domain, created_by) VALUES (%s, %s, %s, %s)",
+            (f"Bench Company {c}", f"company{c}@{BENCH_DOMAIN}", BENCH_DOMAIN, superadmin_id)
+        )
+        company_id = cursor.lastrowid
+        admin_email = f"admin{c}@{BENCH_DOMAIN}"
+        cursor.execute(
+            "INSERT INTO users (email, name, role, company_id) VALUES (%s, %s, 'admin', %s)",
+            (admin_email, f"Bench Admin {c}", company_id)
+        )
+
+        employee_rows = [
+            (
+                company_id,
+                f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {e}",
+                f"employee{c}_{e}@{BENCH_DOMAIN}",
+                DEPARTMENTS[e % len(DEPARTMENTS)],
+                "Engineer",
+                f"90000{e:05d}",
+            )
+            for e in range(employees)
+        ]
+        _insert_many(connection, cursor, (
+            "INSERT INTO employees (company_id, name, email, department, designation, phone) "
+            "VALUES (%s, %s, %s, %s, %s, %s)"
+        ), employee_rows)
+        cursor.execute("SELECT id, name, department FROM employees WHERE company_id = %s ORDER BY id", (company_id,))
+        employee_list = cursor.fetchall()
+
+        # Past appointments only, so load-test bookings for upcoming days never collide with seeded rows
+        appointment_rows = []
+        for a in range(appointments):
+            employee_id, name, department = employee_list[a % len(employee_list)]
+            # 16 half-hour slots per employee per day, filled one employee round at a time
+            slot = (a // len(employee_list)) % 16
+            days_back = 1 + a // (len(employee_list) * 16)
+            appointment_rows.append((
+                employee_id, name, department, "Benchmark visit",
+                date.today() - timedelta(days=days_back),
+                f"{9 + slot // 2:02d}:{30 * (slot % 2):02d}:00",
+                f"Visitor {a}", f"visitor{c}_{a}@{BENCH_DOMAIN}", "9800000000", company_id,
+                rng.choice(["manual", "voice"]),
+            ))
+        _insert_many(connection, cursor, (
+            "INSERT INTO appointments (employee_id, employee_name, department, reason, appointment_date, "
+            "appointment_time, visitor_name, visitor_email, visitor_phone, company_id, booking_method) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+        ), appointment_rows)
+        # Rows inserted here bypass database.py, so compute this company's analytics rollups directly
+        rebuild_rollups(connection, cursor, company_id)
+
+        seeded.append({
+            "company_id": company_id,
+            "admin_email": admin_email,
+            "employee_ids": [row[0] for row in employee_list],
+        })
+
+    connection.commit()
+    cursor.close()
+    connection.close()
+    return seeded
+
+
+def read_otp(email):
+    """OTP the API stored for a benchmark user (stands in for reading the email)"""
+    connection = get_connection()
+    if not connection:
+        return None
+    cursor = connection.cursor()
+    cursor.execute("SELECT otp FROM users WHERE email = %s", (email,))
+    row = cursor.fetchone()
+    cursor.close()
+    connection.close()
+    return row[0] if row else None
+
+
+def cleanup():
+    """Delete every benchmark company (cascades to users, employees and appointments)"""
+    connection = get_connection()
+    if not connection:
+        raise RuntimeError("Failed to connect to database")
+    cursor = connection.cursor()
+    cursor.execute("DELETE FROM companies WHERE email LIKE %s", (f"%@{BENCH_DOMAIN}",))
+    deleted = cursor.rowcount
+    cursor.execute("DELETE FROM superadmins WHERE email = %s", (BENCH_SUPERADMIN,))
+    connection.commit()
+    cursor.close()
+    connection.close()
+    return deleted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--companies", type=int, default=5)
+    parser.add_argument("--employees", type=int, default=50, help="employees per company")
+    parser.add_argument("--appointments", type=int, default=500, help="appointments per company")
+    parser.add_argument("--cleanup", action="store_true", help="remove all benchmark data instead of seeding")
+    args = parser.parse_args()
+
+    try:
+        if args.cleanup:
+            print(f"🗑️  Removed {cleanup()} benchmark companies")
+        else:
+            seeded = seed(args.companies, args.employees, args.appointments)
+            print(f"✅ Seeded {len(seeded)} companies with {args.employees} employees and {args.appointments} appointments each")
+            for company in seeded:
+                print(f"   company {company['company_id']}: admin {company['admin_email']}")
+    except Exception as e:
+        print(f"❌ Benchmark seeding failed: {e}")
+        sys.exit(1)
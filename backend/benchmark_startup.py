@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Profile API worker cold start: module import time and startup hooks
+
+Each run is a fresh interpreter started with -X importtime that imports the
+module (saas_api by default) and, with --startup, runs the app's startup hooks
+(occupancy index replay, assistant preload, ...). Reports wall time for the
+import and the hooks, the slowest modules by cumulative and by self time
+(median over runs), and which heavy optional dependencies were loaded. An API
+worker should not load any of those until a request needs them.
+
+Usage: python benchmark_startup.py [--module saas_api] [--runs N] [--top N] [--startup] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Dependencies that should only be imported by the code paths that need them
+HEAVY_MODULES = (
+    "qrcode", "PIL", "chromadb", "sentence_transformers", "torch",
+    "google.generativeai", "pandas", "numpy", "streamlit",
+)
+
+PROBE = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+module = __import__({module!r})
+imported = time.perf_counter()
+hooks = None
+if {startup!r}:
+    asyncio.run(module.app.router.startup())
+    hooks = time.perf_counter() - imported
+print("STARTUP_PROFILE " + json.dumps({{"import": imported - started, "startup": hooks, "modules": sorted(sys.modules)}}))
+"""
+
+
+def run_once(module, startup):
+    env = dict(os.environ)
+    # Keep the probe from sending mail or loading the assistant unless the environment asks for it
+    env.setdefault("EMAIL_DELIVERY", "disabled")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module, startup=startup)],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+    )
+    summary = None
+    for line in result.stdout.splitlines():
+        if line.startswith("STARTUP_PROFILE "):
+            summary = json.loads(line[len("STARTUP_PROFILE "):])
+    if summary is None:
+        raise RuntimeError(f"probe failed:\n{result.stderr[-2000:]}")
+
+    # "import time: self [us] | cumulative | imported package" (nesting shown by indentation)
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    summary["timings"] = timings
+    return summary
+
+
+def median_timings(runs):
+    names = set().union(*(run["timings"] for run in runs))
+    merged = {}
+    for name in names:
+        samples = [run["timings"][name] for run in runs if name in run["timings"]]
+        merged[name] = (
+            statistics.median(s[0] for s in samples) / 1000,
+            statistics.median(s[1] for s in samples) / 1000,
+        )
+    return merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="saas_api", help="module to import (must expose app with --startup)")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to measure")
+    parser.add_argument("--top", type=int, default=15, help="modules to list per ranking")
+    parser.add_argument("--startup", action="store_true", help="also run the app's startup hooks")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    try:
+        runs = [run_once(args.module, args.startup) for _ in range(args.runs)]
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+
+    timings = median_timings(runs)
+    loaded = set(runs[-1]["modules"])
+    heavy = [name for name in HEAVY_MODULES if name in loaded]
+    import_ms = statistics.median(run["import"] for run in runs) * 1000
+    startup_ms = statistics.median(run["startup"] for run in runs) * 1000 if args.startup else None
+    by_cumulative = sorted(timings.items(), key=lambda item: item[1][1], reverse=True)[:args.top]
+    by_self = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+
+    if args.json:
+        print(json.dumps({
+            "module": args.module,
+            "runs": args.runs,
+            "import_ms": round(import_ms, 1),
+            "startup_ms": round(startup_ms, 1) if startup_ms is not None else None,
+            "modules_loaded": len(loaded),
+            "heavy_modules_loaded": heavy,
+            "top_cumulative_ms": {name: round(t[1], 1) for name, t in by_cumulative},
+            "top_self_ms": {name: round(t[0], 1) for name, t in by_self},
+        }, indent=2))
+        return 0
+
+    print(f"⏱️  import {args.module}: {import_ms:.1f} ms (median of {args.runs} runs, {len(loaded)} modules)")
+    if startup_ms is not None:
+        print(f"🚀 startup hooks: {startup_ms:.1f} ms")
+    print(f"📦 heavy optional modules loaded: {', '.join(heavy) if heavy else 'none'}\n")
+    for title, ranking, index in (("cumulative", by_cumulative, 1), ("self", by_self, 0)):
+        print(f"Slowest modules by {title} time:")
+        for name, t in ranking:
+            print(f"  {t[index]:>8.1f} ms  {name}")
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
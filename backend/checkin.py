@@ -0,0 +1,190 @@
+"""
+Front-desk check-in from visitor pass scans.
+
+Pass tokens (qr_codes.pass_token) are verified offline: signature, company and
+day are checked without touching the database, so forged, foreign or
+wrong-day passes are rejected at no cost. Valid scans are written through a
+group commit: the first scan to arrive waits CHECKIN_BATCH_MS, then every scan
+that queued up meanwhile is written with one SELECT and one UPDATE
+(database.check_in_appointments) and each waiting request gets its own
+outcome. A lobby full of visitors scanning at opening time therefore costs a
+few round trips per batch instead of several per visitor. A leader writes at
+most MAX_LEADER_BATCHES batches; anything still queued is picked up by one of
+the scans waiting in it. Repeat scans of a pass already checked in by this
+process are answered from memory while the visitor is on site. First
+check-ins, and visitors scanning back in after a check-out, are also appended
+to the visit event log (see occupancy).
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Optional, Dict, Any, List
+
+from config import CHECKIN_BATCH_MS, CHECKIN_MAX_BATCH
+from database import check_in_appointments
+from occupancy import occupancy_index
+from qr_codes import verify_pass_token
+
+logger = logging.getLogger(__name__)
+
+# Scans wait at most this long for their batch to be written
+WAIT_TIMEOUT_SECONDS = 10
+# Batches one leader writes before leaving the rest of the queue to the scans waiting in it
+MAX_LEADER_BATCHES = 4
+# Checked-in appointments remembered per process for repeat scans
+RECENT_CHECKINS = 4096
+
+
+class CheckInError(Exception):
+    """A scan that can't be checked in; status_code is the HTTP status to answer with"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class _Scan:
+    __slots__ = ("appointment_id", "done", "result", "error")
+
+    def __init__(self, appointment_id: int):
+        self.appointment_id = appointment_id
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[Exception] = None
+
+
+class CheckInService:
+    """Offline pass verification plus group-committed check-ins"""
+
+    def __init__(self, batch_ms: float = CHECKIN_BATCH_MS, max_batch: int = CHECKIN_MAX_BATCH):
+        self.batch_seconds = batch_ms / 1000.0
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._pending: List[_Scan] = []
+        self._flushing = False
+        self._recent: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self.batches = 0
+        self.scans = 0
+
+    def verify(self, token: str, company_id: int, today: Optional[date] = None) -> Dict[str, Any]:
+        """Token fields for a pass valid at this company today; raises CheckInError otherwise"""
+        claims = verify_pass_token(token)
+        if claims is None:
+            raise CheckInError(400, "Invalid visitor pass")
+        if claims["company_id"] != company_id:
+            raise CheckInError(403, "Visitor pass belongs to another company")
+        if claims["appointment_date"] != (today or date.today()):
+            raise CheckInError(409, f"Visitor pass is for {claims['appointment_date'].isoformat()}")
+        return claims
+
+    def check_in(self, token: str, company_id: int) -> Dict[str, Any]:
+        """Check in the appointment behind a scanned pass (blocks until its batch is written)"""
+        claims = self.verify(token, company_id)
+        appointment_id = claims["appointment_id"]
+        with self._lock:
+            self.scans += 1
+            recent = self._recent.get(appointment_id)
+        # Once they have checked out (in any worker) the scan is a re-entry and goes to the database
+        if recent is not None and occupancy_index.is_on_site(company_id, appointment_id):
+            return {**recent, "already_checked_in": True}
+        with self._lock:
+            scan = _Scan(appointment_id)
+            self._pending.append(scan)
+            leader = not self._flushing
+            if leader:
+                self._flushing = True
+
+        if leader:
+            # Let the rest of the burst queue up behind this scan, then write what's pending
+            time.sleep(self.batch_seconds)
+            self._drain()
+
+        deadline = time.monotonic() + WAIT_TIMEOUT_SECONDS
+        while not scan.done.wait(max(self.batch_seconds, 0.01)):
+            if time.monotonic() >= deadline:
+                raise CheckInError(503, "Check-in timed out")
+            # A leader that used up its turn left the queue behind; whoever notices first takes over
+            with self._lock:
+                leader = not self._flushing and bool(self._pending)
+                if leader:
+                    self._flushing = True
+            if leader:
+                self._drain()
+        if scan.error is not None:
+            raise scan.error
+        return scan.result
+
+    def _drain(self) -> None:
+        """Write up to MAX_LEADER_BATCHES batches; callers must have set _flushing"""
+        try:
+            for _ in range(MAX_LEADER_BATCHES):
+                with self._lock:
+                    batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+                if not batch:
+                    return
+                try:
+                    self._flush(batch)
+                except Exception as e:
+                    logger.error("Check-in batch failed: %s", e)
+                    # Every scan of the batch gets the error instead of waiting for a result that never comes
+                    for scan in batch:
+                        if not scan.done.is_set():
+                            scan.error = e
+                            scan.done.set()
+        finally:
+            with self._lock:
+                self._flushing = False
+
+    def _flush(self, batch: List[_Scan]) -> None:
+        rows = check_in_appointments(sorted({scan.appointment_id for scan in batch}))
+        self.batches += 1
+        now = datetime.now().replace(microsecond=0)
+        for scan in batch:
+            if rows is None:
+                scan.error = CheckInError(503, "Check-in is temporarily unavailable")
+            else:
+                row = rows.get(scan.appointment_id)
+                if row is None:
+                    scan.error = CheckInError(404, "Appointment not found")
+                elif row["status"] not in ("confirmed", "rescheduled"):
+                    scan.error = CheckInError(409, f"Appointment is {row['status']}")
+                else:
+                    already = row["checked_in_at"] is not None and not row.get("reentry")
+                    scan.result = {
+                        "appointment_id": row["id"],
+                        "visitor_name": row["visitor_name"],
+                        "employee_name": row["employee_name"],
+                        "already_checked_in": already,
+                        "checked_in_at": row["checked_in_at"] if already else now,
+                    }
+                    self._remember(scan.result)
+        try:
+            # check_in_appointments logged the first check-ins to visit_events; show them on site before answering
+            if any(scan.result and not scan.result["already_checked_in"] for scan in batch):
+                occupancy_index.sync(force=True)
+        finally:
+            for scan in batch:
+                scan.done.set()
+
+    def _remember(self, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._recent[result["appointment_id"]] = result
+            self._recent.move_to_end(result["appointment_id"])
+            while len(self._recent) > RECENT_CHECKINS:
+                self._recent.popitem(last=False)
+
+    def forget(self, appointment_id: int) -> None:
+        """Drop a remembered check-in (the appointment changed)"""
+        with self._lock:
+            self._recent.pop(appointment_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"scans": self.scans, "batches": self.batches, "pending": len(self._pending)}
+
+
+checkin_service = CheckInService()
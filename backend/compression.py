@@ -0,0 +1,215 @@
+"""
+Response compression for the SaaS API.
+
+A pure ASGI middleware (so StreamingResponse bodies are compressed chunk by
+chunk instead of being buffered) that negotiates brotli or gzip from
+Accept-Encoding. Bodies below COMPRESSION_MIN_BYTES, already-encoded
+responses and non-text content types (QR code PNGs) pass through untouched.
+Compression runs on the event loop, so levels are kept low and a per-process
+CPU budget turns compression off for the rest of a one-second window once it
+has been used up. Bytes in/out are counted per endpoint for
+/superadmin/compression-stats.
+"""
+
+import threading
+import time
+import zlib
+from typing import Dict, Any, Optional
+
+from config import COMPRESSION_MIN_BYTES, COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY, COMPRESSION_CPU_BUDGET
+from instrumentation import route_label
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml", "image/svg+xml")
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred supported encoding from an Accept-Encoding header (br over gzip at equal q)"""
+    offered = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        offered[name.strip()] = q
+    candidates = [("br", offered.get("br", 0.0)), ("gzip", offered.get("gzip", 0.0))]
+    if brotli is None:
+        candidates = candidates[1:]
+    name, q = max(candidates, key=lambda c: c[1])
+    return name if q > 0 else None
+
+
+class _Compressor:
+    """Incremental brotli/gzip compressor with a flush per streamed chunk"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if final else self._brotli.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionStats:
+    """Per-endpoint response byte counts before and after compression"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, list] = {}
+        self.skipped_for_cpu = 0
+
+    def record(self, label: str, raw: int, sent: int) -> None:
+        with self._lock:
+            entry = self._endpoints.setdefault(label, [0, 0, 0])
+            entry[0] += 1
+            entry[1] += raw
+            entry[2] += sent
+
+    def record_skipped_for_cpu(self) -> None:
+        with self._lock:
+            self.skipped_for_cpu += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = {
+                label: {
+                    "responses": count,
+                    "bytes_in": raw,
+                    "bytes_out": sent,
+                    "bytes_saved": raw - sent,
+                    "ratio": round(sent / raw, 3) if raw else 1.0,
+                }
+                for label, (count, raw, sent) in self._endpoints.items()
+            }
+            return {"endpoints": endpoints, "skipped_for_cpu": self.skipped_for_cpu}
+
+
+class CpuBudget:
+    """Seconds of compression CPU allowed per one-second window (COMPRESSION_CPU_BUDGET of a core)"""
+
+    def __init__(self, fraction: float = COMPRESSION_CPU_BUDGET, window: float = 1.0):
+        self.allowed = fraction * window
+        self.window = window
+        self._window_start = time.monotonic()
+        self._used = 0.0
+
+    def available(self) -> bool:
+        now = time.monotonic()
+        if now - self._window_start >= self.window:
+            self._window_start = now
+            self._used = 0.0
+        return self._used < self.allowed
+
+    def charge(self, seconds: float) -> None:
+        self._used += seconds
+
+
+compression_stats = CompressionStats()
+
+
+class CompressionMiddleware:
+    """Negotiated brotli/gzip compression with a size threshold and a CPU budget"""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES, cpu_budget: Optional[CpuBudget] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cpu_budget = cpu_budget or CpuBudget()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        encoding = choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if not encoding:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(self, scope, send, encoding)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(self, middleware: CompressionMiddleware, scope, send, encoding: str):
+        self.middleware = middleware
+        self.scope = scope
+        self.downstream = send
+        self.encoding = encoding
+        self.start_message = None
+        self.buffer = b""
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+        self.raw_bytes = 0
+        self.sent_bytes = 0
+
+    async def send(self, message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = {k.lower(): v for k, v in message.get("headers", [])}
+            content_type = headers.get(b"content-type", b"").decode("latin-1")
+            if b"content-encoding" in headers or not content_type.startswith(COMPRESSIBLE_TYPES):
+                self.passthrough = True
+                await self.downstream(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        self.raw_bytes += len(body)
+
+        if self.compressor is None:
+            # Hold back the start message until we know whether the body is worth compressing
+            self.buffer += body
+            if len(self.buffer) < self.middleware.minimum_size and more_body:
+                return
+            if len(self.buffer) < self.middleware.minimum_size or not self.middleware.cpu_budget.available():
+                if len(self.buffer) >= self.middleware.minimum_size:
+                    compression_stats.record_skipped_for_cpu()
+                await self._start(compressed=False, length=None if more_body else len(self.buffer))
+                await self._body(self.buffer, more_body)
+                self.passthrough = True
+                return
+            self.compressor = _Compressor(self.encoding)
+            body, self.buffer = self.buffer, b""
+            await self._start(compressed=True, length=None)
+
+        started = time.thread_time()
+        chunk = self.compressor.compress(body, final=not more_body)
+        self.middleware.cpu_budget.charge(time.thread_time() - started)
+        await self._body(chunk, more_body)
+        if not more_body:
+            compression_stats.record(route_label(self.scope), self.raw_bytes, self.sent_bytes)
+
+    async def _start(self, compressed: bool, length: Optional[int]) -> None:
+        message = self.start_message
+        headers = [
+            (k, v) for k, v in message.get("headers", [])
+            if k.lower() not in (b"content-length", b"vary")
+        ]
+        vary = [v for k, v in message.get("headers", []) if k.lower() == b"vary"]
+        headers.append((b"vary", b", ".join(vary + [b"Accept-Encoding"])))
+        if compressed:
+            headers.append((b"content-encoding", self.encoding.encode("latin-1")))
+        elif length is not None:
+            headers.append((b"content-length", str(length).encode("latin-1")))
+        await self.downstream({**message, "headers": headers})
+
+    async def _body(self, body: bytes, more_body: bool) -> None:
+        self.sent_bytes += len(body)
+        await self.downstream({"type": "http.response.body", "body": body, "more_body": more_body})
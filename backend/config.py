@@ -13,6 +13,10 @@ DB_CONFIG = {
     'autocommit': True
 }
 
+# Connection pool shared by the SaaS API and the assistant (mysql.connector caps pools at 32)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 5))
+
 # JWT configuration
 JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
 JWT_ALGORITHM = "HS256"
@@ -23,6 +27,100 @@ EMAIL_HOST = os.getenv('EMAIL_HOST', 'smtp.gmail.com')
 EMAIL_PORT = int(os.getenv('EMAIL_PORT', 587))
 EMAIL_USER = os.getenv('EMAIL_USER', '')
 EMAIL_PASSWORD = os.getenv('EMAIL_PASSWORD', '')
+# 'smtp' sends mail; 'disabled' skips SMTP and reports success (load tests, local development)
+EMAIL_DELIVERY = os.getenv('EMAIL_DELIVERY', 'smtp')
 
 # OTP configuration
-OTP_EXPIRE_MINUTES = 5 
\ No newline at end of file
+OTP_EXPIRE_MINUTES = 5
+
+# Employee vector index configuration (assistant fallback search)
+CHROMA_DIR = os.getenv('CHROMA_DIR', './employee_db')
+EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
+EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', 64))
+
+# Assistant conversation store ('memory' or 'sqlite' for a store shared by local workers)
+CONVERSATION_STORE = os.getenv('CONVERSATION_STORE', 'memory')
+CONVERSATION_STORE_PATH = os.getenv('CONVERSATION_STORE_PATH', './conversations.db')
+CONVERSATION_TTL_SECONDS = int(os.getenv('CONVERSATION_TTL_SECONDS', 1800))
+CONVERSATION_MAX_MESSAGES = int(os.getenv('CONVERSATION_MAX_MESSAGES', 40))
+
+# Threads reserved for blocking assistant work (name matching, vector search, LLM calls)
+ASSISTANT_WORKERS = int(os.getenv('ASSISTANT_WORKERS', 4))
+# Load the LLM client and embedding model at worker startup (before /ready) instead of on the first assistant turn;
+# leave off for workers that don't serve the assistant so they never load the model
+ASSISTANT_PRELOAD = os.getenv('ASSISTANT_PRELOAD', 'false').lower() == 'true'
+
+# Company that bookings from the standalone assistant API are filed under
+ASSISTANT_COMPANY_ID = int(os.getenv('ASSISTANT_COMPANY_ID', 1))
+
+# Appointment slots and business hours used by the availability engine
+APPOINTMENT_SLOT_MINUTES = int(os.getenv('APPOINTMENT_SLOT_MINUTES', 30))
+BUSINESS_HOURS_START = os.getenv('BUSINESS_HOURS_START', '09:00')
+BUSINESS_HOURS_END = os.getenv('BUSINESS_HOURS_END', '17:00')
+AVAILABILITY_CACHE_SECONDS = int(os.getenv('AVAILABILITY_CACHE_SECONDS', 30))
+
+# Encode large list responses as plain dicts with orjson instead of per-row Pydantic models
+FAST_JSON_RESPONSES = os.getenv('FAST_JSON_RESPONSES', 'false').lower() == 'true'
+
+# Response compression (brotli when installed, else gzip); bodies smaller than the minimum are sent as-is
+COMPRESSION_MIN_BYTES = int(os.getenv('COMPRESSION_MIN_BYTES', 1024))
+COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', 5))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 4))
+# Share of one CPU core compression may use per second before responses go out uncompressed
+COMPRESSION_CPU_BUDGET = float(os.getenv('COMPRESSION_CPU_BUDGET', 0.25))
+
+# Query observability: statements slower than this are logged with their EXPLAIN plan
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+SLOW_QUERY_EXPLAIN = os.getenv('SLOW_QUERY_EXPLAIN', 'true').lower() == 'true'
+# Recent executions per query fingerprint kept for latency percentiles
+QUERY_STATS_WINDOW = int(os.getenv('QUERY_STATS_WINDOW', 1000))
+
+# Logging: level, output format ('text' or 'json') and per-message sampling of high-frequency INFO/DEBUG records
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_SAMPLE_BURST = int(os.getenv('LOG_SAMPLE_BURST', 20))
+LOG_SAMPLE_RATE = int(os.getenv('LOG_SAMPLE_RATE', 100))
+
+# Appointment QR passes: HMAC key for pass tokens (derived from JWT_SECRET_KEY when unset),
+# pixels per QR module and how many rendered PNGs are kept in memory
+QR_SIGNING_KEY = os.getenv('QR_SIGNING_KEY', '')
+QR_BOX_SIZE = int(os.getenv('QR_BOX_SIZE', 6))
+QR_CACHE_SIZE = int(os.getenv('QR_CACHE_SIZE', 2048))
+
+# Front-desk check-in: scans arriving within this window are written in one batch
+CHECKIN_BATCH_MS = float(os.getenv('CHECKIN_BATCH_MS', 20))
+CHECKIN_MAX_BATCH = int(os.getenv('CHECKIN_MAX_BATCH', 200))
+
+# On-site occupancy index: event log window replayed on startup and how often reads pick up other workers' events
+OCCUPANCY_LOOKBACK_HOURS = int(os.getenv('OCCUPANCY_LOOKBACK_HOURS', 24))
+OCCUPANCY_SYNC_SECONDS = float(os.getenv('OCCUPANCY_SYNC_SECONDS', 2))
+
+# Superadmin usage dashboard: seconds the cross-tenant aggregate is reused
+USAGE_CACHE_SECONDS = int(os.getenv('USAGE_CACHE_SECONDS', 60))
+
+# Confirmation emails are sent by background outbox threads; queued mail gets this long to go out on shutdown
+EMAIL_OUTBOX_WORKERS = int(os.getenv('EMAIL_OUTBOX_WORKERS', 2))
+EMAIL_DRAIN_SECONDS = float(os.getenv('EMAIL_DRAIN_SECONDS', 20))
+
+# Production launch (start_server.py --production or SERVER_MODE=production): worker processes
+# (defaults to the CPU count) and how long in-flight requests get to finish on SIGTERM
+SERVER_MODE = os.getenv('SERVER_MODE', 'development')
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 0))
+GRACEFUL_TIMEOUT_SECONDS = int(os.getenv('GRACEFUL_TIMEOUT_SECONDS', 30))
+
+# Health checks: seconds a liveness/readiness report is reused, DB latency (ping or recent p95) and
+# email queue depth above which a worker reports degraded, and the HTTP status /ready answers when degraded
+HEALTH_CACHE_SECONDS = float(os.getenv('HEALTH_CACHE_SECONDS', 5))
+HEALTH_DB_LATENCY_MS = float(os.getenv('HEALTH_DB_LATENCY_MS', 250))
+HEALTH_EMAIL_QUEUE_LIMIT = int(os.getenv('HEALTH_EMAIL_QUEUE_LIMIT', 200))
+HEALTH_DEGRADED_STATUS_CODE = int(os.getenv('HEALTH_DEGRADED_STATUS_CODE', 200))
+
+# Rate limits for OTP logins (shared by the superadmin, admin and user login routes) and the public visitor lookup.
+# Comma-separated scope:count/seconds token buckets with scope ip, email or company; RATE_LIMIT_STORE=sqlite shares
+# the buckets between all worker processes on the host
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+RATE_LIMIT_STORE = os.getenv('RATE_LIMIT_STORE', 'memory')
+RATE_LIMIT_STORE_PATH = os.getenv('RATE_LIMIT_STORE_PATH', './rate_limits.db')
+RATE_LIMIT_MAX_KEYS = int(os.getenv('RATE_LIMIT_MAX_KEYS', 100000))
+RATE_LIMIT_LOGIN = os.getenv('RATE_LIMIT_LOGIN', 'ip:20/60,email:5/300,company:100/60')
+RATE_LIMIT_VISITOR_LOOKUP = os.getenv('RATE_LIMIT_VISITOR_LOOKUP', 'ip:30/60,email:10/60')
@@ -0,0 +1,229 @@
+"""
+Server-side conversation state for the appointment assistant.
+
+A session holds the chat history, the partially filled booking state and the
+"awaiting confirmation" flag that used to live in Streamlit's session_state.
+Sessions are keyed by an opaque session id and expire after
+CONVERSATION_TTL_SECONDS of inactivity. The SQLite backend lets several
+stateless API workers on the same host share sessions.
+"""
+
+import json
+import logging
+import secrets
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+from config import CONVERSATION_STORE, CONVERSATION_STORE_PATH, CONVERSATION_TTL_SECONDS, CONVERSATION_MAX_MESSAGES, WEB_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+# Payloads larger than this are zlib-compressed before storage
+COMPRESS_THRESHOLD_BYTES = 512
+
+_ROLE_CODES = {"user": "u", "assistant": "a", "system": "s"}
+_ROLE_NAMES = {code: role for role, code in _ROLE_CODES.items()}
+
+
+def new_session_id() -> str:
+    """Generate an unguessable session id"""
+    return secrets.token_urlsafe(16)
+
+
+def new_session(owner: Optional[str] = None) -> Dict[str, Any]:
+    """Empty conversation session, optionally bound to an owner (e.g. company and user)"""
+    return {"messages": [], "state": None, "confirmed": False, "owner": owner}
+
+
+def serialize_session(session: Dict[str, Any]) -> bytes:
+    """Encode a session compactly: short role codes, no empty state fields, trimmed history"""
+    messages = session.get("messages", [])[-CONVERSATION_MAX_MESSAGES:]
+    state = session.get("state")
+    payload = {
+        "m": [[_ROLE_CODES.get(m["role"], m["role"]), m["content"]] for m in messages],
+        "s": {k: v for k, v in state.items() if v is not None} if state else None,
+        "k": list(state.keys()) if state else None,
+        "c": 1 if session.get("confirmed") else 0,
+        "o": session.get("owner"),
+    }
+    data = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(data) > COMPRESS_THRESHOLD_BYTES:
+        return b"z" + zlib.compress(data, 6)
+    return b"j" + data
+
+
+def deserialize_session(data: bytes) -> Dict[str, Any]:
+    """Inverse of serialize_session"""
+    body = zlib.decompress(data[1:]) if data[:1] == b"z" else data[1:]
+    payload = json.loads(body)
+    state = None
+    if payload.get("k") is not None:
+        state = {key: payload["s"].get(key) for key in payload["k"]}
+    return {
+        "messages": [{"role": _ROLE_NAMES.get(r, r), "content": c} for r, c in payload["m"]],
+        "state": state,
+        "confirmed": bool(payload["c"]),
+        "owner": payload.get("o"),
+    }
+
+
+class ConversationStore(ABC):
+    """Interface shared by the conversation store backends"""
+
+    def __init__(self, ttl_seconds: int = CONVERSATION_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def save(self, session_id: str, session: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+class InMemoryConversationStore(ConversationStore):
+    """Process-local store; entries are kept in expiry order so eviction is O(expired)"""
+
+    def __init__(self, ttl_seconds: int = CONVERSATION_TTL_SECONDS, max_sessions: int = 10000):
+        super().__init__(ttl_seconds)
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if not entry:
+                return None
+            expires_at, data = entry
+            if expires_at < time.time():
+                del self._sessions[session_id]
+                return None
+        return deserialize_session(data)
+
+    def save(self, session_id: str, session: Dict[str, Any]) -> None:
+        data = serialize_session(session)
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._sessions[session_id] = (time.time() + self.ttl_seconds, data)
+            self._purge_locked()
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return self._purge_locked()
+
+    def _purge_locked(self) -> int:
+        now = time.time()
+        purged = 0
+        while self._sessions:
+            session_id, (expires_at, _) = next(iter(self._sessions.items()))
+            if expires_at >= now:
+                break
+            del self._sessions[session_id]
+            purged += 1
+        return purged
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class SQLiteConversationStore(ConversationStore):
+    """Local persistent store shared by every worker process on the host"""
+
+    # Purge expired rows at most this often (seconds)
+    PURGE_INTERVAL = 60
+
+    def __init__(self, path: str = CONVERSATION_STORE_PATH, ttl_seconds: int = CONVERSATION_TTL_SECONDS):
+        super().__init__(ttl_seconds)
+        self.path = path
+        self._local = threading.local()
+        self._last_purge = 0.0
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS conversations ("
+                "session_id TEXT PRIMARY KEY, data BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_conversations_expires ON conversations (expires_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT data FROM conversations WHERE session_id = ? AND expires_at >= ?",
+            (session_id, time.time())
+        ).fetchone()
+        return deserialize_session(row[0]) if row else None
+
+    def save(self, session_id: str, session: Dict[str, Any]) -> None:
+        now = time.time()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO conversations (session_id, data, expires_at) VALUES (?, ?, ?)",
+            (session_id, serialize_session(session), now + self.ttl_seconds)
+        )
+        if now - self._last_purge > self.PURGE_INTERVAL:
+            self.purge_expired()
+
+    def delete(self, session_id: str) -> None:
+        self._connection().execute("DELETE FROM conversations WHERE session_id = ?", (session_id,))
+
+    def purge_expired(self) -> int:
+        self._last_purge = time.time()
+        cursor = self._connection().execute("DELETE FROM conversations WHERE expires_at < ?", (self._last_purge,))
+        return cursor.rowcount
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+
+
+_store: Optional[ConversationStore] = None
+_store_lock = threading.Lock()
+
+
+def get_conversation_store() -> ConversationStore:
+    """Process-wide conversation store selected by CONVERSATION_STORE"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if CONVERSATION_STORE == "sqlite":
+                    _store = SQLiteConversationStore()
+                else:
+                    if WEB_CONCURRENCY > 1:
+                        logger.warning(
+                            "CONVERSATION_STORE=memory with %s workers: each worker keeps its own sessions, so "
+                            "assistant conversations break when turns land on different workers; use "
+                            "CONVERSATION_STORE=sqlite", WEB_CONCURRENCY
+                        )
+                    _store = InMemoryConversationStore()
+    return _store
@@ -1,48 +1,201 @@
 import mysql.connector
-from mysql.connector import Error
-from config import DB_CONFIG
+from mysql.connector import Error, pooling
+from config import DB_CONFIG, DB_POOL_SIZE, DB_POOL_TIMEOUT
 from typing import Optional, List, Dict, Any
+from datetime import datetime, time as dt_time, timedelta
 import logging
+import threading
+import time
+from instrumentation import record
+from query_stats import query_stats
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_pool = None
+_pool_lock = threading.RLock()
+_pool_slots = threading.BoundedSemaphore(DB_POOL_SIZE)
+_pool_in_use = 0
+
+class TimedCursor:
+    """Cursor wrapper that attributes query and fetch time to the current request and the query stats"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            record("db_query", elapsed)
+            query_stats.observe(operation, elapsed, params)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            record("db_query", elapsed)
+            query_stats.observe(operation, elapsed, seq_params)
+
+    def _timed_fetch(self, fetch, *args):
+        started = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            record("db_query", time.perf_counter() - started, calls=0)
+
+    def fetchone(self):
+        return self._timed_fetch(self._cursor.fetchone)
+
+    def fetchall(self):
+        return self._timed_fetch(self._cursor.fetchall)
+
+    def fetchmany(self, *args):
+        return self._timed_fetch(self._cursor.fetchmany, *args)
+
+class PooledConnection:
+    """Pooled connection whose close() hands it back to the pool exactly once"""
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._closed = False
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def cursor(self, *args, timed: bool = True, **kwargs):
+        cursor = self._connection.cursor(*args, **kwargs)
+        return TimedCursor(cursor) if timed else cursor
+
+    def close(self):
+        global _pool_in_use
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._connection.close()
+        finally:
+            with _pool_lock:
+                _pool_in_use -= 1
+            _pool_slots.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def get_pool() -> pooling.MySQLConnectionPool:
+    """Process-wide connection pool (created on first use so importing this module never connects)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = pooling.MySQLConnectionPool(
+                    pool_name="voice_assistant_saas",
+                    pool_size=DB_POOL_SIZE,
+                    pool_reset_session=True,
+                    **DB_CONFIG
+                )
+    return _pool
+
+def pool_stats() -> Dict[str, int]:
+    """Current pool usage"""
+    return {"size": DB_POOL_SIZE, "in_use": _pool_in_use, "available": DB_POOL_SIZE - _pool_in_use}
+
+def ping_database() -> Optional[float]:
+    """Round trip of SELECT 1 on a pooled connection in seconds, None when the database can't be reached"""
+    started = time.perf_counter()
+    connection = get_connection()
+    if not connection:
+        return None
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+        cursor.close()
+        return time.perf_counter() - started
+    except Error as e:
+        logger.error(f"Database ping failed: {e}")
+        return None
+    finally:
+        connection.close()
+
 def get_connection():
-    """Get database connection"""
+    """Get a pooled database connection (waits up to DB_POOL_TIMEOUT seconds for a free slot)"""
+    global _pool_in_use
+    started = time.perf_counter()
+    if not _pool_slots.acquire(timeout=DB_POOL_TIMEOUT):
+        record("db_acquire", time.perf_counter() - started)
+        logger.error(f"Timed out waiting {DB_POOL_TIMEOUT}s for a database connection")
+        return None
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        return connection
+        connection = get_pool().get_connection()
     except Error as e:
+        _pool_slots.release()
         logger.error(f"Error connecting to MySQL: {e}")
         return None
+    finally:
+        record("db_acquire", time.perf_counter() - started)
+    with _pool_lock:
+        _pool_in_use += 1
+    return PooledConnection(connection)
+
+def explain_query(query: str, params: Any = None) -> Optional[List[Dict[str, Any]]]:
+    """EXPLAIN plan of a statement (untimed cursor, so it never feeds back into the query stats)"""
+    connection = get_connection()
+    if not connection:
+        return None
+    try:
+        cursor = connection.cursor(dictionary=True, timed=False)
+        cursor.execute("EXPLAIN " + query, params)
+        results = cursor.fetchall()
+        
+        cursor.close()
+        return results
+    except Error as e:
+        logger.error(f"Error explaining query: {e}")
+        return None
+    finally:
+        connection.close()
+
+query_stats.set_explainer(explain_query)
 
 # Superadmin functions
 def get_superadmin_by_email(email: str) -> Optional[Dict[str, Any]]:
     """Get superadmin by email"""
+    connection = get_connection()
+    if not connection:
+        return None
     try:
-        connection = get_connection()
-        if not connection:
-            return None
-        
         cursor = connection.cursor(dictionary=True)
         query = "SELECT * FROM superadmins WHERE email = %s AND is_active = TRUE"
         cursor.execute(query, (email,))
         result = cursor.fetchone()
         
         cursor.close()
-        connection.close()
         return result
     except Error as e:
         logger.error(f"Error getting superadmin: {e}")
         return None
+    finally:
+        connection.close()
 
 def create_superadmin(email: str, name: str) -> Optional[int]:
     """Create a new superadmin"""
+    connection = get_connection()
+    if not connection:
+        return None
     try:
-        connection = get_connection()
-        if not connection:
-            return None
-        
         cursor = connection.cursor()
         query = "INSERT INTO superadmins (email, name) VALUES (%s, %s)"
         cursor.execute(query, (email, name))
@@ -50,78 +203,100 @@ def create_superadmin(email: str, name: str) -> Optional[int]:
         
         connection.commit()
         cursor.close()
-        connection.close()
         return superadmin_id
     except Error as e:
         logger.error(f"Error creating superadmin: {e}")
         return None
+    finally:
+        connection.close()
 
 # Company functions
-def create_company(name: str, email: str, domain: str, created_by: int) -> Optional[int]:
-    """Create a new company"""
+def create_company(
+    name: str,
+    email: str,
+    domain: str,
+    created_by: int,
+    admin_email: Optional[str] = None,
+    admin_name: Optional[str] = None
+) -> Optional[int]:
+    """Create a new company, and its admin user in the same transaction when admin_email is given
+
+    Raises UserLimitError (nothing is saved) if the company's max_users leaves no room for the admin.
+    """
+    connection = get_connection()
+    if not connection:
+        return None
     try:
-        connection = get_connection()
-        if not connection:
-            return None
-        
         cursor = connection.cursor()
+        connection.start_transaction()
         query = "INSERT INTO companies (name, email, domain, created_by) VALUES (%s, %s, %s, %s)"
         cursor.execute(query, (name, email, domain, created_by))
         company_id = cursor.lastrowid
+        if admin_email:
+            try:
+                check_user_limit(cursor, company_id)
+            except UserLimitError:
+                connection.rollback()
+                cursor.close()
+                raise
+            cursor.execute(
+                "INSERT INTO users (email, name, role, company_id) VALUES (%s, %s, 'admin', %s)",
+                (admin_email, admin_name, company_id)
+            )
         
         connection.commit()
         cursor.close()
-        connection.close()
         return company_id
     except Error as e:
         logger.error(f"Error creating company: {e}")
         return None
+    finally:
+        connection.close()
 
 def get_company_by_id(company_id: int) -> Optional[Dict[str, Any]]:
     """Get company by ID"""
+    connection = get_connection()
+    if not connection:
+        return None
     try:
-        connection = get_connection()
-        if not connection:
-            return None
-        
         cursor = connection.cursor(dictionary=True)
         query = "SELECT * FROM companies WHERE id = %s AND is_active = TRUE"
         cursor.execute(query, (company_id,))
         result = cursor.fetchone()
         
         cursor.close()
-        connection.close()
         return result
     except Error as e:
         logger.error(f"Error getting company: {e}")
         return None
+    finally:
+        connection.close()
 
 def get_company_by_email(email: str) -> Optional[Dict[str, Any]]:
     """Get company by email"""
+    connection = get_connection()
+    if not connection:
+        return None
     try:
-        connection = get_connection()
-        if not connection:
-            return None
-        
         cursor = connection.cursor(dictionary=True)
         query = "SELECT * FROM companies WHERE email = %s AND is_active = TRUE"
         cursor.execute(query, (email,))
         result = cursor.fetchone()
         
         cursor.close()
-        connection.close()
         return result
     except Error as e:
         logger.error(f"Error getting company by email: {e}")
         return None
+    finally:
+        connection.close()
 
 def get_all_companies() -> List[Dict[str, Any]]:
     """Get all active companies"""
+    connection = get_connection()
+    if not connection:
+        return []
     try:
-        connection = get_connection()
-        if not connection:
-            return []
-        
         cursor = connection.cursor(dictionary=True)
         query = """
             SELECT c.*, COALESCE(s.name, 'Unknown') as created_by_name 
@@ -134,59 +309,120 @@ def get_all_companies() -> List[Dict[str, Any]]:
         results = cursor.fetchall()
         
         cursor.close()
-        connection.close()
         return results
     except Error as e:
         logger.error(f"Error getting all companies: {e}")
         return []
+    finally:
+        connection.close()
 
 def get_companies_by_superadmin(superadmin_id: int) -> List[Dict[str, Any]]:
     """Get companies created by a specific superadmin"""
+    connection = get_connection()
+    if not connection:
+        return []
     try:
-        connection = get_connection()
-        if not connection:
-            return []
-        
         cursor = connection.cursor(dictionary=True)
         query = "SELECT * FROM companies WHERE created_by = %s AND is_active = TRUE ORDER BY created_at DESC"
         cursor.execute(query, (superadmin_id,))
         results = cursor.fetchall()
         
         cursor.close()
-        connection.close()
         return results
     except Error as e:
         logger.error(f"Error getting companies by superadmin: {e}")
         return []
+    finally:
+        connection.close()
+
+# Active users count against companies.max_users, in the usage dashboard and in create_user
+ACTIVE_USER_COUNT = "SELECT company_id, COUNT(*) AS users FROM users WHERE is_active = TRUE {where} GROUP BY company_id"
+
+def get_tenant_usage(month_start: str, month_end: str) -> Optional[List[Dict[str, Any]]]:
+    """Users, employees and appointments in a date range for every active company, in one query"""
+    connection = get_connection()
+    if not connection:
+        return None
+    try:
+        cursor = connection.cursor(dictionary=True)
+        query = f"""
+            SELECT c.id AS company_id, c.name, c.email, c.max_users, 
+                   COALESCE(u.users, 0) AS users, 
+                   COALESCE(e.employees, 0) AS employees, 
+                   CAST(COALESCE(a.appointments, 0) AS SIGNED) AS appointments_this_month 
+            FROM companies c 
+            LEFT JOIN ({ACTIVE_USER_COUNT.format(where="")}) u ON u.company_id = c.id 
+            LEFT JOIN (
+                SELECT company_id, COUNT(*) AS employees FROM employees WHERE is_active = TRUE GROUP BY company_id
+            ) e ON e.company_id = c.id 
+            LEFT JOIN (
+                SELECT company_id, SUM(bookings) AS appointments FROM appointment_daily_stats 
+                WHERE stat_date BETWEEN %s AND %s GROUP BY company_id
+            ) a ON a.company_id = c.id 
+            WHERE c.is_active = TRUE 
+            ORDER BY c.name
+        """
+        cursor.execute(query, (month_start, month_end))
+        results = cursor.fetchall()
+        
+        cursor.close()
+        return results
+    except Error as e:
+        logger.error(f"Error getting tenant usage: {e}")
+        return None
+    finally:
+        connection.close()
 
 # User functions
+class UserLimitError(Exception):
+    """Raised when creating a user would exceed the company's max_users"""
+
+def check_user_limit(cursor, company_id: int) -> None:
+    """Raise UserLimitError if the company has no room for another active user (call inside the insert's transaction)"""
+    # Locking the company row serializes concurrent user creation for the company
+    cursor.execute("SELECT max_users FROM companies WHERE id = %s FOR UPDATE", (company_id,))
+    company = cursor.fetchone()
+    max_users = company[0] if company else None
+    if max_users is not None:
+        cursor.execute(ACTIVE_USER_COUNT.format(where="AND company_id = %s"), (company_id,))
+        row = cursor.fetchone()
+        if row and row[1] >= max_users:
+            raise UserLimitError(f"Company has reached its limit of {max_users} users")
+
 def create_user(email: str, name: str, role: str, company_id: int) -> Optional[int]:
-    """Create a new user"""
+    """Create a new user; raises UserLimitError when the company already has max_users active users"""
+    connection = get_connection()
+    if not connection:
+        return None
     try:
-        connection = get_connection()
-        if not connection:
-            return None
-        
         cursor = connection.cursor()
+        connection.start_transaction()
+        try:
+            check_user_limit(cursor, company_id)
+        except UserLimitError:
+            connection.rollback()
+            cursor.close()
+            raise
+        
         query = "INSERT INTO users (email, name, role, company_id) VALUES (%s, %s, %s, %s)"
         cursor.execute(query, (email, name, role, company_id))
         user_id = cursor.lastrowid
         
         connection.commit()
         cursor.close()
-        connection.close()
         return user_id
     except Error as e:
         logger.error(f"Error creating user: {e}")
         return None
+    finally:
+        connection.close()
 
 def get_user_by_email_and_company(email: str, company_id: int) -> Optional[Dict[str, Any]]:
     """Get user by email and company"""
+    connection = get_connection()
+    if not connection:
+        return None
     try:
-        connection = get_connection()
-        if not connection:
-            return None
-        
         cursor = connection.cursor(dictionary=True)
         query = """
             SELECT u.*, c.name as company_name 
@@ -198,19 +434,19 @@ def get_user_by_email_and_company(email: str, company_id: int) -> Optional[Dict[
         result = cursor.fetchone()
         
         cursor.close()
-        connection.close()
         return result
     except Error as e:
         logger.error(f"Error getting user: {e}")
         return None
+    finally:
+        connection.close()
 
 def get_users_by_company(company_id: int) -> List[Dict[str, Any]]:
     """Get all users in a company"""
+    connection = get_connection()
+    if not connection:
+        return []
     try:
-        connection = get_connection()
-        if not connection:
-            return []
-        
         cursor = connection.cursor(dictionary=True)
         query = """
             SELECT u.*, c.name as company_name 
@@ -223,38 +459,38 @@ def get_users_by_company(company_id: int) -> List[Dict[str, Any]]:
         results = cursor.fetchall()
         
         cursor.close()
-        connection.close()
         return results
     except Error as e:
         logger.error(f"Error getting users by company: {e}")
         return []
+    finally:
+        connection.close()
 
 def update_user_otp(user_id: int, otp: str, expiry: str) -> bool:
     """Update user OTP"""
+    connection = get_connection()
+    if not connection:
+        return False
     try:
-        connection = get_connection()
-        if not connection:
-            return False
-        
         cursor = connection.cursor()
         query = "UPDATE users SET otp = %s, otp_expiry = %s WHERE id = %s"
         cursor.execute(query, (otp, expiry, user_id))
         
         connection.commit()
         cursor.close()
-        connection.close()
         return True
     except Error as e:
         logger.error(f"Error updating user OTP: {e}")
         return False
+    finally:
+        connection.close()
 
 def verify_user_otp(email: str, company_id: int, otp: str) -> Optional[Dict[str, Any]]:
     """Verify user OTP"""
+    connection = get_connection()
+    if not connection:
+        return None
     try:
-        connection = get_connection()
-        if not connection:
-            return None
-        
         cursor = connection.cursor(dictionary=True)
         query = """
             SELECT * FROM users 
@@ -265,38 +501,38 @@ def verify_user_otp(email: str, company_id: int, otp: str) -> Optional[Dict[str,
         result = cursor.fetchone()
         
         cursor.close()
-        connection.close()
         return result
     except Error as e:
         logger.error(f"Error verifying user OTP: {e}")
         return None
+    finally:
+        connection.close()
 
 def clear_user_otp(user_id: int) -> bool:
     """Clear user OTP after successful verification"""
+    connection = get_connection()
+    if not connection:
+        return False
     try:
-        connection = get_connection()
-        if not connection:
-            return False
-        
         cursor = connection.cursor()
         query = "UPDATE users SET otp = NULL, otp_expiry = NULL, last_login = NOW() WHERE id = %s"
         cursor.execute(query, (user_id,))
         
         connection.commit()
         cursor.close()
-        connection.close()
         return True
     except Error as e:
         logger.error(f"Error clearing user OTP: {e}")
         return False
+    finally:
+        connection.close()
 
 def get_user_by_id(user_id: int) -> Optional[Dict[str, Any]]:
     """Get user by ID"""
+    connection = get_connection()
+    if not connection:
+        return None
     try:
-        connection = get_connection()
-        if not connection:
-            return None
-        
         cursor = connection.cursor(dictionary=True)
         query = """
             SELECT u.*, c.name as company_name 
@@ -308,18 +544,19 @@ def get_user_by_id(user_id: int) -> Optional[Dict[str, Any]]:
         result = cursor.fetchone()
         
         cursor.close()
-        connection.close()
         return result
     except Error as e:
         logger.error(f"Error getting user by ID: {e}")
         return None 
+    finally:
+        connection.close()
 
 def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
     """Get user by email (first match, any company)"""
+    connection = get_connection()
+    if not connection:
+        return None
     try:
-        connection = get_connection()
-        if not connection:
-            return None
         cursor = connection.cursor(dictionary=True)
         query = """
             SELECT u.*, c.name as company_name 
@@ -331,18 +568,19 @@ def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
         cursor.execute(query, (email,))
         result = cursor.fetchone()
         cursor.close()
-        connection.close()
         return result
     except Exception as e:
         logger.error(f"Error getting user by email: {e}")
         return None
+    finally:
+        connection.close()
 
 def get_user_by_email_and_role(email: str, role: str) -> Optional[Dict[str, Any]]:
     """Get user by email and role (first match, any company)"""
+    connection = get_connection()
+    if not connection:
+        return None
     try:
-        connection = get_connection()
-        if not connection:
-            return None
         cursor = connection.cursor(dictionary=True)
         query = """
             SELECT u.*, c.name as company_name 
@@ -354,13 +592,53 @@ def get_user_by_email_and_role(email: str, role: str) -> Optional[Dict[str, Any]
         cursor.execute(query, (email, role))
         result = cursor.fetchone()
         cursor.close()
-        connection.close()
         return result
     except Exception as e:
         logger.error(f"Error getting user by email and role: {e}")
         return None 
+    finally:
+        connection.close()
 
 # Appointment functions
+class SlotConflictError(Exception):
+    """Raised when an appointment would overlap an existing booking for the same employee"""
+
+# Active appointments for one employee that overlap [time, time + slot) on a date; FOR UPDATE
+# locks that employee's day range so concurrent bookings for the same slot serialize.
+# Linked employees are matched on the integer key; free-text names fall back to the VARCHAR copy.
+SLOT_CONFLICT_QUERY = """
+    SELECT id FROM appointments 
+    WHERE company_id = %s AND {employee_column} = %s AND appointment_date = %s 
+    AND status IN ('confirmed', 'rescheduled') 
+    AND appointment_time > SUBTIME(%s, SEC_TO_TIME(%s * 60)) 
+    AND appointment_time < ADDTIME(%s, SEC_TO_TIME(%s * 60)) 
+    LIMIT 1 FOR UPDATE
+"""
+
+# MySQL error raised when InnoDB breaks a lock wait cycle
+ER_LOCK_DEADLOCK = 1213
+
+# Daily analytics rollups: one row per (company, appointment date, department, booking method)
+# holding the bookings made and the current count per status. Every write path below adjusts
+# them in the same transaction as the appointment change, so they never drift from the table.
+ROLLUP_STATUSES = ("confirmed", "cancelled", "completed", "rescheduled")
+ROLLUP_UPSERT = """
+    INSERT INTO appointment_daily_stats 
+    (company_id, stat_date, department, booking_method, bookings, {status}) 
+    VALUES (%s, %s, %s, %s, %s, %s) 
+    ON DUPLICATE KEY UPDATE bookings = bookings + VALUES(bookings), {status} = {status} + VALUES({status})
+"""
+
+def apply_rollup_deltas(cursor, deltas: Dict[tuple, List[int]]) -> None:
+    """Add {(company_id, date, department, method, status): [bookings, status_count]} to the rollups"""
+    by_status: Dict[str, List[tuple]] = {}
+    for (company_id, stat_date, department, booking_method, status), (bookings, count) in deltas.items():
+        if status not in ROLLUP_STATUSES:
+            raise ValueError(f"Unknown appointment status: {status}")
+        by_status.setdefault(status, []).append((company_id, stat_date, department, booking_method, bookings, count))
+    for status, rows in by_status.items():
+        cursor.executemany(ROLLUP_UPSERT.format(status=status), rows)
+
 def create_appointment(
     employee_name: str,
     department: str,
@@ -371,174 +649,487 @@ def create_appointment(
     visitor_email: str,
     visitor_phone: str,
     company_id: int,
-    booking_method: str = 'manual'
+    booking_method: str = 'manual',
+    slot_minutes: Optional[int] = None,
+    employee_id: Optional[int] = None
 ) -> Optional[int]:
-    """Create a new appointment"""
-    try:
+    """Create a new appointment
+
+    The insert and the daily rollup update run in one transaction. When slot_minutes is
+    given the slot check joins it, and SlotConflictError is raised if the employee is
+    already booked in that window.
+    """
+    for attempt in range(2):
         connection = get_connection()
         if not connection:
             return None
-        
+        try:
+            cursor = connection.cursor()
+            connection.start_transaction()
+            if slot_minutes:
+                employee_column = "employee_id" if employee_id else "employee_name"
+                cursor.execute(SLOT_CONFLICT_QUERY.format(employee_column=employee_column), (
+                    company_id, employee_id or employee_name, appointment_date,
+                    appointment_time, slot_minutes, appointment_time, slot_minutes
+                ))
+                if cursor.fetchone():
+                    connection.rollback()
+                    cursor.close()
+                    raise SlotConflictError(f"{employee_name} is already booked at {appointment_time} on {appointment_date}")
+            
+            query = """
+                INSERT INTO appointments 
+                (employee_id, employee_name, department, reason, appointment_date, appointment_time, 
+                 visitor_name, visitor_email, visitor_phone, company_id, booking_method) 
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """
+            cursor.execute(query, (
+                employee_id, employee_name, department, reason, appointment_date, appointment_time,
+                visitor_name, visitor_email, visitor_phone, company_id, booking_method
+            ))
+            appointment_id = cursor.lastrowid
+            apply_rollup_deltas(cursor, {
+                (company_id, appointment_date, department, booking_method, "confirmed"): [1, 1]
+            })
+            
+            connection.commit()
+            cursor.close()
+            return appointment_id
+        except Error as e:
+            # A concurrent booking for the same window won the race; retry to surface the conflict
+            if slot_minutes and e.errno == ER_LOCK_DEADLOCK and attempt == 0:
+                continue
+            logger.error(f"Error creating appointment: {e}")
+            return None
+        finally:
+            connection.close()
+    return None
+
+def create_appointments(appointments: List[Dict[str, Any]], slot_minutes: Optional[int] = None) -> List[int]:
+    """Create several appointments in one transaction (one connection, one rollup update)
+
+    When slot_minutes is given every row gets the same slot check as create_appointment
+    (earlier rows of the batch included), and SlotConflictError rolls the whole batch back.
+    """
+    if not appointments:
+        return []
+    connection = get_connection()
+    if not connection:
+        return []
+    try:
         cursor = connection.cursor()
+        connection.start_transaction()
         query = """
             INSERT INTO appointments 
-            (employee_name, department, reason, appointment_date, appointment_time, 
+            (employee_id, employee_name, department, reason, appointment_date, appointment_time, 
              visitor_name, visitor_email, visitor_phone, company_id, booking_method) 
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
         """
-        cursor.execute(query, (
-            employee_name, department, reason, appointment_date, appointment_time,
-            visitor_name, visitor_email, visitor_phone, company_id, booking_method
-        ))
-        appointment_id = cursor.lastrowid
+        # Row by row: a multi-row INSERT's ids are not guaranteed to be consecutive
+        # (innodb_autoinc_lock_mode=2, the MySQL 8 default), so each id is read back from its own insert
+        appointment_ids = []
+        for a in appointments:
+            if slot_minutes:
+                employee_column = "employee_id" if a.get("employee_id") else "employee_name"
+                cursor.execute(SLOT_CONFLICT_QUERY.format(employee_column=employee_column), (
+                    a["company_id"], a.get("employee_id") or a["employee_name"], a["appointment_date"],
+                    a["appointment_time"], slot_minutes, a["appointment_time"], slot_minutes
+                ))
+                if cursor.fetchone():
+                    connection.rollback()
+                    cursor.close()
+                    raise SlotConflictError(
+                        f"{a['employee_name']} is already booked at {a['appointment_time']} on {a['appointment_date']}"
+                    )
+            cursor.execute(query, (
+                a.get("employee_id"), a["employee_name"], a["department"], a.get("reason") or "", a["appointment_date"],
+                a["appointment_time"], a["visitor_name"], a["visitor_email"], a.get("visitor_phone") or "",
+                a["company_id"], a.get("booking_method", "manual")
+            ))
+            appointment_ids.append(cursor.lastrowid)
+        deltas: Dict[tuple, List[int]] = {}
+        for a in appointments:
+            key = (a["company_id"], a["appointment_date"], a["department"], a.get("booking_method", "manual"), "confirmed")
+            delta = deltas.setdefault(key, [0, 0])
+            delta[0] += 1
+            delta[1] += 1
+        apply_rollup_deltas(cursor, deltas)
         
         connection.commit()
         cursor.close()
+        return appointment_ids
+    except Error as e:
+        logger.error(f"Error creating appointments batch: {e}")
+        return []
+    finally:
         connection.close()
-        return appointment_id
+
+# Appointment columns for read paths: employee details come from the employees row via the
+# integer key; the VARCHAR copies only cover rows that were never linked to an employee
+APPOINTMENT_SELECT = """
+    SELECT a.id, a.employee_id, 
+           COALESCE(e.name, a.employee_name) AS employee_name, 
+           COALESCE(e.department, a.department) AS department, 
+           a.reason, a.appointment_date, a.appointment_time, 
+           a.visitor_name, a.visitor_email, a.visitor_phone, a.company_id, 
+           a.booking_method, a.status, a.qr_code_sent, a.email_sent, a.checked_in_at, a.created_at, a.updated_at, 
+           c.name AS company_name 
+    FROM appointments a 
+    JOIN companies c ON a.company_id = c.id 
+    LEFT JOIN employees e ON a.employee_id = e.id 
+"""
+
+def timedelta_to_time(value: timedelta) -> dt_time:
+    """TIME columns come back from mysql.connector as timedelta; map them to datetime.time"""
+    seconds = value.seconds
+    return dt_time(seconds // 3600, seconds % 3600 // 60, seconds % 60)
+
+def map_appointment_row(row: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Single row-mapping layer for appointment reads: typed date/time values, ready for AppointmentResponse"""
+    if row is not None and row["appointment_time"] is not None:
+        row["appointment_time"] = timedelta_to_time(row["appointment_time"])
+    return row
+
+def get_booked_slots(company_id: int, appointment_date: str) -> List[Dict[str, Any]]:
+    """Get the active bookings (employee and start time) of every employee in a company on a date"""
+    connection = get_connection()
+    if not connection:
+        return []
+    try:
+        cursor = connection.cursor(dictionary=True)
+        query = """
+            SELECT employee_id, employee_name, appointment_time 
+            FROM appointments 
+            WHERE company_id = %s AND appointment_date = %s 
+            AND status IN ('confirmed', 'rescheduled')
+        """
+        cursor.execute(query, (company_id, appointment_date))
+        results = cursor.fetchall()
+        
+        cursor.close()
+        return results
     except Error as e:
-        logger.error(f"Error creating appointment: {e}")
-        return None
+        logger.error(f"Error getting booked slots: {e}")
+        return []
+    finally:
+        connection.close()
 
 def get_appointment_by_id(appointment_id: int) -> Optional[Dict[str, Any]]:
     """Get appointment by ID"""
+    connection = get_connection()
+    if not connection:
+        return None
     try:
-        connection = get_connection()
-        if not connection:
-            return None
-        
         cursor = connection.cursor(dictionary=True)
-        query = """
-            SELECT a.*, c.name as company_name 
-            FROM appointments a 
-            JOIN companies c ON a.company_id = c.id 
+        query = APPOINTMENT_SELECT + """
             WHERE a.id = %s
         """
         cursor.execute(query, (appointment_id,))
-        result = cursor.fetchone()
+        result = map_appointment_row(cursor.fetchone())
         
         cursor.close()
-        connection.close()
         return result
     except Error as e:
         logger.error(f"Error getting appointment by ID: {e}")
         return None
+    finally:
+        connection.close()
 
 def get_appointments_by_company(company_id: int) -> List[Dict[str, Any]]:
     """Get all appointments for a company"""
+    connection = get_connection()
+    if not connection:
+        return []
     try:
-        connection = get_connection()
-        if not connection:
-            return []
-        
         cursor = connection.cursor(dictionary=True)
-        query = """
-            SELECT a.*, c.name as company_name 
-            FROM appointments a 
-            JOIN companies c ON a.company_id = c.id 
+        query = APPOINTMENT_SELECT + """
             WHERE a.company_id = %s 
             ORDER BY a.appointment_date DESC, a.appointment_time DESC
         """
         cursor.execute(query, (company_id,))
-        results = cursor.fetchall()
+        results = [map_appointment_row(row) for row in cursor.fetchall()]
         
         cursor.close()
-        connection.close()
         return results
     except Error as e:
         logger.error(f"Error getting appointments by company: {e}")
         return []
+    finally:
+        connection.close()
 
 def get_appointments_by_visitor_email(visitor_email: str) -> List[Dict[str, Any]]:
     """Get all appointments for a visitor by email"""
+    connection = get_connection()
+    if not connection:
+        return []
     try:
-        connection = get_connection()
-        if not connection:
-            return []
-        
         cursor = connection.cursor(dictionary=True)
-        query = """
-            SELECT a.*, c.name as company_name 
-            FROM appointments a 
-            JOIN companies c ON a.company_id = c.id 
+        query = APPOINTMENT_SELECT + """
             WHERE a.visitor_email = %s 
             ORDER BY a.appointment_date DESC, a.appointment_time DESC
         """
         cursor.execute(query, (visitor_email,))
-        results = cursor.fetchall()
+        results = [map_appointment_row(row) for row in cursor.fetchall()]
         
         cursor.close()
-        connection.close()
         return results
     except Error as e:
         logger.error(f"Error getting appointments by visitor email: {e}")
         return []
+    finally:
+        connection.close()
 
-def update_appointment_status(appointment_id: int, status: str) -> bool:
-    """Update appointment status"""
+def get_appointments_by_employee(company_id: int, employee_id: int, date_from: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+    """Get an employee's appointments (optionally from an ISO date onwards) via the integer composite index; None on database errors"""
+    connection = get_connection()
+    if not connection:
+        return None
     try:
-        connection = get_connection()
-        if not connection:
-            return False
+        cursor = connection.cursor(dictionary=True)
+        query = APPOINTMENT_SELECT + """
+            WHERE a.company_id = %s AND a.employee_id = %s AND a.appointment_date >= %s 
+            ORDER BY a.appointment_date ASC, a.appointment_time ASC
+        """
+        cursor.execute(query, (company_id, employee_id, date_from or "1000-01-01"))
+        results = [map_appointment_row(row) for row in cursor.fetchall()]
         
-        cursor = connection.cursor()
+        cursor.close()
+        return results
+    except Error as e:
+        logger.error(f"Error getting appointments by employee: {e}")
+        return None
+    finally:
+        connection.close()
+
+def update_appointment_status(appointment_id: int, status: str) -> bool:
+    """Update appointment status (and move the appointment between rollup status counts)"""
+    if status not in ROLLUP_STATUSES:
+        logger.error(f"Error updating appointment status: unknown status {status}")
+        return False
+    connection = get_connection()
+    if not connection:
+        return False
+    try:
+        cursor = connection.cursor(dictionary=True)
+        connection.start_transaction()
+        cursor.execute(
+            "SELECT company_id, appointment_date, department, booking_method, status "
+            "FROM appointments WHERE id = %s FOR UPDATE",
+            (appointment_id,)
+        )
+        current = cursor.fetchone()
         query = "UPDATE appointments SET status = %s WHERE id = %s"
         cursor.execute(query, (status, appointment_id))
+        if current and current["status"] != status:
+            key = (current["company_id"], current["appointment_date"], current["department"], current["booking_method"])
+            apply_rollup_deltas(cursor, {key + (current["status"],): [0, -1], key + (status,): [0, 1]})
         
         connection.commit()
         cursor.close()
-        connection.close()
         return True
     except Error as e:
         logger.error(f"Error updating appointment status: {e}")
         return False
+    finally:
+        connection.close()
 
 def mark_appointment_email_sent(appointment_id: int) -> bool:
     """Mark appointment email as sent"""
+    connection = get_connection()
+    if not connection:
+        return False
     try:
-        connection = get_connection()
-        if not connection:
-            return False
-        
         cursor = connection.cursor()
         query = "UPDATE appointments SET email_sent = TRUE WHERE id = %s"
         cursor.execute(query, (appointment_id,))
         
         connection.commit()
         cursor.close()
-        connection.close()
         return True
     except Error as e:
         logger.error(f"Error marking appointment email sent: {e}")
         return False
+    finally:
+        connection.close()
 
 def mark_appointment_qr_sent(appointment_id: int) -> bool:
     """Mark appointment QR code as sent"""
+    connection = get_connection()
+    if not connection:
+        return False
     try:
-        connection = get_connection()
-        if not connection:
-            return False
-        
         cursor = connection.cursor()
         query = "UPDATE appointments SET qr_code_sent = TRUE WHERE id = %s"
         cursor.execute(query, (appointment_id,))
         
         connection.commit()
         cursor.close()
-        connection.close()
         return True
     except Error as e:
         logger.error(f"Error marking appointment QR sent: {e}")
         return False
+    finally:
+        connection.close()
+
+VISIT_EVENT_INSERT = """
+    INSERT INTO visit_events (company_id, appointment_id, event_type, visitor_name, employee_name)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+def check_in_appointments(appointment_ids: List[int]) -> Optional[Dict[int, Dict[str, Any]]]:
+    """Mark a batch of appointments checked in with one SELECT and one UPDATE
+
+    First check-ins, and visitors scanning back in after a check-out (returned
+    with reentry = True; checked_in_at keeps the first arrival), also append a
+    check_in row to visit_events. The SELECT locks the rows (FOR UPDATE) in the
+    same transaction, so a cancellation or a second worker's scan can't slip in
+    between the eligibility check and the update. Returns the rows by id as they
+    were before the update (so callers can tell a first check-in from a repeat
+    scan); cancelled and completed appointments are left unchanged. None on
+    database errors.
+    """
+    if not appointment_ids:
+        return {}
+    connection = get_connection()
+    if not connection:
+        return None
+    try:
+        cursor = connection.cursor(dictionary=True)
+        connection.start_transaction()
+        placeholders = ", ".join(["%s"] * len(appointment_ids))
+        cursor.execute(f"""
+            SELECT id, company_id, employee_name, visitor_name, status, checked_in_at
+            FROM appointments WHERE id IN ({placeholders}) FOR UPDATE
+        """, tuple(appointment_ids))
+        rows = {row["id"]: row for row in cursor.fetchall()}
+
+        active = [row for row in rows.values() if row["status"] in ("confirmed", "rescheduled")]
+        eligible = [row["id"] for row in active if row["checked_in_at"] is None]
+        returning = [row["id"] for row in active if row["checked_in_at"] is not None]
+        if returning:
+            # Checked in before: a re-entry if their latest arrival/departure event is a check-out
+            cursor.execute(f"""
+                SELECT appointment_id, event_type FROM visit_events
+                WHERE id IN (
+                    SELECT MAX(id) FROM visit_events
+                    WHERE appointment_id IN ({", ".join(["%s"] * len(returning))})
+                    AND event_type IN ('check_in', 'check_out')
+                    GROUP BY appointment_id
+                )
+            """, tuple(returning))
+            for event in cursor.fetchall():
+                rows[event["appointment_id"]]["reentry"] = event["event_type"] == "check_out"
+        if eligible:
+            cursor.execute(f"""
+                UPDATE appointments SET checked_in_at = NOW()
+                WHERE id IN ({", ".join(["%s"] * len(eligible))})
+            """, tuple(eligible))
+        arrivals = eligible + [i for i in returning if rows[i].get("reentry")]
+        if arrivals:
+            cursor.executemany(VISIT_EVENT_INSERT, [
+                (rows[i]["company_id"], i, "check_in", rows[i]["visitor_name"], rows[i]["employee_name"])
+                for i in arrivals
+            ])
+        connection.commit()
+
+        cursor.close()
+        return rows
+    except Error as e:
+        logger.error(f"Error checking in appointments: {e}")
+        return None
+    finally:
+        connection.close()
+
+# Analytics (reads only the daily rollups, never the appointments table)
+ROLLUP_GROUPS = {"day": "stat_date", "department": "department", "booking_method": "booking_method"}
+
+def get_appointment_stats(company_id: int, date_from: str, date_to: str, group_by: str = "day") -> List[Dict[str, Any]]:
+    """Summed rollup counts per day, department or booking method for a date range"""
+    column = ROLLUP_GROUPS[group_by]
+    connection = get_connection()
+    if not connection:
+        return []
+    try:
+        cursor = connection.cursor(dictionary=True)
+        query = f"""
+            SELECT {column} AS bucket, 
+                   CAST(SUM(bookings) AS SIGNED) AS bookings, 
+                   CAST(SUM(confirmed) AS SIGNED) AS confirmed, 
+                   CAST(SUM(cancelled) AS SIGNED) AS cancelled, 
+                   CAST(SUM(completed) AS SIGNED) AS completed, 
+                   CAST(SUM(rescheduled) AS SIGNED) AS rescheduled 
+            FROM appointment_daily_stats 
+            WHERE company_id = %s AND stat_date BETWEEN %s AND %s 
+            GROUP BY {column} 
+            ORDER BY {column}
+        """
+        cursor.execute(query, (company_id, date_from, date_to))
+        results = cursor.fetchall()
+        
+        cursor.close()
+        return results
+    except Error as e:
+        logger.error(f"Error getting appointment stats: {e}")
+        return []
+    finally:
+        connection.close()
+
+# Visit event log (append-only: rows are never updated or deleted by the application)
+def record_visit_events(events: List[Dict[str, Any]]) -> bool:
+    """Append visit events (company_id, appointment_id, event_type, visitor_name, employee_name)"""
+    if not events:
+        return True
+    connection = get_connection()
+    if not connection:
+        return False
+    try:
+        cursor = connection.cursor()
+        cursor.executemany(VISIT_EVENT_INSERT, [
+            (e["company_id"], e.get("appointment_id"), e["event_type"], e["visitor_name"], e.get("employee_name"))
+            for e in events
+        ])
+        
+        connection.commit()
+        cursor.close()
+        return True
+    except Error as e:
+        logger.error(f"Error recording visit events: {e}")
+        return False
+    finally:
+        connection.close()
+
+def get_visit_events_since(last_id: int, since: datetime, limit: int) -> Optional[List[Dict[str, Any]]]:
+    """Visit events after an event id (and not older than since), in id order; None on database errors"""
+    connection = get_connection()
+    if not connection:
+        return None
+    try:
+        cursor = connection.cursor(dictionary=True)
+        query = """
+            SELECT id, company_id, appointment_id, event_type, visitor_name, employee_name, created_at 
+            FROM visit_events 
+            WHERE id > %s AND created_at >= %s 
+            ORDER BY id 
+            LIMIT %s
+        """
+        cursor.execute(query, (last_id, since, limit))
+        results = cursor.fetchall()
+        
+        cursor.close()
+        return results
+    except Error as e:
+        logger.error(f"Error getting visit events: {e}")
+        return None
+    finally:
+        connection.close()
 
 # Employee functions
 def create_employee(name: str, email: str, department: str, designation: str, phone: str, company_id: int) -> Optional[int]:
     """Create a new employee"""
+    connection = get_connection()
+    if not connection:
+        return None
     try:
-        connection = get_connection()
-        if not connection:
-            return None
-        
         cursor = connection.cursor()
         query = """
             INSERT INTO employees (name, email, department, designation, phone, company_id) 
@@ -549,19 +1140,19 @@ def create_employee(name: str, email: str, department: str, designation: str, ph
         
         connection.commit()
         cursor.close()
-        connection.close()
         return employee_id
     except Error as e:
         logger.error(f"Error creating employee: {e}")
         return None
+    finally:
+        connection.close()
 
 def get_employees_by_company(company_id: int) -> List[Dict[str, Any]]:
     """Get all employees for a company"""
+    connection = get_connection()
+    if not connection:
+        return []
     try:
-        connection = get_connection()
-        if not connection:
-            return []
-        
         cursor = connection.cursor(dictionary=True)
         query = """
             SELECT * FROM employees 
@@ -572,19 +1163,19 @@ def get_employees_by_company(company_id: int) -> List[Dict[str, Any]]:
         results = cursor.fetchall()
         
         cursor.close()
-        connection.close()
         return results
     except Error as e:
         logger.error(f"Error getting employees by company: {e}")
         return []
+    finally:
+        connection.close()
 
 def get_employee_by_email_and_company(email: str, company_id: int) -> Optional[Dict[str, Any]]:
     """Get employee by email and company"""
+    connection = get_connection()
+    if not connection:
+        return None
     try:
-        connection = get_connection()
-        if not connection:
-            return None
-        
         cursor = connection.cursor(dictionary=True)
         query = """
             SELECT * FROM employees 
@@ -594,19 +1185,64 @@ def get_employee_by_email_and_company(email: str, company_id: int) -> Optional[D
         result = cursor.fetchone()
         
         cursor.close()
-        connection.close()
         return result
     except Error as e:
         logger.error(f"Error getting employee by email and company: {e}")
         return None
+    finally:
+        connection.close()
+
+def get_employee_by_id_and_company(employee_id: int, company_id: int) -> Optional[Dict[str, Any]]:
+    """Get active employee by ID within a company"""
+    connection = get_connection()
+    if not connection:
+        return None
+    try:
+        cursor = connection.cursor(dictionary=True)
+        query = """
+            SELECT * FROM employees 
+            WHERE id = %s AND company_id = %s AND is_active = TRUE
+        """
+        cursor.execute(query, (employee_id, company_id))
+        result = cursor.fetchone()
+        
+        cursor.close()
+        return result
+    except Error as e:
+        logger.error(f"Error getting employee by ID and company: {e}")
+        return None
+    finally:
+        connection.close()
+
+def get_employee_by_name_and_company(name: str, company_id: int) -> Optional[Dict[str, Any]]:
+    """Get active employee by exact (case-insensitive) name within a company"""
+    connection = get_connection()
+    if not connection:
+        return None
+    try:
+        cursor = connection.cursor(dictionary=True)
+        query = """
+            SELECT * FROM employees 
+            WHERE company_id = %s AND name = %s AND is_active = TRUE 
+            ORDER BY id ASC LIMIT 1
+        """
+        cursor.execute(query, (company_id, name))
+        result = cursor.fetchone()
+        
+        cursor.close()
+        return result
+    except Error as e:
+        logger.error(f"Error getting employee by name and company: {e}")
+        return None
+    finally:
+        connection.close()
 
 def get_employees_by_department(company_id: int, department: str) -> List[Dict[str, Any]]:
     """Get employees by department"""
+    connection = get_connection()
+    if not connection:
+        return []
     try:
-        connection = get_connection()
-        if not connection:
-            return []
-        
         cursor = connection.cursor(dictionary=True)
         query = """
             SELECT * FROM employees 
@@ -617,19 +1253,19 @@ def get_employees_by_department(company_id: int, department: str) -> List[Dict[s
         results = cursor.fetchall()
         
         cursor.close()
-        connection.close()
         return results
     except Error as e:
         logger.error(f"Error getting employees by department: {e}")
         return []
+    finally:
+        connection.close()
 
 def update_employee(employee_id: int, name: str, email: str, department: str, designation: str, phone: str) -> bool:
     """Update employee details"""
+    connection = get_connection()
+    if not connection:
+        return False
     try:
-        connection = get_connection()
-        if not connection:
-            return False
-        
         cursor = connection.cursor()
         query = """
             UPDATE employees 
@@ -640,27 +1276,28 @@ def update_employee(employee_id: int, name: str, email: str, department: str, de
         
         connection.commit()
         cursor.close()
-        connection.close()
         return True
     except Error as e:
         logger.error(f"Error updating employee: {e}")
         return False
+    finally:
+        connection.close()
 
 def deactivate_employee(employee_id: int) -> bool:
     """Deactivate employee"""
+    connection = get_connection()
+    if not connection:
+        return False
     try:
-        connection = get_connection()
-        if not connection:
-            return False
-        
         cursor = connection.cursor()
         query = "UPDATE employees SET is_active = FALSE WHERE id = %s"
         cursor.execute(query, (employee_id,))
         
         connection.commit()
         cursor.close()
-        connection.close()
         return True
     except Error as e:
         logger.error(f"Error deactivating employee: {e}")
-        return False 
\ No newline at end of file
+        return False 
+    finally:
+        connection.close()
\ No newline at end of file
@@ -0,0 +1,113 @@
+"""
+Background delivery of appointment confirmation emails.
+
+Booking used to send the confirmation (QR render plus an SMTP round trip)
+inside the request. The outbox takes the appointment row instead and
+EMAIL_OUTBOX_WORKERS threads send it and set email_sent/qr_sent. Worker
+threads start on the first enqueue, so nothing is running in a pre-fork
+parent (see start_server.py). On shutdown, drain() waits up to
+EMAIL_DRAIN_SECONDS for queued mail. Anything still unsent is logged and keeps
+email_sent = FALSE.
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Dict, Any, List
+
+from config import EMAIL_OUTBOX_WORKERS
+from database import mark_appointment_email_sent, mark_appointment_qr_sent
+from email_service import email_service
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class EmailOutbox:
+    def __init__(self, workers: int = EMAIL_OUTBOX_WORKERS):
+        self.workers = max(1, workers)
+        self._queue: "queue.Queue" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self.sent = 0
+        self.failed = 0
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"email-outbox-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def enqueue(self, appointment_data: Dict[str, Any]) -> None:
+        """Queue the confirmation email for an appointment (sent inline once draining has started)"""
+        if self._closed:
+            self._deliver(appointment_data)
+            return
+        self._start()
+        self._queue.put(appointment_data)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                self._deliver(item)
+            finally:
+                self._queue.task_done()
+
+    def _deliver(self, appointment_data: Dict[str, Any]) -> None:
+        appointment_id = appointment_data["id"]
+        try:
+            if email_service.send_appointment_confirmation(appointment_data):
+                mark_appointment_email_sent(appointment_id)
+                mark_appointment_qr_sent(appointment_id)
+                self._count("sent")
+                logger.info("Appointment confirmation email sent for appointment %s", appointment_id)
+            else:
+                self._count("failed")
+                logger.warning("Failed to send appointment confirmation email for appointment %s", appointment_id)
+        except Exception as e:
+            self._count("failed")
+            logger.error("Error sending appointment confirmation email: %s", e)
+
+    def _count(self, outcome: str) -> None:
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def depth(self) -> int:
+        """Emails queued and not yet picked up by a worker"""
+        return self._queue.qsize()
+
+    def workers_alive(self) -> Dict[str, int]:
+        """Started and still-running worker threads (none are started before the first email)"""
+        with self._lock:
+            alive = sum(1 for thread in self._threads if thread.is_alive())
+            return {"started": len(self._threads), "alive": alive, "draining": self._closed}
+
+    def drain(self, timeout: float) -> int:
+        """Stop accepting queued work, wait up to timeout for the backlog; returns how many were left unsent"""
+        self._closed = True
+        with self._lock:
+            threads = list(self._threads)
+        for _ in threads:
+            self._queue.put(_STOP)
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        left = sum(1 for item in list(self._queue.queue) if item is not _STOP)
+        if left:
+            logger.warning("Email outbox shut down with %s confirmation emails unsent", left)
+        return left
+
+    def stats(self) -> Dict[str, int]:
+        return {"queued": self.depth(), "sent": self.sent, "failed": self.failed}
+
+
+email_outbox = EmailOutbox()
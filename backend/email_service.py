@@ -3,13 +3,11 @@ import ssl
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.image import MIMEImage
-import qrcode
-import qrcode.constants
-import io
-import base64
 import logging
 from typing import Optional, Dict, Any
-from config import EMAIL_HOST, EMAIL_PORT, EMAIL_USER, EMAIL_PASSWORD
+from config import EMAIL_HOST, EMAIL_PORT, EMAIL_USER, EMAIL_PASSWORD, EMAIL_DELIVERY
+from instrumentation import track
+from qr_codes import qr_cache
 
 logger = logging.getLogger(__name__)
 
@@ -22,44 +20,17 @@ class EmailService:
         
         # Check if email is properly configured
         self.email_configured = bool(self.user and self.password)
-        if not self.email_configured:
-            print("⚠️  Warning: Email credentials not configured. Appointment emails will not be sent.")
-            print("   To enable email notifications, set EMAIL_USER and EMAIL_PASSWORD in your .env file")
+        self.delivery_disabled = EMAIL_DELIVERY == "disabled"
+        if not self.email_configured and not self.delivery_disabled:
+            logger.warning(
+                "Email credentials not configured; appointment emails will not be sent "
+                "(set EMAIL_USER and EMAIL_PASSWORD in .env to enable them)"
+            )
         
     def generate_qr_code(self, appointment_data: Dict[str, Any]) -> str:
-        """Generate QR code for appointment and return as base64 string"""
+        """QR code with the appointment's signed pass token as a base64 PNG (cached per appointment)"""
         try:
-            # Create QR code data
-            qr_data = f"""
-            Appointment ID: {appointment_data['id']}
-            Employee: {appointment_data['employee_name']}
-            Department: {appointment_data['department']}
-            Date: {appointment_data['appointment_date']}
-            Time: {appointment_data['appointment_time']}
-            Visitor: {appointment_data['visitor_name']}
-            Company: {appointment_data['company_name']}
-            """
-            
-            # Generate QR code
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(qr_data)
-            qr.make(fit=True)
-            
-            # Create image
-            img = qr.make_image(fill_color="black", back_color="white")
-            
-            # Convert to base64
-            buffer = io.BytesIO()
-            img.save(buffer)
-            buffer.seek(0)
-            img_base64 = base64.b64encode(buffer.getvalue()).decode()
-            
-            return img_base64
+            return qr_cache.png_base64(appointment_data)
         except Exception as e:
             logger.error(f"Error generating QR code: {e}")
             return ""
@@ -67,6 +38,9 @@ class EmailService:
     def send_appointment_confirmation(self, appointment_data: Dict[str, Any]) -> bool:
         """Send appointment confirmation email with QR code"""
         try:
+            if self.delivery_disabled:
+                return True
+            
             # Check if email is configured
             if not self.email_configured:
                 logger.warning("Email not configured. Skipping appointment confirmation email.")
@@ -207,7 +181,7 @@ class EmailService:
             
             # Send email
             context = ssl.create_default_context()
-            with smtplib.SMTP_SSL(self.host, self.port, context=context) as server:
+            with track("smtp"), smtplib.SMTP_SSL(self.host, self.port, context=context) as server:
                 server.login(self.user, self.password)
                 server.sendmail(self.user, appointment_data['visitor_email'], msg.as_string())
             
@@ -221,6 +195,9 @@ class EmailService:
     def send_appointment_reminder(self, appointment_data: Dict[str, Any]) -> bool:
         """Send appointment reminder email"""
         try:
+            if self.delivery_disabled:
+                return True
+            
             # Check if email is configured
             if not self.email_configured:
                 logger.warning("Email not configured. Skipping appointment reminder email.")
@@ -275,7 +252,7 @@ class EmailService:
             msg.attach(part)
             
             context = ssl.create_default_context()
-            with smtplib.SMTP_SSL(self.host, self.port, context=context) as server:
+            with track("smtp"), smtplib.SMTP_SSL(self.host, self.port, context=context) as server:
                 server.login(self.user, self.password)
                 server.sendmail(self.user, appointment_data['visitor_email'], msg.as_string())
             
@@ -0,0 +1,254 @@
+"""
+Employee vector index maintenance for the appointment assistant.
+
+Each company gets its own Chroma collection. Embeddings are computed in
+batches, every record stores a content hash so incremental syncs only
+re-embed employees whose name/department changed, and employees that are no
+longer active are deleted from the collection. Full rebuilds write into a
+fresh versioned collection and then swap the company's alias to it, so
+readers never see a half-built index.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, List, Dict, Any
+
+from config import CHROMA_DIR, EMBEDDING_MODEL, EMBEDDING_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+ALIASES_FILE = os.path.join(CHROMA_DIR, "index_aliases.json")
+
+_client = None
+_embedding_function = None
+_embedding_error: Optional[str] = None
+_init_lock = threading.Lock()
+_company_locks: Dict[int, threading.Lock] = {}
+_aliases: Optional[Dict[str, str]] = None
+_aliases_stamp: Optional[tuple] = None
+_rebuild_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="employee-index")
+# When this process last synced each company's collection; processes that use the assistant re-sync at most
+# every INDEX_SYNC_SECONDS, which picks up employee changes made by workers that never load the model
+_synced_at: Dict[int, float] = {}
+INDEX_SYNC_SECONDS = 300
+
+
+def get_chroma_client():
+    """Shared persistent Chroma client (imported lazily)"""
+    global _client
+    if _client is None:
+        with _init_lock:
+            if _client is None:
+                import chromadb
+                _client = chromadb.PersistentClient(path=CHROMA_DIR)
+    return _client
+
+
+def get_embedding_function():
+    """Shared sentence-transformer embedding function (model loaded once per process)"""
+    global _embedding_function, _embedding_error
+    if _embedding_function is None:
+        with _init_lock:
+            if _embedding_function is None:
+                try:
+                    from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+                    _embedding_function = SentenceTransformerEmbeddingFunction(EMBEDDING_MODEL)
+                except Exception as e:
+                    _embedding_error = str(e)
+                    raise
+                _embedding_error = None
+    return _embedding_function
+
+
+def embedding_model_status() -> Dict[str, Any]:
+    """Whether this process has loaded the embedding model (it loads on first assistant/index use)"""
+    if _embedding_function is not None:
+        return {"state": "loaded", "model": EMBEDDING_MODEL}
+    if _embedding_error is not None:
+        return {"state": "failed", "model": EMBEDDING_MODEL, "error": _embedding_error}
+    return {"state": "not_loaded", "model": EMBEDDING_MODEL}
+
+
+def _company_lock(company_id: int) -> threading.Lock:
+    with _init_lock:
+        return _company_locks.setdefault(company_id, threading.Lock())
+
+
+def _load_aliases() -> Dict[str, str]:
+    """Current alias map, re-read whenever the file changed (another worker may have swapped a collection)"""
+    global _aliases, _aliases_stamp
+    try:
+        st = os.stat(ALIASES_FILE)
+        stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+    except OSError:
+        stamp = None
+    if _aliases is None or stamp != _aliases_stamp:
+        try:
+            with open(ALIASES_FILE, encoding="utf-8") as f:
+                aliases = json.load(f)
+        except (OSError, ValueError):
+            aliases = {}
+        _aliases, _aliases_stamp = aliases, stamp
+    return _aliases
+
+
+def _save_aliases(aliases: Dict[str, str]) -> None:
+    """Persist the alias map via write-to-temp + os.replace so the swap is atomic on disk"""
+    os.makedirs(CHROMA_DIR, exist_ok=True)
+    tmp_path = f"{ALIASES_FILE}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(aliases, f)
+    os.replace(tmp_path, ALIASES_FILE)
+
+
+def collection_name(company_id: int) -> str:
+    """Name of the collection currently serving a company"""
+    return _load_aliases().get(str(company_id), f"employees_{company_id}")
+
+
+def get_company_collection(company_id: int):
+    """Get (or create) the active employee collection for a company"""
+    return get_chroma_client().get_or_create_collection(
+        name=collection_name(company_id),
+        embedding_function=get_embedding_function()
+    )
+
+
+def get_synced_company_collection(company_id: int):
+    """Company collection for searching, synced first unless this process did so within INDEX_SYNC_SECONDS"""
+    synced_at = _synced_at.get(company_id)
+    if synced_at is None or time.monotonic() - synced_at >= INDEX_SYNC_SECONDS:
+        try:
+            sync_company_index(company_id)
+        except Exception as e:
+            logger.error(f"Employee index sync failed for company {company_id}: {e}")
+    return get_company_collection(company_id)
+
+
+def employee_document(employee: Dict[str, Any]) -> str:
+    """Text that gets embedded for an employee"""
+    return employee["name"]
+
+
+def employee_hash(employee: Dict[str, Any]) -> str:
+    """Content hash of the fields that feed the embedding and the search metadata"""
+    content = "\x1f".join([employee["name"], employee["department"], employee.get("designation") or ""])
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def _metadata(employee: Dict[str, Any], content_hash: str) -> Dict[str, Any]:
+    return {
+        "employee_id": employee["id"],
+        "employee_name": employee["name"],
+        "department": employee["department"],
+        "content_hash": content_hash,
+    }
+
+
+def _upsert_in_batches(collection, employees: List[Dict[str, Any]], hashes: Dict[str, str]) -> None:
+    embed = get_embedding_function()
+    for start in range(0, len(employees), EMBEDDING_BATCH_SIZE):
+        batch = employees[start:start + EMBEDDING_BATCH_SIZE]
+        documents = [employee_document(e) for e in batch]
+        ids = [str(e["id"]) for e in batch]
+        collection.upsert(
+            ids=ids,
+            embeddings=embed(documents),
+            documents=documents,
+            metadatas=[_metadata(e, hashes[i]) for e, i in zip(batch, ids)],
+        )
+
+
+def sync_company_index(company_id: int) -> Dict[str, int]:
+    """Bring a company's collection in line with its active employees, re-embedding only changed rows"""
+    from database import get_employees_by_company
+
+    with _company_lock(company_id):
+        employees = get_employees_by_company(company_id)
+        collection = get_company_collection(company_id)
+
+        existing = collection.get(include=["metadatas"])
+        indexed_hashes = {
+            id_: (meta or {}).get("content_hash")
+            for id_, meta in zip(existing["ids"], existing["metadatas"])
+        }
+
+        hashes = {str(e["id"]): employee_hash(e) for e in employees}
+        changed = [e for e in employees if indexed_hashes.get(str(e["id"])) != hashes[str(e["id"])]]
+        stale_ids = [id_ for id_ in indexed_hashes if id_ not in hashes]
+
+        if changed:
+            _upsert_in_batches(collection, changed, hashes)
+        if stale_ids:
+            collection.delete(ids=stale_ids)
+
+        _synced_at[company_id] = time.monotonic()
+
+    stats = {"embedded": len(changed), "deleted": len(stale_ids), "unchanged": len(employees) - len(changed)}
+    logger.info(f"Employee index sync for company {company_id}: {stats}")
+    return stats
+
+
+def rebuild_company_index(company_id: int) -> Dict[str, int]:
+    """Rebuild a company's collection from scratch and atomically swap it in"""
+    from database import get_employees_by_company
+
+    client = get_chroma_client()
+    new_name = f"employees_{company_id}_v{int(time.time() * 1000)}"
+    new_collection = client.create_collection(name=new_name, embedding_function=get_embedding_function())
+
+    with _company_lock(company_id):
+        employees = get_employees_by_company(company_id)
+        hashes = {str(e["id"]): employee_hash(e) for e in employees}
+        _upsert_in_batches(new_collection, employees, hashes)
+
+        old_name = collection_name(company_id)
+        aliases = dict(_load_aliases())
+        aliases[str(company_id)] = new_name
+        _save_aliases(aliases)
+        _synced_at[company_id] = time.monotonic()
+
+    try:
+        client.delete_collection(old_name)
+    except Exception as e:
+        # The old collection may never have existed (first build)
+        logger.debug(f"Could not delete old employee collection {old_name}: {e}")
+
+    logger.info(f"Rebuilt employee index for company {company_id} as {new_name} ({len(employees)} employees)")
+    return {"embedded": len(employees), "deleted": 0, "unchanged": 0}
+
+
+def rebuild_company_index_in_background(company_id: int) -> Future:
+    """Schedule a full rebuild on the indexing thread; the current index keeps serving until the swap"""
+    future = _rebuild_executor.submit(rebuild_company_index, company_id)
+    future.add_done_callback(_log_failure)
+    return future
+
+
+def _log_failure(future: Future) -> None:
+    error = future.exception()
+    if error:
+        logger.error(f"Employee index rebuild failed: {error}")
+
+
+def refresh_company_index(company_id: int) -> None:
+    """Invalidate the assistant's name matcher and sync the vector index (run as a background task after employee changes)"""
+    from name_matcher import invalidate_name_matcher
+
+    invalidate_name_matcher(company_id)
+    if _embedding_function is None:
+        # Don't load the embedding model in a worker that hasn't served the assistant just to re-embed;
+        # the next assistant lookup for this company syncs instead
+        _synced_at.pop(company_id, None)
+        return
+    try:
+        sync_company_index(company_id)
+    except ImportError:
+        logger.debug("chromadb not installed - skipping employee index sync")
+    except Exception as e:
+        logger.error(f"Employee index sync failed for company {company_id}: {e}")
@@ -0,0 +1,87 @@
+"""
+Fast JSON encoding for large list responses.
+
+By default FastAPI builds a Pydantic model per row, validates the list again
+against response_model and encodes it with the standard json module. With
+FAST_JSON_RESPONSES enabled, list endpoints instead project each database row
+onto the response model's fields as a plain dict and encode the list in one
+call with orjson (falling back to json when orjson is not installed). Rows
+come from our own typed data layer, so re-validating them buys nothing on
+these hot paths.
+"""
+
+import json
+import typing
+from datetime import date, datetime, time
+from typing import Any, Dict, List, Type, Union
+
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from config import FAST_JSON_RESPONSES
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content as compact UTF-8 JSON (orjson when available)"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSONResponse drop-in that renders with dumps()"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+_projections: Dict[type, tuple] = {}
+
+
+def _projection(model: Type[BaseModel]) -> tuple:
+    """(field names, bool field names) of a response model, computed once per model"""
+    projection = _projections.get(model)
+    if projection is None:
+        hints = typing.get_type_hints(model)
+        fields = tuple(getattr(model, "model_fields", None) or model.__fields__)
+        # MySQL BOOLEAN columns come back as 0/1
+        bools = tuple(
+            name for name in fields
+            if hints.get(name) in (bool, Union[bool, None])
+        )
+        projection = (fields, bools)
+        _projections[model] = projection
+    return projection
+
+
+def project_rows(rows: List[Dict[str, Any]], model: Type[BaseModel]) -> List[Dict[str, Any]]:
+    """Map database rows to plain dicts holding exactly the response model's fields"""
+    fields, bools = _projection(model)
+    projected = []
+    for row in rows:
+        item = {name: row.get(name) for name in fields}
+        for name in bools:
+            if item[name] is not None:
+                item[name] = bool(item[name])
+        projected.append(item)
+    return projected
+
+
+def list_response(rows: List[Dict[str, Any]], model: Type[BaseModel]):
+    """Response for a list endpoint: fast dict/orjson path when enabled, else validated models"""
+    if FAST_JSON_RESPONSES:
+        return FastJSONResponse(project_rows(rows, model))
+    return [model(**row) for row in rows]
@@ -1,12 +1,28 @@
 # gemini_utils.`py
 
-import google.generativeai as genai
+import logging
+import threading
+
+from instrumentation import track
+
+logger = logging.getLogger(__name__)
 
 # ✅ Step 1: Set your API key
-genai.configure(api_key="enter_your_api_key")
+GEMINI_API_KEY = "enter_your_api_key"
+
+# ✅ Step 2: Load Gemini 2.0 Flash model (only once, on first use: google.generativeai is slow to import)
+_model = None
+_model_lock = threading.Lock()
 
-# ✅ Step 2: Load Gemini 2.0 Flash model (only once)
-model = genai.GenerativeModel("gemini-2.0-flash")
+def get_model():
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                import google.generativeai as genai
+                genai.configure(api_key=GEMINI_API_KEY)
+                _model = genai.GenerativeModel("gemini-2.0-flash")
+    return _model
 
 # ✅ Step 3: Define reusable function
 def send_to_gemini(conversation):
@@ -21,11 +37,12 @@ def send_to_gemini(conversation):
             })
 
         # Generate response
-        response = model.generate_content(formatted)
+        with track("llm"):
+            response = get_model().generate_content(formatted)
         
         # Check if response is valid
         if not response or not response.text:
-            print("❌ Warning: Empty response from Gemini")
+            logger.warning("Empty response from Gemini")
             return "I'm sorry, I couldn't generate a response. Please try again.", 0, 0
 
         # Token usage tracking with proper error handling
@@ -50,5 +67,5 @@ def send_to_gemini(conversation):
         return response.text, prompt_toks, response_toks
         
     except Exception as e:
-        print(f"❌ Error calling Gemini API: {e}")
+        logger.error("Error calling Gemini API: %s", e)
         return "I'm sorry, there was an error processing your request. Please try again.", 0, 0
@@ -0,0 +1,122 @@
+"""
+Liveness and readiness checks.
+
+Each check reports "ok", "degraded" or "fail"; the overall status is the worst
+of them.
+
+- Liveness (/health) looks only at in-process state: connection pool
+  headroom, the email outbox (queue depth, worker threads) and whether the
+  assistant's embedding model is loaded. It never touches MySQL, so a database
+  outage doesn't get healthy workers restarted.
+- Readiness (/ready) adds the database: a SELECT 1 round trip plus the p95 of
+  all statements this process ran in the last minute (query_stats).
+
+Reports are cached for HEALTH_CACHE_SECONDS and refreshed by one caller at a
+time, so however often the load balancer probes, each worker pings the
+database at most once per interval.
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any, Callable
+
+from config import HEALTH_CACHE_SECONDS, HEALTH_DB_LATENCY_MS, HEALTH_EMAIL_QUEUE_LIMIT
+from database import pool_stats, ping_database
+from email_outbox import email_outbox
+from employee_indexer import embedding_model_status
+from query_stats import query_stats
+
+# Window of recent statements the readiness latency check looks at
+RECENT_LATENCY_SECONDS = 60
+
+_SEVERITY = {"ok": 0, "degraded": 1, "fail": 2}
+
+
+def worst(statuses) -> str:
+    return max(statuses, key=_SEVERITY.__getitem__, default="ok")
+
+
+def check_pool() -> Dict[str, Any]:
+    pool = pool_stats()
+    return {"status": "degraded" if pool["available"] <= 0 else "ok", **pool}
+
+
+def check_email_outbox() -> Dict[str, Any]:
+    queued = email_outbox.depth()
+    workers = email_outbox.workers_alive()
+    if workers["started"] and not workers["alive"] and not workers["draining"]:
+        status = "fail"
+    elif queued > HEALTH_EMAIL_QUEUE_LIMIT:
+        status = "degraded"
+    else:
+        status = "ok"
+    return {"status": status, "queued": queued, "limit": HEALTH_EMAIL_QUEUE_LIMIT, **workers}
+
+
+def check_model() -> Dict[str, Any]:
+    model = embedding_model_status()
+    # Not loaded yet is normal (it loads on first assistant use); a failed load means assistant turns will error
+    return {"status": "degraded" if model["state"] == "failed" else "ok", **model}
+
+
+def check_database() -> Dict[str, Any]:
+    recent = query_stats.recent_latency(RECENT_LATENCY_SECONDS)
+    if pool_stats()["available"] <= 0:
+        # Every connection is checked out; pinging would just queue behind them
+        return {"status": "degraded", "ping_ms": None, "recent": recent, "detail": "connection pool exhausted"}
+    latency = ping_database()
+    if latency is None:
+        return {"status": "fail", "ping_ms": None, "recent": recent, "detail": "database unreachable"}
+    ping_ms = round(latency * 1000, 2)
+    slow = ping_ms > HEALTH_DB_LATENCY_MS or recent["p95_ms"] > HEALTH_DB_LATENCY_MS
+    return {"status": "degraded" if slow else "ok", "ping_ms": ping_ms, "recent": recent, "threshold_ms": HEALTH_DB_LATENCY_MS}
+
+
+LIVENESS_CHECKS: Dict[str, Callable[[], Dict[str, Any]]] = {
+    "pool": check_pool,
+    "email_outbox": check_email_outbox,
+    "model": check_model,
+}
+READINESS_CHECKS: Dict[str, Callable[[], Dict[str, Any]]] = {**LIVENESS_CHECKS, "database": check_database}
+
+
+class HealthMonitor:
+    """Cached liveness/readiness reports"""
+
+    def __init__(self, ttl_seconds: float = HEALTH_CACHE_SECONDS):
+        self.ttl = ttl_seconds
+        self._locks = {"liveness": threading.Lock(), "readiness": threading.Lock()}
+        self._reports: Dict[str, Optional[Dict[str, Any]]] = {"liveness": None, "readiness": None}
+        self._checked_at = {"liveness": 0.0, "readiness": 0.0}
+
+    def _report(self, kind: str, checks: Dict[str, Callable[[], Dict[str, Any]]]) -> Dict[str, Any]:
+        with self._locks[kind]:
+            report = self._reports[kind]
+            if report is not None and time.monotonic() - self._checked_at[kind] < self.ttl:
+                return report
+            results = {}
+            for name, check in checks.items():
+                try:
+                    results[name] = check()
+                except Exception as e:
+                    results[name] = {"status": "fail", "detail": str(e)}
+            report = {
+                "status": worst(result["status"] for result in results.values()),
+                "checked_at": datetime.now().replace(microsecond=0).isoformat(),
+                "checks": results,
+            }
+            self._reports[kind] = report
+            self._checked_at[kind] = time.monotonic()
+            return report
+
+    def liveness(self) -> Dict[str, Any]:
+        """In-process checks only (cheap; never blocks on the database)"""
+        return self._report("liveness", LIVENESS_CHECKS)
+
+    def readiness(self) -> Dict[str, Any]:
+        """All checks including a database round trip (blocking; run it off the event loop)"""
+        return self._report("readiness", READINESS_CHECKS)
+
+
+health_monitor = HealthMonitor()
@@ -0,0 +1,222 @@
+"""
+Request timing and component instrumentation for the SaaS API.
+
+TimingMiddleware starts a RequestTimings for every HTTP request and keeps it
+in a context variable; database.py (connection acquire and every cursor
+execute/fetch), the SMTP senders and the Gemini client add their time to it
+via track()/record(). Each response carries a Server-Timing header with the
+breakdown, and the process-wide totals are rendered in the Prometheus text
+format by /metrics.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, List, Tuple
+
+# Components timed inside a request, in Server-Timing order
+COMPONENTS = ("db_acquire", "db_query", "smtp", "llm")
+SERVER_TIMING_NAMES = {"db_acquire": "dbwait", "db_query": "db", "smtp": "smtp", "llm": "llm"}
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def route_label(scope: Dict[str, Any]) -> str:
+    """Low-cardinality label for a request: the endpoint function name, else the raw path"""
+    endpoint = scope.get("endpoint")
+    return getattr(endpoint, "__name__", None) or scope.get("path", "")
+
+
+class RequestTimings:
+    """Time and call counts per component for one request"""
+
+    __slots__ = ("started", "components")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.components: Dict[str, List[float]] = {}
+
+    def add(self, component: str, seconds: float, calls: int = 1) -> None:
+        entry = self.components.get(component)
+        if entry is None:
+            self.components[component] = [calls, seconds]
+        else:
+            entry[0] += calls
+            entry[1] += seconds
+
+    def server_timing(self, total: float) -> str:
+        parts = [f"app;dur={total * 1000:.1f}"]
+        for component in COMPONENTS:
+            entry = self.components.get(component)
+            if entry:
+                calls, seconds = entry
+                parts.append(f'{SERVER_TIMING_NAMES[component]};dur={seconds * 1000:.1f};desc="{int(calls)}x"')
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """Timings of the request being handled (None outside a request)"""
+    return _current.get()
+
+
+class Histogram:
+    """Fixed-bucket histogram (cumulative counts rendered at scrape time)"""
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(DURATION_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(DURATION_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class Metrics:
+    """Process-wide request and component totals"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.durations: Dict[str, Histogram] = {}
+        self.components: Dict[str, List[float]] = {}
+        self.route_components: Dict[Tuple[str, str], List[float]] = {}
+
+    def record_component(self, component: str, seconds: float, calls: int = 1) -> None:
+        with self._lock:
+            entry = self.components.setdefault(component, [0, 0.0])
+            entry[0] += calls
+            entry[1] += seconds
+
+    def record_request(self, method: str, route: str, status: int, seconds: float, timings: RequestTimings) -> None:
+        with self._lock:
+            key = (method, route, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            histogram = self.durations.get(route)
+            if histogram is None:
+                histogram = self.durations[route] = Histogram()
+            histogram.observe(seconds)
+            for component, (calls, component_seconds) in timings.components.items():
+                entry = self.route_components.setdefault((route, component), [0, 0.0])
+                entry[0] += calls
+                entry[1] += component_seconds
+
+    def render(self, gauges: Optional[Dict[str, float]] = None) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            lines += ["# HELP http_requests_total HTTP requests by method, route and status",
+                      "# TYPE http_requests_total counter"]
+            for (method, route, status), count in sorted(self.requests.items()):
+                lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+            lines += ["# HELP http_request_duration_seconds Request wall time",
+                      "# TYPE http_request_duration_seconds histogram"]
+            for route, histogram in sorted(self.durations.items()):
+                cumulative = 0
+                for bound, count in zip(DURATION_BUCKETS + ("+Inf",), histogram.counts):
+                    cumulative += count
+                    lines.append(f"http_request_duration_seconds_bucket{_labels(route=route, le=bound)} {cumulative}")
+                lines.append(f"http_request_duration_seconds_sum{_labels(route=route)} {histogram.total:.6f}")
+                lines.append(f"http_request_duration_seconds_count{_labels(route=route)} {histogram.count}")
+
+            lines += ["# HELP app_component_seconds_total Time spent in DB connection acquire, queries, SMTP and LLM calls",
+                      "# TYPE app_component_seconds_total counter"]
+            for component, (_, seconds) in sorted(self.components.items()):
+                lines.append(f"app_component_seconds_total{_labels(component=component)} {seconds:.6f}")
+            lines += ["# HELP app_component_calls_total Calls per component",
+                      "# TYPE app_component_calls_total counter"]
+            for component, (calls, _) in sorted(self.components.items()):
+                lines.append(f"app_component_calls_total{_labels(component=component)} {int(calls)}")
+
+            lines += ["# HELP http_request_component_seconds_total Component time attributed to each route",
+                      "# TYPE http_request_component_seconds_total counter"]
+            for (route, component), (_, seconds) in sorted(self.route_components.items()):
+                lines.append(f"http_request_component_seconds_total{_labels(route=route, component=component)} {seconds:.6f}")
+            lines += ["# HELP http_request_component_calls_total Component calls attributed to each route",
+                      "# TYPE http_request_component_calls_total counter"]
+            for (route, component), (calls, _) in sorted(self.route_components.items()):
+                lines.append(f"http_request_component_calls_total{_labels(route=route, component=component)} {int(calls)}")
+
+        for name, value in (gauges or {}).items():
+            lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def record(component: str, seconds: float, calls: int = 1) -> None:
+    """Attribute component time to the current request and the process totals"""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(component, seconds, calls)
+    metrics.record_component(component, seconds, calls)
+
+
+@contextmanager
+def track(component: str):
+    """Time a block as one call of a component"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(component, time.perf_counter() - started)
+
+
+@contextmanager
+def collect_timings():
+    """Collect component timings for a block run outside an HTTP request (benchmarks, scripts)"""
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+class TimingMiddleware:
+    """Per-request wall time and component breakdown (Server-Timing header + /metrics)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                header = timings.server_timing(time.perf_counter() - timings.started)
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"server-timing", header.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            metrics.record_request(
+                scope["method"], route_label(scope), status, time.perf_counter() - timings.started, timings
+            )
@@ -0,0 +1,177 @@
+"""
+Structured, non-blocking logging for the API.
+
+configure_logging() replaces the old per-module logging.basicConfig calls with
+one root pipeline:
+
+- LazyQueueHandler: the request thread only runs the (cheap) filters and
+  enqueues the LogRecord; %-style arguments are merged, formatted and written
+  by the QueueListener thread, so records are never built on the request path.
+- RequestIdFilter stamps every record with the request id that
+  RequestIdMiddleware keeps in a context variable (and echoes in X-Request-ID).
+- SamplingFilter lets the first LOG_SAMPLE_BURST INFO/DEBUG records of a given
+  message template through each second and 1 in LOG_SAMPLE_RATE after that;
+  warnings and errors are never sampled.
+
+Output is one JSON object per line (LOG_FORMAT=json) or key=value text.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, Dict
+
+from config import LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_BURST, LOG_SAMPLE_RATE
+
+_request_id: ContextVar[str] = ContextVar("request_id", default="-")
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+_listener: Optional[QueueListener] = None
+_configure_lock = threading.Lock()
+_configured_with: tuple = ()
+
+
+def current_request_id() -> str:
+    """Id of the request being handled ("-" outside a request)"""
+    return _request_id.get()
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Per-template rate limit for high-frequency INFO/DEBUG records"""
+
+    def __init__(self, burst: int = LOG_SAMPLE_BURST, rate: int = LOG_SAMPLE_RATE):
+        super().__init__()
+        self.burst = burst
+        self.rate = max(1, rate)
+        self._window = int(time.monotonic())
+        self._counts: Dict[tuple, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        window = int(time.monotonic())
+        if window != self._window:
+            self._window = window
+            self._counts = {}
+        key = (record.name, record.msg)
+        count = self._counts.get(key, 0) + 1
+        self._counts[key] = count
+        return count <= self.burst or count % self.rate == 0
+
+
+class LazyQueueHandler(QueueHandler):
+    """QueueHandler that leaves msg/args unmerged for the listener thread to format"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Tracebacks reference live frames; render them now so the record can cross threads safely
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+TEXT_FORMAT = "%(asctime)s level=%(levelname)s logger=%(name)s request_id=%(request_id)s %(message)s"
+
+
+def configure_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT) -> None:
+    """Install the queue-based root handler once per process"""
+    global _listener, _configured_with
+    with _configure_lock:
+        if _listener is not None:
+            return
+        _configured_with = (level, fmt)
+        log_queue = queue.SimpleQueue()
+        output = logging.StreamHandler(sys.stderr)
+        output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+        handler = LazyQueueHandler(log_queue)
+        handler.addFilter(SamplingFilter())
+        handler.addFilter(RequestIdFilter())
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(level.upper())
+
+        _listener = QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    with _configure_lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+
+def _reset_after_fork() -> None:
+    # The listener thread doesn't survive fork(); a pre-forked worker starts its own
+    global _listener, _configure_lock
+    _configure_lock = threading.Lock()
+    if _listener is not None:
+        _listener = None
+        configure_logging(*_configured_with)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class RequestIdMiddleware:
+    """Assign each request an id (client X-Request-ID when well-formed) for log correlation"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        supplied = dict(scope.get("headers") or []).get(b"x-request-id", b"").decode("latin-1")
+        request_id = supplied if _VALID_REQUEST_ID.match(supplied) else uuid.uuid4().hex[:16]
+        token = _request_id.set(request_id)
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            _request_id.reset(token)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Add appointments.checked_in_at for front-desk check-in
+
+Adds the nullable checked_in_at column if it is missing (instant for InnoDB,
+existing rows stay NULL = not checked in). Safe to run more than once.
+
+Usage: python migrate_appointments_checked_in.py
+"""
+
+import os
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import get_connection
+from migrate_appointments_employee_id import column_exists
+
+
+def migrate():
+    try:
+        connection = get_connection()
+        if not connection:
+            print("❌ Failed to connect to database")
+            return False
+
+        cursor = connection.cursor()
+        if column_exists(cursor, "appointments", "checked_in_at"):
+            print("✅ appointments.checked_in_at already exists")
+        else:
+            cursor.execute("ALTER TABLE appointments ADD COLUMN checked_in_at TIMESTAMP NULL AFTER email_sent")
+            connection.commit()
+            print("✅ Added appointments.checked_in_at")
+
+        cursor.close()
+        connection.close()
+        return True
+
+    except Exception as e:
+        print(f"❌ Error migrating appointments: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    print("Adding check-in column to appointments...")
+    if migrate():
+        print("🎉 Appointment migration completed successfully!")
+    else:
+        print("💥 Appointment migration failed!")
+        sys.exit(1)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Link existing appointments to employees by employee_id
+
+Adds the employee_id column, its foreign key and the integer composite index
+(company_id, employee_id, appointment_date, appointment_time) if they are
+missing, then resolves employee_name -> employees.id per company in id-range
+batches so the backfill never holds long locks on a large appointments table.
+Safe to run more than once.
+
+Usage: python migrate_appointments_employee_id.py [--batch-size N]
+"""
+
+import argparse
+import os
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import get_connection
+
+BACKFILL_QUERY = """
+    UPDATE appointments a
+    JOIN employees e ON e.company_id = a.company_id AND e.name = a.employee_name
+    SET a.employee_id = e.id
+    WHERE a.id BETWEEN %s AND %s AND a.employee_id IS NULL
+"""
+
+
+def column_exists(cursor, table, column):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+        (table, column)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def index_exists(cursor, table, index):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s",
+        (table, index)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def foreign_key_exists(cursor, table, column):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.KEY_COLUMN_USAGE "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s "
+        "AND REFERENCED_TABLE_NAME IS NOT NULL",
+        (table, column)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def add_schema(cursor):
+    """Add the employee_id column, foreign key and composite index when missing"""
+    if not column_exists(cursor, "appointments", "employee_id"):
+        cursor.execute("ALTER TABLE appointments ADD COLUMN employee_id INT NULL AFTER id")
+        print("✅ Added appointments.employee_id")
+    if not foreign_key_exists(cursor, "appointments", "employee_id"):
+        cursor.execute(
+            "ALTER TABLE appointments ADD CONSTRAINT fk_appointments_employee "
+            "FOREIGN KEY (employee_id) REFERENCES employees(id) ON DELETE SET NULL"
+        )
+        print("✅ Added foreign key appointments.employee_id -> employees.id")
+    if not index_exists(cursor, "appointments", "idx_company_employee_slot"):
+        cursor.execute(
+            "CREATE INDEX idx_company_employee_slot "
+            "ON appointments (company_id, employee_id, appointment_date, appointment_time)"
+        )
+        print("✅ Added index idx_company_employee_slot")
+
+
+def backfill(connection, cursor, batch_size):
+    """Resolve employee names to ids in id-range batches, committing after each batch"""
+    cursor.execute("SELECT MIN(id), MAX(id) FROM appointments WHERE employee_id IS NULL")
+    low, high = cursor.fetchone()
+    if low is None:
+        print("✅ Every appointment already has an employee_id")
+        return 0
+
+    linked = 0
+    for start in range(low, high + 1, batch_size):
+        cursor.execute(BACKFILL_QUERY, (start, start + batch_size - 1))
+        connection.commit()
+        linked += cursor.rowcount
+        print(f"   ids {start}-{min(start + batch_size - 1, high)}: linked {cursor.rowcount}")
+    return linked
+
+
+def migrate(batch_size):
+    try:
+        connection = get_connection()
+        if not connection:
+            print("❌ Failed to connect to database")
+            return False
+
+        cursor = connection.cursor()
+        add_schema(cursor)
+        connection.commit()
+
+        print(f"🔗 Backfilling employee_id in batches of {batch_size}...")
+        linked = backfill(connection, cursor, batch_size)
+        print(f"✅ Linked {linked} appointments")
+
+        # Appointments for deleted/renamed employees keep their name copy and stay unlinked
+        cursor.execute(
+            "SELECT company_id, employee_name, COUNT(*) FROM appointments "
+            "WHERE employee_id IS NULL GROUP BY company_id, employee_name ORDER BY COUNT(*) DESC"
+        )
+        unresolved = cursor.fetchall()
+        if unresolved:
+            print(f"⚠️  {sum(row[2] for row in unresolved)} appointments could not be linked:")
+            for company_id, employee_name, count in unresolved[:20]:
+                print(f"   company {company_id}: '{employee_name}' ({count})")
+
+        cursor.close()
+        connection.close()
+        return True
+
+    except Exception as e:
+        print(f"❌ Error migrating appointments: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=5000, help="appointment ids per UPDATE")
+    args = parser.parse_args()
+
+    print("Migrating appointments to employee_id...")
+    if migrate(args.batch_size):
+        print("🎉 Appointment migration completed successfully!")
+    else:
+        print("💥 Appointment migration failed!")
+        sys.exit(1)
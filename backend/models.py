@@ -1,6 +1,7 @@
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
+from datetime import time as dt_time
 
 # Superadmin models
 class SuperadminLoginRequest(BaseModel):
@@ -78,6 +79,21 @@ class TokenResponse(BaseModel):
     token_type: str
     user: UserResponse
 
+class TenantUsageResponse(BaseModel):
+    company_id: int
+    name: str
+    email: str
+    max_users: Optional[int] = None
+    users: int
+    employees: int
+    appointments_this_month: int
+    user_utilization: Optional[float] = None
+
+class UsageDashboardResponse(BaseModel):
+    generated_at: datetime
+    month: str
+    companies: List[TenantUsageResponse]
+
 # Health check
 class HealthResponse(BaseModel):
     status: str
@@ -104,11 +120,12 @@ class EmployeeResponse(BaseModel):
 
 # Appointment models
 class AppointmentCreate(BaseModel):
+    employee_id: Optional[int] = None
     employee_name: str
     department: str
     reason: Optional[str] = None
-    appointment_date: str
-    appointment_time: str
+    appointment_date: date
+    appointment_time: dt_time
     visitor_name: str
     visitor_email: EmailStr
     visitor_phone: Optional[str] = None
@@ -116,11 +133,12 @@ class AppointmentCreate(BaseModel):
 
 class AppointmentResponse(BaseModel):
     id: int
+    employee_id: Optional[int] = None
     employee_name: str
     department: str
     reason: Optional[str]
-    appointment_date: str
-    appointment_time: str
+    appointment_date: date
+    appointment_time: dt_time
     visitor_name: str
     visitor_email: str
     visitor_phone: Optional[str]
@@ -130,12 +148,80 @@ class AppointmentResponse(BaseModel):
     status: str
     qr_code_sent: bool
     email_sent: bool
+    checked_in_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
 class AppointmentUpdate(BaseModel):
     status: str
 
+class CheckInRequest(BaseModel):
+    token: str
+
+class CheckInResponse(BaseModel):
+    appointment_id: int
+    visitor_name: str
+    employee_name: str
+    already_checked_in: bool
+    checked_in_at: datetime
+
+class OnSiteVisitor(BaseModel):
+    appointment_id: Optional[int] = None
+    visitor_name: str
+    employee_name: Optional[str] = None
+    checked_in_at: datetime
+
+class OnSiteResponse(BaseModel):
+    count: int
+    visitors: List[OnSiteVisitor]
+
+class AnalyticsBucket(BaseModel):
+    bucket: str
+    bookings: int
+    confirmed: int
+    cancelled: int
+    completed: int
+    rescheduled: int
+    cancellation_rate: float
+
+class AnalyticsResponse(BaseModel):
+    group_by: str
+    date_from: date
+    date_to: date
+    totals: AnalyticsBucket
+    buckets: List[AnalyticsBucket]
+
 class AppointmentListResponse(BaseModel):
     appointments: List[AppointmentResponse]
-    total: int 
\ No newline at end of file
+    total: int
+
+class AvailabilityResponse(BaseModel):
+    employee_id: Optional[int] = None
+    employee_name: str
+    date: date
+    slot_minutes: int
+    free_slots: List[str]
+
+class DepartmentSlot(BaseModel):
+    employee_id: Optional[int] = None
+    employee_name: str
+    department: str
+    slot: str
+
+class DepartmentAvailabilityResponse(BaseModel):
+    department: str
+    date: date
+    slot_minutes: int
+    total: int
+    slots: List[DepartmentSlot]
+
+# Assistant models
+class AssistantTurnRequest(BaseModel):
+    message: str
+    session_id: Optional[str] = None
+
+class AssistantTurnResponse(BaseModel):
+    session_id: str
+    reply: str
+    awaiting_confirmation: bool
+    appointment: Optional[AppointmentResponse] = None
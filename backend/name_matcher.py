@@ -0,0 +1,228 @@
+"""
+In-memory fuzzy/phonetic employee name matching for the appointment assistant.
+
+Names are indexed by character trigrams and by a phonetic key per name token so
+that typos and voice-transcription variants ("Kaaran", "Pria", "Sara Jonson")
+resolve to the right employee without an embedding model or a vector query.
+"""
+
+import csv
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Optional, List, Dict, Any, NamedTuple
+
+# Score needed to accept a match without asking the LLM to disambiguate
+CONFIDENT_SCORE = 0.8
+# Minimum lead the best match needs over the runner-up to count as unambiguous
+CONFIDENT_MARGIN = 0.1
+# Matches scoring below this are discarded
+MIN_SCORE = 0.45
+# A token whose phonetic key equals a name token's scores at least PHONETIC_FLOOR, but only for keys of
+# PHONETIC_MIN_KEY or more characters that also share a trigram with it (short keys like "kn" match ordinary words)
+PHONETIC_FLOOR = 0.85
+PHONETIC_MIN_KEY = 3
+# Seconds before a company's matcher is reloaded from the database
+MATCHER_TTL_SECONDS = 300
+
+DEFAULT_DIRECTORY_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "employees.csv")
+
+_NON_ALPHA = re.compile(r"[^a-z ]+")
+_PHONETIC_RULES = [
+    ("ph", "f"), ("gh", "g"), ("kh", "k"), ("th", "t"), ("dh", "d"), ("bh", "b"),
+    ("sh", "s"), ("ch", "c"), ("ck", "k"), ("q", "k"), ("x", "ks"), ("z", "s"),
+    ("w", "v"), ("j", "g"),
+]
+
+
+class NameMatch(NamedTuple):
+    score: float
+    employee: Dict[str, Any]
+    # The score rests on the phonetic floor rather than on spelling similarity
+    phonetic: bool = False
+
+
+def normalize_name(text: str) -> str:
+    """Lowercase a name and strip everything except letters and single spaces"""
+    return " ".join(_NON_ALPHA.sub(" ", text.lower()).split())
+
+
+def trigrams(text: str) -> set:
+    """Character trigrams of a normalized name, padded at word boundaries"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def phonetic_key(token: str) -> str:
+    """Phonetic key of a single name token (consonant skeleton after folding common spelling variants)"""
+    if not token:
+        return ""
+    word = token
+    for src, dst in _PHONETIC_RULES:
+        word = word.replace(src, dst)
+    # 'c' sounds like 'k' except before front vowels
+    word = re.sub(r"c(?=[eiy])", "s", word)
+    word = word.replace("c", "k")
+    head, tail = word[0], re.sub(r"[aeiouyh]", "", word[1:])
+    key = head if head not in "aeiou" else "a"
+    for ch in tail:
+        if ch != key[-1]:
+            key += ch
+    return key
+
+
+def _dice(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return 2.0 * len(a & b) / (len(a) + len(b))
+
+
+class NameMatcher:
+    """Trigram + phonetic index over one company's employee directory"""
+
+    def __init__(self, employees: List[Dict[str, Any]]):
+        self.employees: List[Dict[str, Any]] = []
+        self._name_grams: List[set] = []
+        self._token_grams: List[List[set]] = []
+        self._token_keys: List[List[str]] = []
+        self._gram_index: Dict[str, set] = defaultdict(set)
+        self._phonetic_index: Dict[str, set] = defaultdict(set)
+
+        for employee in employees:
+            name = normalize_name(employee.get("employee_name") or "")
+            if not name:
+                continue
+            idx = len(self.employees)
+            tokens = name.split()
+            self.employees.append(employee)
+            self._name_grams.append(trigrams(name))
+            self._token_grams.append([trigrams(t) for t in tokens])
+            self._token_keys.append([phonetic_key(t) for t in tokens])
+            for gram in self._name_grams[idx]:
+                self._gram_index[gram].add(idx)
+            for key in self._token_keys[idx]:
+                self._phonetic_index[key].add(idx)
+
+    def __len__(self) -> int:
+        return len(self.employees)
+
+    def find_department(self, text: str) -> Optional[str]:
+        """Department named in free text ("someone in HR"), matched on whole words"""
+        padded = f" {normalize_name(text)} "
+        for department in sorted({e["department"] for e in self.employees}, key=len, reverse=True):
+            if f" {normalize_name(department)} " in padded:
+                return department
+        return None
+
+    def _candidates(self, name: str, tokens: List[str], keys: List[str]) -> set:
+        candidates = set()
+        for gram in trigrams(name):
+            candidates |= self._gram_index.get(gram, set())
+        for key in keys:
+            candidates |= self._phonetic_index.get(key, set())
+        return candidates
+
+    def _score(self, idx: int, name_grams: set, token_grams: List[set], keys: List[str]) -> tuple:
+        """(score, whether it rests on the phonetic floor)"""
+        full = _dice(name_grams, self._name_grams[idx])
+        entry_grams = self._token_grams[idx]
+        entry_keys = self._token_keys[idx]
+        token_total = 0.0
+        phonetic = False
+        for grams, key in zip(token_grams, keys):
+            best = 0.0
+            floored = False
+            for e_grams, e_key in zip(entry_grams, entry_keys):
+                sim = _dice(grams, e_grams)
+                if len(key) >= PHONETIC_MIN_KEY and key == e_key and 0 < sim < PHONETIC_FLOOR:
+                    sim = PHONETIC_FLOOR
+                    if sim > best:
+                        best, floored = sim, True
+                elif sim > best:
+                    best, floored = sim, False
+            token_total += best
+            phonetic = phonetic or floored
+        tokens = token_total / len(token_grams) if token_grams else 0.0
+        # A single query token ("Ravi") should not outrank a full-name hit
+        if len(token_grams) < len(entry_grams):
+            tokens *= 0.95
+        if full >= tokens:
+            return full, False
+        return tokens, phonetic
+
+    def match(self, query: str, limit: int = 3) -> List[NameMatch]:
+        """Return up to `limit` employees ranked by similarity to `query`"""
+        name = normalize_name(query)
+        if not name:
+            return []
+        tokens = name.split()
+        keys = [phonetic_key(t) for t in tokens]
+        token_grams = [trigrams(t) for t in tokens]
+        name_grams = trigrams(name)
+
+        scored = []
+        for idx in self._candidates(name, tokens, keys):
+            score, phonetic = self._score(idx, name_grams, token_grams, keys)
+            if score >= MIN_SCORE:
+                scored.append(NameMatch(round(score, 4), self.employees[idx], phonetic))
+        scored.sort(key=lambda m: (-m.score, m.employee["employee_name"]))
+        return scored[:limit]
+
+    def best(self, query: str) -> Optional[Dict[str, Any]]:
+        """Return the matching employee only if the match is confident and unambiguous"""
+        matches = self.match(query, limit=2)
+        if not matches or matches[0].score < CONFIDENT_SCORE:
+            return None
+        # One word that only sounds like a name ("Can" ~ Khan) is left for the LLM to confirm
+        if matches[0].phonetic and len(normalize_name(query).split()) == 1:
+            return None
+        if len(matches) > 1 and matches[0].score - matches[1].score < CONFIDENT_MARGIN:
+            return None
+        return matches[0].employee
+
+
+def load_directory_csv(path: str = DEFAULT_DIRECTORY_CSV) -> List[Dict[str, Any]]:
+    """Load the sample employee directory (employee_name, department) from CSV"""
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            {"employee_name": row["employee_name"].strip(), "department": row["department"].strip()}
+            for row in csv.DictReader(f)
+            if row.get("employee_name")
+        ]
+
+
+def load_company_directory(company_id: int) -> List[Dict[str, Any]]:
+    """Load a company's active employees from the employees table"""
+    from database import get_employees_by_company
+    return [
+        {"employee_id": e["id"], "employee_name": e["name"], "department": e["department"]}
+        for e in get_employees_by_company(company_id)
+    ]
+
+
+_matchers: Dict[Optional[int], tuple] = {}
+_matchers_lock = threading.Lock()
+
+
+def get_name_matcher(company_id: Optional[int] = None) -> NameMatcher:
+    """Get the cached matcher for a company (None = sample CSV directory)"""
+    now = time.monotonic()
+    cached = _matchers.get(company_id)
+    if cached and (company_id is None or now - cached[1] < MATCHER_TTL_SECONDS):
+        return cached[0]
+    with _matchers_lock:
+        cached = _matchers.get(company_id)
+        if cached and (company_id is None or now - cached[1] < MATCHER_TTL_SECONDS):
+            return cached[0]
+        employees = load_directory_csv() if company_id is None else load_company_directory(company_id)
+        matcher = NameMatcher(employees)
+        _matchers[company_id] = (matcher, now)
+        return matcher
+
+
+def invalidate_name_matcher(company_id: Optional[int] = None) -> None:
+    """Drop a company's cached matcher so the next lookup reloads the directory"""
+    with _matchers_lock:
+        _matchers.pop(company_id, None)
@@ -0,0 +1,162 @@
+"""
+Who is on site: an in-memory occupancy index over the visit event log.
+
+visit_events is append-only (check_in, check_out, badge_printed). Each
+process keeps, per company, the visitors whose latest check-in/check-out
+event is a check-in, so the on-site count is a len() and the roll-call list
+is a dict scan. The index is rebuilt from the last OCCUPANCY_LOOKBACK_HOURS
+of events on startup and then follows the log by event id: every write made
+through this module is followed by a sync, and reads catch up at most every
+OCCUPANCY_SYNC_SECONDS, so events written by other workers show up within
+that interval.
+
+Ids are allocated at insert but become visible at commit, so an event can
+appear after one with a higher id. Each catch-up therefore re-reads the last
+RESCAN_SECONDS of events before the newest one seen and skips the ids it has
+already applied. A visitor's state comes from their highest-id
+check-in/check-out event, so the index matches a replay of the log in id
+order however late an event shows up.
+
+Visitors are identified by their appointment, so every event must carry an
+appointment_id (record() rejects any without one). Events whose appointment
+was deleted afterwards (appointment_id set to NULL) can't be paired with a
+check-out and are skipped.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List
+
+from config import OCCUPANCY_LOOKBACK_HOURS, OCCUPANCY_SYNC_SECONDS
+from database import record_visit_events, get_visit_events_since
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ("check_in", "check_out", "badge_printed")
+# Events fetched per catch-up query
+SYNC_BATCH = 5000
+# Trailing window (by created_at) re-read on every catch-up for events that committed late
+RESCAN_SECONDS = 30
+
+
+class OccupancyIndex:
+    """Per-company visitors currently on site, maintained from visit_events"""
+
+    def __init__(self, lookback_hours: int = OCCUPANCY_LOOKBACK_HOURS, sync_seconds: float = OCCUPANCY_SYNC_SECONDS):
+        self.lookback = timedelta(hours=lookback_hours)
+        self.sync_seconds = sync_seconds
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._on_site: Dict[int, Dict[int, Dict[str, Any]]] = {}
+        # Ids applied within the rescan window, and each visitor's latest check-in/check-out (id, created_at)
+        self._seen: Dict[int, datetime] = {}
+        self._latest: Dict[tuple, tuple] = {}
+        self._newest: Optional[datetime] = None
+        self._since: Optional[datetime] = None
+        self._synced_at = 0.0
+        self.loaded = False
+
+    def rebuild(self) -> bool:
+        """Replay the lookback window of the log into a fresh index"""
+        with self._sync_lock:
+            with self._lock:
+                self._on_site = {}
+                self._seen = {}
+                self._latest = {}
+                self._newest = None
+                self._since = datetime.now() - self.lookback
+            ok = self._catch_up()
+            self.loaded = ok
+        if ok:
+            logger.info("Occupancy index rebuilt: %d visitors on site", sum(len(v) for v in self._on_site.values()))
+        return ok
+
+    def sync(self, force: bool = False) -> None:
+        """Apply events written since the last sync (throttled unless forced)"""
+        if not self.loaded:
+            self.rebuild()
+            return
+        if not force and time.monotonic() - self._synced_at < self.sync_seconds:
+            return
+        with self._sync_lock:
+            self._catch_up()
+
+    def _catch_up(self) -> bool:
+        floor = self._since if self._newest is None else max(self._since, self._newest - timedelta(seconds=RESCAN_SECONDS))
+        after = 0
+        while True:
+            events = get_visit_events_since(after, floor, SYNC_BATCH)
+            if events is None:
+                return False
+            with self._lock:
+                for event in events:
+                    if event["id"] not in self._seen:
+                        self._apply(event)
+            if events:
+                after = events[-1]["id"]
+            if len(events) < SYNC_BATCH:
+                break
+        with self._lock:
+            self._forget_before(floor)
+        self._synced_at = time.monotonic()
+        return True
+
+    def _forget_before(self, floor: datetime) -> None:
+        # Nothing older than the window is re-read, so its ids can't come back
+        self._seen = {i: at for i, at in self._seen.items() if at >= floor}
+        self._latest = {k: v for k, v in self._latest.items() if v[1] >= floor}
+
+    def _apply(self, event: Dict[str, Any]) -> None:
+        self._seen[event["id"]] = event["created_at"]
+        if self._newest is None or event["created_at"] > self._newest:
+            self._newest = event["created_at"]
+        key = event["appointment_id"]
+        if key is None:
+            return
+        if event["event_type"] in ("check_in", "check_out"):
+            latest = self._latest.get((event["company_id"], key))
+            if latest is not None and latest[0] > event["id"]:
+                # A later arrival/departure for this visitor was applied already
+                return
+            self._latest[(event["company_id"], key)] = (event["id"], event["created_at"])
+        visitors = self._on_site.setdefault(event["company_id"], {})
+        if event["event_type"] == "check_in":
+            visitors[key] = {
+                "appointment_id": event["appointment_id"],
+                "visitor_name": event["visitor_name"],
+                "employee_name": event["employee_name"],
+                "checked_in_at": event["created_at"],
+            }
+        elif event["event_type"] == "check_out":
+            visitors.pop(key, None)
+
+    def record(self, events: List[Dict[str, Any]]) -> bool:
+        """Append events to the log and bring the index up to date; ValueError for events without an appointment_id"""
+        if any(not event.get("appointment_id") for event in events):
+            raise ValueError("Visit events must belong to an appointment")
+        if not record_visit_events(events):
+            return False
+        self.sync(force=True)
+        return True
+
+    def is_on_site(self, company_id: int, appointment_id: int) -> bool:
+        self.sync()
+        with self._lock:
+            return appointment_id in self._on_site.get(company_id, {})
+
+    def count(self, company_id: int) -> int:
+        self.sync()
+        with self._lock:
+            return len(self._on_site.get(company_id, {}))
+
+    def visitors(self, company_id: int) -> List[Dict[str, Any]]:
+        """Visitors on site, earliest arrival first"""
+        self.sync()
+        with self._lock:
+            visitors = list(self._on_site.get(company_id, {}).values())
+        return sorted(visitors, key=lambda v: v["checked_in_at"])
+
+
+occupancy_index = OccupancyIndex()
@@ -0,0 +1,152 @@
+"""
+Appointment QR codes: compact signed pass tokens, minimal PNG rendering and a
+per-appointment cache.
+
+The QR used to carry a multi-line text blob (ids, names, company) rendered at
+box_size=10, which needed a large QR version and a big image for every email.
+It now carries a pass token: appointment id, company id, date and start time
+packed into 13 bytes plus a truncated HMAC-SHA256, base32-encoded to 32
+characters. Base32 only uses QR alphanumeric characters, so the token fits a
+version 2 symbol (25x25 modules) that is rendered as a 1-bit image and
+scaled by QR_BOX_SIZE with nearest-neighbour resampling.
+
+Rendered PNGs are cached per appointment together with the token they encode.
+A reschedule changes the token, so a stale entry is never served even if the
+explicit invalidate() call is missed.
+"""
+
+import base64
+import hashlib
+import hmac
+import io
+import logging
+import struct
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Optional, Dict, Any
+
+from availability import to_minutes, date_key
+from config import QR_SIGNING_KEY, JWT_SECRET_KEY, QR_BOX_SIZE, QR_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+TOKEN_VERSION = 1
+# version, appointment id, company id, days since EPOCH, minutes since midnight
+_PAYLOAD = struct.Struct(">BIIHH")
+_MAC_BYTES = 7
+_EPOCH = date(2000, 1, 1)
+QR_BORDER = 4
+QR_MASK_PATTERN = 0
+
+_signing_key = (QR_SIGNING_KEY or hmac.new(JWT_SECRET_KEY.encode(), b"visitor-pass", hashlib.sha256).hexdigest()).encode()
+
+
+def _mac(payload: bytes) -> bytes:
+    return hmac.new(_signing_key, payload, hashlib.sha256).digest()[:_MAC_BYTES]
+
+
+def pass_token(appointment: Dict[str, Any]) -> str:
+    """Signed 32-character token identifying an appointment slot"""
+    day = date.fromisoformat(date_key(appointment["appointment_date"]))
+    payload = _PAYLOAD.pack(
+        TOKEN_VERSION,
+        appointment["id"],
+        appointment["company_id"],
+        (day - _EPOCH).days,
+        to_minutes(appointment["appointment_time"]),
+    )
+    return base64.b32encode(payload + _mac(payload)).decode("ascii")
+
+
+def verify_pass_token(token: str) -> Optional[Dict[str, Any]]:
+    """Decoded token fields, or None if the token is malformed or its signature doesn't match"""
+    try:
+        raw = base64.b32decode(token.strip().upper())
+    except (ValueError, TypeError):
+        return None
+    if len(raw) != _PAYLOAD.size + _MAC_BYTES:
+        return None
+    payload, mac = raw[:_PAYLOAD.size], raw[_PAYLOAD.size:]
+    if not hmac.compare_digest(mac, _mac(payload)):
+        return None
+    version, appointment_id, company_id, days, minutes = _PAYLOAD.unpack(payload)
+    if version != TOKEN_VERSION:
+        return None
+    return {
+        "appointment_id": appointment_id,
+        "company_id": company_id,
+        "appointment_date": date.fromordinal(_EPOCH.toordinal() + days),
+        "appointment_minutes": minutes,
+    }
+
+
+def render_png(data: str, box_size: int = QR_BOX_SIZE) -> bytes:
+    """Smallest QR symbol for the data as a 1-bit PNG"""
+    # qrcode and PIL are imported on first render, so workers that never send or serve a pass don't load them
+    import qrcode
+    import qrcode.constants
+    from PIL import Image
+
+    # Medium error correction costs nothing here: the token fits version 2 at L and M alike.
+    # A fixed mask is valid for any decoder (the mask id is in the format bits) and skips
+    # scoring all eight masks, which is most of qrcode's encode time
+    qr = qrcode.QRCode(
+        version=None, error_correction=qrcode.constants.ERROR_CORRECT_M, border=QR_BORDER, mask_pattern=QR_MASK_PATTERN
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    matrix = qr.get_matrix()
+    size = len(matrix)
+    image = Image.new("1", (size, size), 1)
+    image.putdata([0 if dark else 1 for row in matrix for dark in row])
+    if box_size > 1:
+        image = image.resize((size * box_size, size * box_size), Image.NEAREST)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class QRCache:
+    """LRU of rendered pass PNGs keyed by appointment id (entries remember the token they encode)"""
+
+    def __init__(self, max_entries: int = QR_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def png(self, appointment: Dict[str, Any]) -> bytes:
+        """PNG for an appointment's current pass token, rendered on first use"""
+        token = pass_token(appointment)
+        appointment_id = appointment["id"]
+        with self._lock:
+            entry = self._entries.get(appointment_id)
+            if entry is not None and entry[0] == token:
+                self._entries.move_to_end(appointment_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        png = render_png(token)
+        with self._lock:
+            self._entries[appointment_id] = (token, png)
+            self._entries.move_to_end(appointment_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return png
+
+    def png_base64(self, appointment: Dict[str, Any]) -> str:
+        return base64.b64encode(self.png(appointment)).decode()
+
+    def invalidate(self, appointment_id: int) -> None:
+        with self._lock:
+            self._entries.pop(appointment_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+qr_cache = QRCache()
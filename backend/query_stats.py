@@ -0,0 +1,182 @@
+"""
+Query observability for the data layer.
+
+database.TimedCursor reports every execute/executemany here. Statements are
+reduced to a fingerprint (literals and placeholders replaced by ?, IN lists
+collapsed, whitespace normalized) so per-statement latency can be tracked no
+matter which parameters were bound. Each fingerprint keeps totals plus a
+rolling window of recent latencies for percentiles. Statements slower than
+SLOW_QUERY_MS are logged with their EXPLAIN plan, which is fetched on a
+background thread (at most once per fingerprint per EXPLAIN_INTERVAL_SECONDS)
+so the request that hit the slow query never waits for it.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Callable
+
+from config import SLOW_QUERY_MS, SLOW_QUERY_EXPLAIN, QUERY_STATS_WINDOW
+
+logger = logging.getLogger(__name__)
+
+# Re-run EXPLAIN for the same slow fingerprint at most this often
+EXPLAIN_INTERVAL_SECONDS = 600
+# Slow statements kept for the admin endpoint
+SLOW_LOG_SIZE = 100
+
+_COMMENTS = re.compile(r"/\*.*?\*/|--[^\n]*", re.S)
+_STRINGS = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDERS = re.compile(r"%\(\w+\)s|%s")
+_IN_LISTS = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.I)
+_VALUES_LISTS = re.compile(r"\bVALUES\s*(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*", re.I)
+_WHITESPACE = re.compile(r"\s+")
+_EXPLAINABLE = ("select", "update", "delete", "insert", "replace")
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(sql: str) -> str:
+    """Normalized statement text shared by every execution of the same query shape"""
+    text = _COMMENTS.sub(" ", sql)
+    text = _STRINGS.sub("?", text)
+    text = _PLACEHOLDERS.sub("?", text)
+    text = _NUMBERS.sub("?", text)
+    text = _WHITESPACE.sub(" ", text).strip()
+    text = _IN_LISTS.sub("IN (...)", text)
+    text = _VALUES_LISTS.sub(r"VALUES \1", text)
+    return text
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class FingerprintStats:
+    """Totals plus a rolling window of recent latencies (seconds) for one fingerprint"""
+
+    __slots__ = ("count", "total", "max", "recent", "last_explained", "plan")
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=window)
+        self.last_explained = 0.0
+        self.plan: Optional[List[Dict[str, Any]]] = None
+
+    def summary(self, fingerprint_text: str) -> Dict[str, Any]:
+        recent = sorted(self.recent)
+        return {
+            "fingerprint": fingerprint_text,
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 2),
+            "mean_ms": round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 2),
+            "p50_ms": round(_percentile(recent, 0.50) * 1000, 2),
+            "p95_ms": round(_percentile(recent, 0.95) * 1000, 2),
+            "p99_ms": round(_percentile(recent, 0.99) * 1000, 2),
+            "plan": self.plan,
+        }
+
+
+class QueryStats:
+    """Per-fingerprint latency tracking and the slow query log"""
+
+    SORT_KEYS = ("total_ms", "p95_ms", "p99_ms", "max_ms", "mean_ms", "count")
+
+    def __init__(self, slow_ms: float = SLOW_QUERY_MS, window: int = QUERY_STATS_WINDOW, explain: bool = SLOW_QUERY_EXPLAIN):
+        self.slow_seconds = slow_ms / 1000.0
+        self.window = window
+        self.explain_enabled = explain
+        self._lock = threading.Lock()
+        self._stats: Dict[str, FingerprintStats] = {}
+        self.slow_log = deque(maxlen=SLOW_LOG_SIZE)
+        # (monotonic time, seconds) of the latest executions across all fingerprints, for health checks
+        self._latest = deque(maxlen=window)
+        self._explainer: Optional[Callable[[str, Any], Optional[List[Dict[str, Any]]]]] = None
+        self._explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+
+    def set_explainer(self, explainer: Callable[[str, Any], Optional[List[Dict[str, Any]]]]) -> None:
+        """Register the function that runs EXPLAIN for a statement (provided by database.py)"""
+        self._explainer = explainer
+
+    def observe(self, sql: str, seconds: float, params: Any = None) -> None:
+        """Record one execution; slow ones go to the slow log"""
+        key = fingerprint(sql)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = FingerprintStats(self.window)
+            stats.count += 1
+            stats.total += seconds
+            stats.recent.append(seconds)
+            self._latest.append((time.monotonic(), seconds))
+            if seconds > stats.max:
+                stats.max = seconds
+            if seconds < self.slow_seconds:
+                return
+            now = time.time()
+            self.slow_log.append({"fingerprint": key, "ms": round(seconds * 1000, 2), "at": now})
+            explain = (
+                self.explain_enabled and self._explainer is not None
+                and now - stats.last_explained > EXPLAIN_INTERVAL_SECONDS
+                and key.lower().startswith(_EXPLAINABLE)
+            )
+            if explain:
+                stats.last_explained = now
+
+        if explain:
+            self._explain_executor.submit(self._explain, key, sql, params, seconds)
+        else:
+            logger.warning("Slow query (%.1f ms): %s", seconds * 1000, key)
+
+    def _explain(self, key: str, sql: str, params: Any, seconds: float) -> None:
+        # executemany passes a list of parameter tuples; explain the first one
+        if isinstance(params, list):
+            params = params[0] if params else None
+        try:
+            plan = self._explainer(sql, params)
+        except Exception as e:
+            logger.debug("EXPLAIN failed for %s: %s", key, e)
+            plan = None
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is not None and plan is not None:
+                stats.plan = plan
+        logger.warning("Slow query (%.1f ms): %s | plan: %s", seconds * 1000, key, plan)
+
+    def top(self, limit: int = 10, sort: str = "total_ms") -> List[Dict[str, Any]]:
+        """Slowest fingerprints by the given summary key"""
+        if sort not in self.SORT_KEYS:
+            raise ValueError(f"sort must be one of {', '.join(self.SORT_KEYS)}")
+        with self._lock:
+            summaries = [stats.summary(key) for key, stats in self._stats.items()]
+        summaries.sort(key=lambda s: s[sort], reverse=True)
+        return summaries[:limit]
+
+    def recent_slow(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self.slow_log)[-limit:][::-1]
+
+    def recent_latency(self, horizon_seconds: float = 60) -> Dict[str, Any]:
+        """Count and p95 of all statements executed in the last horizon_seconds"""
+        cutoff = time.monotonic() - horizon_seconds
+        with self._lock:
+            recent = sorted(seconds for at, seconds in self._latest if at >= cutoff)
+        return {"count": len(recent), "p95_ms": round(_percentile(recent, 0.95) * 1000, 2)}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self.slow_log.clear()
+            self._latest.clear()
+
+
+query_stats = QueryStats()
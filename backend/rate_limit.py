@@ -0,0 +1,219 @@
+"""
+Token-bucket rate limiting for the OTP login and public lookup endpoints.
+
+Each limited route group has limits per scope, e.g. RATE_LIMIT_LOGIN =
+"ip:20/60,email:5/300,company:100/60" lets one address request 20 OTPs a
+minute (bursting to 20), one email 5 per 5 minutes and one company's users 100
+a minute. A request is checked against the bucket of every scope it has a key
+for and is let through only if all of them hold a token; only then is a token
+taken from each. A check with consume=False only looks (used to turn a flood
+away before a database lookup that supplies the remaining keys). A check is a
+few dict operations (memory) or one short SQLite transaction, whatever the
+traffic.
+
+Buckets live in process memory (LRU-bounded) or, with RATE_LIMIT_STORE=sqlite,
+in a local SQLite file that every worker process on the host shares, so the
+limits hold for the whole server rather than per worker. A store error lets
+the request through.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, List, Tuple
+
+from config import (
+    RATE_LIMIT_ENABLED, RATE_LIMIT_STORE, RATE_LIMIT_STORE_PATH, RATE_LIMIT_MAX_KEYS,
+    RATE_LIMIT_LOGIN, RATE_LIMIT_VISITOR_LOOKUP,
+)
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ("ip", "email", "company")
+
+# (key, capacity, refill tokens per second)
+Bucket = Tuple[str, float, float]
+
+
+class RateLimitExceeded(Exception):
+    """A bucket for this request is empty; retry_after is seconds until it holds a token again"""
+
+    def __init__(self, scope: str, retry_after: float):
+        super().__init__(f"Rate limit exceeded ({scope})")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+def parse_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    """'ip:20/60,email:5/300' -> {scope: (capacity, tokens per second)}"""
+    limits = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        scope, _, rule = part.partition(":")
+        count, _, seconds = rule.partition("/")
+        if scope not in SCOPES or not count or not seconds:
+            raise ValueError(f"Invalid rate limit '{part}' (expected scope:count/seconds with scope in {', '.join(SCOPES)})")
+        limits[scope] = (float(count), float(count) / float(seconds))
+    return limits
+
+
+def _refill(state: Optional[Tuple[float, float]], capacity: float, rate: float, now: float) -> float:
+    if state is None:
+        return capacity
+    tokens, updated = state
+    return min(capacity, tokens + max(0.0, now - updated) * rate)
+
+
+def _decide(buckets: List[Bucket], states: Dict[str, Tuple[float, float]], now: float) -> Optional[Tuple[int, float]]:
+    """Index and retry-after of the first empty bucket, or None when every bucket has a token"""
+    for index, (key, capacity, rate) in enumerate(buckets):
+        tokens = _refill(states.get(key), capacity, rate, now)
+        if tokens < 1:
+            return index, (1 - tokens) / rate
+    return None
+
+
+class MemoryBucketStore:
+    """Process-local buckets; the least recently used are dropped past max_keys"""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, buckets: List[Bucket], consume: bool = True) -> Optional[Tuple[int, float]]:
+        now = time.monotonic()
+        with self._lock:
+            denied = _decide(buckets, self._buckets, now)
+            if denied is not None or not consume:
+                return denied
+            for key, capacity, rate in buckets:
+                self._buckets[key] = (_refill(self._buckets.get(key), capacity, rate, now) - 1, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return None
+
+
+class SQLiteBucketStore:
+    """Buckets in a local SQLite file shared by every worker process on the host"""
+
+    # Delete idle buckets at most this often (seconds)
+    PURGE_INTERVAL = 60
+
+    def __init__(self, path: str = RATE_LIMIT_STORE_PATH, idle_seconds: float = 3600):
+        self.path = path
+        # A bucket left alone this long has refilled completely, so dropping its row changes nothing
+        self.idle_seconds = idle_seconds
+        self._local = threading.local()
+        self._last_purge = 0.0
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS rate_buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def take(self, buckets: List[Bucket], consume: bool = True) -> Optional[Tuple[int, float]]:
+        conn = self._connection()
+        # Wall clock: the buckets are shared between processes
+        now = time.time()
+        keys = [key for key, _, _ in buckets]
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                f"SELECT key, tokens, updated FROM rate_buckets WHERE key IN ({', '.join('?' * len(keys))})", keys
+            ).fetchall()
+            states = {key: (tokens, updated) for key, tokens, updated in rows}
+            denied = _decide(buckets, states, now)
+            if denied is None and consume:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO rate_buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                    [(key, _refill(states.get(key), capacity, rate, now) - 1, now) for key, capacity, rate in buckets]
+                )
+            if now - self._last_purge > self.PURGE_INTERVAL:
+                self._last_purge = now
+                conn.execute("DELETE FROM rate_buckets WHERE updated < ?", (now - self.idle_seconds,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return denied
+
+
+class RateLimiter:
+    def __init__(self, routes: Dict[str, str], store=None):
+        self.routes = {route: parse_limits(spec) for route, spec in routes.items()}
+        self._store = store
+        self._store_lock = threading.Lock()
+        self._counts_lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+
+    def _get_store(self):
+        # Created on first check, so a pre-fork parent never opens the SQLite file
+        if self._store is None:
+            with self._store_lock:
+                if self._store is None:
+                    if RATE_LIMIT_STORE == "sqlite":
+                        longest = max((c / r for limits in self.routes.values() for c, r in limits.values()), default=0)
+                        self._store = SQLiteBucketStore(idle_seconds=max(60.0, longest))
+                    else:
+                        self._store = MemoryBucketStore()
+        return self._store
+
+    def check(
+        self,
+        route: str,
+        ip: Optional[str] = None,
+        email: Optional[str] = None,
+        company: Optional[int] = None,
+        consume: bool = True
+    ) -> None:
+        """Take a token from each of the route's buckets this request has a key for; raises RateLimitExceeded
+
+        With consume=False the buckets are only checked, nothing is taken.
+        """
+        if not RATE_LIMIT_ENABLED:
+            return
+        keys = {"ip": ip, "email": email.strip().lower() if email else None, "company": company}
+        buckets = [
+            (f"{route}|{scope}|{keys[scope]}", capacity, rate)
+            for scope, (capacity, rate) in self.routes[route].items()
+            if keys[scope] is not None
+        ]
+        if not buckets:
+            return
+        try:
+            denied = self._get_store().take(buckets, consume)
+        except Exception as e:
+            logger.error("Rate limit store error (allowing request): %s", e)
+            return
+        with self._counts_lock:
+            if denied is not None:
+                self.limited += 1
+            elif consume:
+                self.allowed += 1
+        if denied is not None:
+            index, retry_after = denied
+            scope = buckets[index][0].split("|")[1]
+            # INFO so the log sampler thins a flood of rejected requests
+            logger.info("Rate limit exceeded for %s by %s", route, scope)
+            raise RateLimitExceeded(scope, retry_after)
+
+    def stats(self) -> Dict[str, int]:
+        with self._counts_lock:
+            return {"allowed": self.allowed, "limited": self.limited}
+
+
+rate_limiter = RateLimiter({
+    "login": RATE_LIMIT_LOGIN,
+    "visitor_lookup": RATE_LIMIT_VISITOR_LOOKUP,
+})
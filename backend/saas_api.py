@@ -1,9 +1,14 @@
-from fastapi import FastAPI, HTTPException, Depends, status, UploadFile, File
+from fastapi import FastAPI, HTTPException, Depends, Request, status, UploadFile, File, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import List, Optional
+import asyncio
+import contextvars
 import logging
-from datetime import datetime
+import math
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
 
 from models import *
 from database import (
@@ -12,18 +17,40 @@ from database import (
     create_user as db_create_user, get_user_by_email_and_company, get_users_by_company, get_user_by_id, get_user_by_email, get_user_by_email_and_role,
     update_user_otp, verify_user_otp, clear_user_otp,
     create_appointment, get_appointment_by_id, get_appointments_by_company, get_appointments_by_visitor_email,
-    update_appointment_status, mark_appointment_email_sent, mark_appointment_qr_sent,
-    create_employee as db_create_employee, get_employees_by_company, get_employee_by_email_and_company
+    update_appointment_status,
+    get_appointments_by_employee, get_appointment_stats, ROLLUP_GROUPS,
+    create_employee as db_create_employee, get_employees_by_company, get_employee_by_email_and_company,
+    get_employee_by_id_and_company, get_employee_by_name_and_company,
+    SlotConflictError, UserLimitError, pool_stats
 )
 from auth import create_access_token, verify_token, generate_otp, get_otp_expiry, send_otp_email
 from email_service import email_service
+from employee_indexer import refresh_company_index, rebuild_company_index_in_background
+from conversation_store import get_conversation_store, new_session, new_session_id
+from config import ASSISTANT_WORKERS, ASSISTANT_PRELOAD, EMAIL_DRAIN_SECONDS, HEALTH_DEGRADED_STATUS_CODE
+from availability import availability_engine
+from fast_json import list_response
+from compression import CompressionMiddleware, compression_stats
+from instrumentation import TimingMiddleware, metrics
+from query_stats import query_stats
+from qr_codes import qr_cache
+from checkin import checkin_service, CheckInError
+from occupancy import occupancy_index
+from tenant_usage import tenant_usage
+from email_outbox import email_outbox
+from health import health_monitor
+from rate_limit import rate_limiter, RateLimitExceeded
+from logging_setup import configure_logging, RequestIdMiddleware
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging (queue-based, structured; see logging_setup)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Voice Assistant SaaS API", version="1.0.0")
 
+# Served by /ready: not ready until the startup hooks finish, draining once shutdown begins
+server_state = {"ready": False, "draining": False}
+
 # CORS middleware - Allow all localhost origins for development
 app.add_middleware(
     CORSMiddleware,
@@ -44,16 +71,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large JSON payloads (employee directories, appointment histories)
+app.add_middleware(CompressionMiddleware)
+
+# Outermost: per-request timing, Server-Timing header and /metrics totals
+app.add_middleware(TimingMiddleware)
+
+# Request id for log correlation (wraps timing so every log line of a request carries it)
+app.add_middleware(RequestIdMiddleware)
+
 # Security
 security = HTTPBearer()
 
+# Dedicated threads for blocking assistant work so it can't starve the default executor
+assistant_executor = ThreadPoolExecutor(max_workers=ASSISTANT_WORKERS, thread_name_prefix="assistant")
+
 # Dependency to get current user from token
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     token = credentials.credentials
-    logger.info(f"Received token: {token[:20]}...")  # Log first 20 chars of token
-    
     payload = verify_token(token)
-    logger.info(f"Token payload: {payload}")
     
     if payload is None:
         logger.error("Token verification failed")
@@ -63,18 +99,33 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Log all keys in the payload
-    logger.info(f"Token payload keys: {list(payload.keys())}")
-    logger.info(f"Superadmin ID in payload: {payload.get('superadmin_id')}")
-    
     return payload
 
+def enforce_rate_limit(
+    route: str,
+    http_request: Request,
+    email: Optional[str] = None,
+    company_id: Optional[int] = None,
+    consume: bool = True
+) -> None:
+    """Answer 429 (with Retry-After) when the caller is over one of the route's limits (consume=False only checks)"""
+    ip = http_request.client.host if http_request.client else None
+    try:
+        rate_limiter.check(route, ip=ip, email=email, company=company_id, consume=consume)
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, please try again later",
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+
 # Superadmin endpoints
 @app.post("/superadmin/login", response_model=dict)
-async def superadmin_login(request: SuperadminLoginRequest):
+async def superadmin_login(request: SuperadminLoginRequest, http_request: Request):
     """Superadmin login - sends OTP"""
     try:
-        logger.info(f"Superadmin login attempt for email: {request.email}")
+        logger.info("Superadmin login attempt for email: %s", request.email)
+        enforce_rate_limit("login", http_request, email=request.email)
         
         # Check if superadmin exists in database
         superadmin = get_superadmin_by_email(request.email)
@@ -82,15 +133,12 @@ async def superadmin_login(request: SuperadminLoginRequest):
             raise HTTPException(status_code=404, detail="Superadmin not found")
         
         # Generate OTP
-        logger.info("Generating OTP...")
         otp = generate_otp()
         expiry = get_otp_expiry()
-        logger.info(f"OTP generated: {otp}")
         
         # Send OTP via email
-        logger.info("Sending OTP email...")
         success = send_otp_email(request.email, otp, "Voice Assistant SaaS")
-        logger.info(f"OTP email result: {success}")
+        logger.info("OTP email result: %s", success)
         
         if success:
             return {"message": "OTP sent successfully", "email": request.email}
@@ -100,10 +148,7 @@ async def superadmin_login(request: SuperadminLoginRequest):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Superadmin login error: {str(e)}")
-        logger.error(f"Error type: {type(e)}")
-        import traceback
-        logger.error(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Superadmin login error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.post("/superadmin/verify-otp", response_model=dict)
@@ -143,7 +188,7 @@ async def superadmin_verify_otp(request: SuperadminOTPVerifyRequest):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Superadmin OTP verification error: {e}")
+        logger.error("Superadmin OTP verification error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.post("/superadmin/companies", response_model=CompanyResponse)
@@ -153,14 +198,12 @@ async def create_company(
 ):
     """Create a new company (Superadmin only) and auto-create admin user"""
     try:
-        logger.info(f"Create company request - current_user: {current_user}")
         # Check if user is superadmin
         if current_user.get("role") != "superadmin":
-            logger.error(f"Access denied - user role: {current_user.get('role')}")
+            logger.error("Access denied - user role: %s", current_user.get('role'))
             raise HTTPException(status_code=403, detail="Access denied")
         # Get superadmin ID from token
         superadmin_id = current_user.get("superadmin_id")
-        logger.info(f"Superadmin ID from token: {superadmin_id}")
         if not superadmin_id:
             logger.error("No superadmin_id in token")
             raise HTTPException(status_code=400, detail="Invalid superadmin token")
@@ -168,33 +211,30 @@ async def create_company(
         existing_company = get_company_by_email(company.email)
         if existing_company:
             raise HTTPException(status_code=400, detail="Company email already exists")
-        # Create company
+        # Create the company and its admin user together (a user-limit rejection saves neither)
+        admin_email = company.email
         company_id = db_create_company(
             company.name, 
             company.email, 
             company.domain or "", 
-            superadmin_id
+            superadmin_id,
+            admin_email=admin_email,
+            admin_name=company.name + " Admin"
         )
         if not company_id:
             raise HTTPException(status_code=500, detail="Failed to create company")
+        tenant_usage.invalidate()
+        logger.info("Auto-created admin user for company: %s", admin_email)
         new_company = get_company_by_id(company_id)
         if not new_company:
             raise HTTPException(status_code=500, detail="Failed to retrieve created company")
-        # Automatically create admin user for the company
-        from database import get_user_by_email_and_company, create_user
-        admin_email = company.email
-        admin_name = company.name + " Admin"
-        existing_admin = get_user_by_email_and_company(admin_email, company_id)
-        if not existing_admin:
-            create_user(admin_email, admin_name, "admin", company_id)
-            logger.info(f"Auto-created admin user for company: {admin_email}")
-        else:
-            logger.info(f"Admin user already exists for company: {admin_email}")
         return CompanyResponse(**new_company)
+    except UserLimitError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Create company error: {e}")
+        logger.error("Create company error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.get("/superadmin/companies", response_model=List[CompanyResponse])
@@ -206,14 +246,60 @@ async def get_companies(current_user: dict = Depends(get_current_user)):
             raise HTTPException(status_code=403, detail="Access denied")
         
         companies = get_all_companies()
-        return [CompanyResponse(**company) for company in companies]
+        return list_response(companies, CompanyResponse)
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Get companies error: {e}")
+        logger.error("Get companies error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@app.get("/superadmin/usage", response_model=UsageDashboardResponse)
+async def get_tenant_usage_dashboard(refresh: bool = False, current_user: dict = Depends(get_current_user)):
+    """Users vs max_users, employees and this month's appointments for every company (Superadmin only)"""
+    try:
+        if current_user.get("role") != "superadmin":
+            raise HTTPException(status_code=403, detail="Access denied")
+        
+        usage = tenant_usage.get(refresh=refresh)
+        if usage is None:
+            raise HTTPException(status_code=500, detail="Failed to load tenant usage")
+        return usage
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Tenant usage error: %s", e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@app.get("/superadmin/compression-stats")
+async def get_compression_stats(current_user: dict = Depends(get_current_user)):
+    """Response bytes before/after compression per endpoint since startup (Superadmin only)"""
+    if current_user.get("role") != "superadmin":
+        raise HTTPException(status_code=403, detail="Access denied")
+    return compression_stats.snapshot()
+
+@app.get("/superadmin/slow-queries")
+async def get_slow_queries(
+    limit: int = 10,
+    sort: str = "total_ms",
+    current_user: dict = Depends(get_current_user)
+):
+    """Top-N query fingerprints by latency plus the most recent slow statements (Superadmin only)"""
+    if current_user.get("role") != "superadmin":
+        raise HTTPException(status_code=403, detail="Access denied")
+    if limit < 1 or limit > 100:
+        raise HTTPException(status_code=400, detail="limit must be 1-100")
+    try:
+        top = query_stats.top(limit, sort)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "slow_threshold_ms": query_stats.slow_seconds * 1000,
+        "top": top,
+        "recent_slow": query_stats.recent_slow(limit),
+    }
+
 @app.post("/superadmin/companies/{company_id}/admin", response_model=UserResponse)
 async def create_company_admin(company_id: int, user: UserCreate, current_user: dict = Depends(get_current_user)):
     """Superadmin creates an admin user for a company"""
@@ -227,16 +313,22 @@ async def create_company_admin(company_id: int, user: UserCreate, current_user:
     if existing_admin:
         raise HTTPException(status_code=400, detail="Admin with this email already exists in this company")
     # Create admin user
-    user_id = db_create_user(user.email, user.name, "admin", company_id)
+    try:
+        user_id = db_create_user(user.email, user.name, "admin", company_id)
+    except UserLimitError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    tenant_usage.invalidate()
     new_user = get_user_by_email_and_company(user.email, company_id)
     return UserResponse(**new_user)
 
 # Admin endpoints
 @app.post("/admin/login", response_model=dict)
-async def admin_login(request: AdminLoginRequest):
+async def admin_login(request: AdminLoginRequest, http_request: Request):
     """Admin login - sends OTP (email + role)"""
     try:
-        logger.info(f"🔍 Admin login request for email: {request.email}, role: {request.role}")
+        logger.info("Admin login request for email: %s, role: %s", request.email, request.role)
+        # Turn a flood away before the lookup; the tokens are taken below, once the company is known
+        enforce_rate_limit("login", http_request, email=request.email, consume=False)
         
         # Validate role
         if request.role not in ['admin', 'user']:
@@ -244,7 +336,8 @@ async def admin_login(request: AdminLoginRequest):
         
         # Look up user by email and role
         user = get_user_by_email_and_role(request.email, request.role)
-        logger.info(f"📋 User found: {user}")
+        # One all-or-nothing take across the ip, email and company buckets (unknown emails still count)
+        enforce_rate_limit("login", http_request, email=request.email, company_id=user["company_id"] if user else None)
         
         if not user:
             raise HTTPException(status_code=404, detail=f"User not found with email {request.email} and role {request.role}")
@@ -262,21 +355,21 @@ async def admin_login(request: AdminLoginRequest):
         company = get_company_by_id(user["company_id"])
         success = send_otp_email(request.email, otp, company["name"] if company else "Your Company")
         if success:
-            logger.info(f"✅ OTP sent successfully for {request.email} with role {request.role}")
+            logger.info("OTP sent successfully for %s with role %s", request.email, request.role)
             return {"message": "OTP sent successfully", "email": request.email, "role": request.role}
         else:
             raise HTTPException(status_code=500, detail="Failed to send OTP")
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Admin login error: {e}")
+        logger.error("Admin login error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.post("/admin/verify-otp", response_model=TokenResponse)
 async def admin_verify_otp(request: AdminOTPVerifyRequest):
     """Admin OTP verification (email + otp + role)"""
     try:
-        logger.info(f"🔍 Admin verify OTP called for email: {request.email}, role: {request.role}")
+        logger.info("Admin verify OTP called for email: %s, role: %s", request.email, request.role)
         
         # Validate role
         if request.role not in ['admin', 'user']:
@@ -284,7 +377,6 @@ async def admin_verify_otp(request: AdminOTPVerifyRequest):
         
         # Look up user by email and role
         user = get_user_by_email_and_role(request.email, request.role)
-        logger.info(f"📋 User found: {user}")
         
         if not user or user["role"] != "admin":
             raise HTTPException(status_code=404, detail=f"Admin user not found with email {request.email} and role {request.role}")
@@ -303,7 +395,6 @@ async def admin_verify_otp(request: AdminOTPVerifyRequest):
             "role": user["role"],
             "company_id": user["company_id"]
         }
-        logger.info(f"🔐 Token data: {token_data}")
         access_token = create_access_token(token_data)
         
         response = TokenResponse(
@@ -312,13 +403,13 @@ async def admin_verify_otp(request: AdminOTPVerifyRequest):
             user=UserResponse(**user)
         )
         
-        logger.info(f"✅ Admin verify OTP response: user role = {response.user.role}")
+        logger.info("Admin verify OTP response: user role = %s", response.user.role)
         return response
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Admin OTP verification error: {e}")
+        logger.error("Admin OTP verification error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.post("/admin/users", response_model=UserResponse)
@@ -340,12 +431,15 @@ async def create_user(
             raise HTTPException(status_code=400, detail="User already exists in company")
         # Create user
         user_id = db_create_user(user.email, user.name, user.role, company_id)
+        tenant_usage.invalidate()
         new_user = get_user_by_email_and_company(user.email, company_id)
         return UserResponse(**new_user)
+    except UserLimitError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Create user error: {e}")
+        logger.error("Create user error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.get("/admin/users", response_model=List[UserResponse])
@@ -359,18 +453,19 @@ async def get_users(current_user: dict = Depends(get_current_user)):
         company_id = current_user.get("company_id")
         users = get_users_by_company(company_id)
         
-        return [UserResponse(**user) for user in users]
+        return list_response(users, UserResponse)
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Get users error: {e}")
+        logger.error("Get users error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 # Employee endpoints (Admin only)
 @app.post("/admin/employees", response_model=EmployeeResponse)
 async def create_employee(
     employee: EmployeeCreate,
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user)
 ):
     """Create a new employee (Admin only)"""
@@ -404,12 +499,15 @@ async def create_employee(
         if not new_employee:
             raise HTTPException(status_code=500, detail="Failed to retrieve created employee")
         
+        # Keep the assistant's name matcher and vector index in sync
+        background_tasks.add_task(refresh_company_index, company_id)
+        
         return EmployeeResponse(**new_employee)
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Create employee error: {e}")
+        logger.error("Create employee error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.get("/admin/employees", response_model=List[EmployeeResponse])
@@ -423,16 +521,17 @@ async def get_employees(current_user: dict = Depends(get_current_user)):
         company_id = current_user.get("company_id")
         employees = get_employees_by_company(company_id)
         
-        return [EmployeeResponse(**employee) for employee in employees]
+        return list_response(employees, EmployeeResponse)
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Get employees error: {e}")
+        logger.error("Get employees error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.post("/admin/employees/upload-csv")
 async def upload_employees_csv(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     current_user: dict = Depends(get_current_user)
 ):
@@ -493,6 +592,9 @@ async def upload_employees_csv(
             except Exception as e:
                 errors.append(f"Row {row_num}: {str(e)}")
         
+        if created_count:
+            background_tasks.add_task(refresh_company_index, company_id)
+        
         return {
             "message": f"CSV upload completed. {created_count} employees created.",
             "created_count": created_count,
@@ -502,15 +604,27 @@ async def upload_employees_csv(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"CSV upload error: {e}")
+        logger.error("CSV upload error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@app.post("/admin/employees/reindex")
+async def reindex_employees(current_user: dict = Depends(get_current_user)):
+    """Rebuild the company's employee search index in the background (Admin only)"""
+    if current_user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    company_id = current_user.get("company_id")
+    rebuild_company_index_in_background(company_id)
+    return {"message": "Employee index rebuild started", "company_id": company_id}
+
 # User endpoints
 @app.post("/user/login", response_model=dict)
-async def user_login(request: LoginRequest):
+async def user_login(request: LoginRequest, http_request: Request):
     """User login - sends OTP (email + role)"""
     try:
-        logger.info(f"🔍 User login request for email: {request.email}, role: {request.role}")
+        logger.info("User login request for email: %s, role: %s", request.email, request.role)
+        # Turn a flood away before the lookup; the tokens are taken below, once the company is known
+        enforce_rate_limit("login", http_request, email=request.email, consume=False)
         
         # Validate role
         if request.role not in ['admin', 'user']:
@@ -518,7 +632,8 @@ async def user_login(request: LoginRequest):
         
         # Look up user by email and role
         user = get_user_by_email_and_role(request.email, request.role)
-        logger.info(f"📋 User found: {user}")
+        # One all-or-nothing take across the ip, email and company buckets (unknown emails still count)
+        enforce_rate_limit("login", http_request, email=request.email, company_id=user["company_id"] if user else None)
         
         if not user:
             raise HTTPException(status_code=404, detail=f"User not found with email {request.email} and role {request.role}")
@@ -534,21 +649,21 @@ async def user_login(request: LoginRequest):
         company = get_company_by_id(user["company_id"])
         success = send_otp_email(request.email, otp, company["name"] if company else "Your Company")
         if success:
-            logger.info(f"✅ OTP sent successfully for {request.email} with role {request.role}")
+            logger.info("OTP sent successfully for %s with role %s", request.email, request.role)
             return {"message": "OTP sent successfully", "email": request.email, "role": request.role}
         else:
             raise HTTPException(status_code=500, detail="Failed to send OTP")
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"User login error: {e}")
+        logger.error("User login error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.post("/user/verify-otp", response_model=TokenResponse)
 async def user_verify_otp(request: OTPVerifyRequest):
     """User OTP verification (email + otp + role)"""
     try:
-        logger.info(f"🔍 User verify OTP called for email: {request.email}, role: {request.role}")
+        logger.info("User verify OTP called for email: %s, role: %s", request.email, request.role)
         
         # Validate role
         if request.role not in ['admin', 'user']:
@@ -556,14 +671,12 @@ async def user_verify_otp(request: OTPVerifyRequest):
         
         # Look up user by email and role
         user = get_user_by_email_and_role(request.email, request.role)
-        logger.info(f"📋 User found: {user}")
         
         if not user:
             raise HTTPException(status_code=404, detail=f"User not found with email {request.email} and role {request.role}")
         if not user["is_active"]:
             raise HTTPException(status_code=403, detail="User account is deactivated")
         
-        logger.info(f"🎯 User role from database: {user['role']}")
         
         # Verify OTP
         if not user["otp"] or user["otp"] != request.otp:
@@ -583,7 +696,6 @@ async def user_verify_otp(request: OTPVerifyRequest):
             "role": user["role"],
             "company_id": user["company_id"]
         }
-        logger.info(f"🔐 Token data: {token_data}")
         access_token = create_access_token(token_data)
         
         response = TokenResponse(
@@ -592,13 +704,13 @@ async def user_verify_otp(request: OTPVerifyRequest):
             user=UserResponse(**user)
         )
         
-        logger.info(f"✅ User verify OTP response: user role = {response.user.role}")
+        logger.info("User verify OTP response: user role = %s", response.user.role)
         return response
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"User OTP verification error: {e}")
+        logger.error("User OTP verification error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.get("/user/profile", response_model=UserResponse)
@@ -618,32 +730,29 @@ async def get_user_profile(current_user: dict = Depends(get_current_user)):
         )
         
     except Exception as e:
-        logger.error(f"Get user profile error: {e}")
+        logger.error("Get user profile error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 # Appointment endpoints
-@app.post("/appointments", response_model=AppointmentResponse)
-async def create_appointment_endpoint(
-    appointment: AppointmentCreate,
-    current_user: dict = Depends(get_current_user)
-):
-    """Create a new appointment"""
+def book_appointment(appointment: AppointmentCreate, company_id: int) -> AppointmentResponse:
+    """Create an appointment for a company, send the confirmation email and return the response model"""
+    # Resolve the employee so the appointment is linked by id rather than by a free-text name
+    if appointment.employee_id is not None:
+        employee = get_employee_by_id_and_company(appointment.employee_id, company_id)
+        if not employee:
+            raise HTTPException(status_code=404, detail="Employee not found")
+    else:
+        employee = get_employee_by_name_and_company(appointment.employee_name, company_id)
+    employee_id = employee["id"] if employee else None
+    employee_name = employee["name"] if employee else appointment.employee_name
+    department = employee["department"] if employee else appointment.department
+    
+    # Create appointment in database (the slot check and insert run in one transaction)
     try:
-        logger.info(f"🔍 Creating appointment for user: {current_user.get('email')}")
-        logger.info(f"📋 Appointment data: {appointment.dict()}")
-        
-        company_id = current_user.get("company_id")
-        if not company_id:
-            logger.error(f"❌ No company_id found in token for user: {current_user}")
-            raise HTTPException(status_code=400, detail="Company ID not found in token")
-        
-        logger.info(f"🏢 Using company_id: {company_id}")
-        
-        # Create appointment in database
-        logger.info("💾 Creating appointment in database...")
-        appointment_id = create_appointment(
-            employee_name=appointment.employee_name,
-            department=appointment.department,
+        appointment_id = availability_engine.book(
+            employee_id=employee_id,
+            employee_name=employee_name,
+            department=department,
             reason=appointment.reason or "",
             appointment_date=appointment.appointment_date,
             appointment_time=appointment.appointment_time,
@@ -653,58 +762,57 @@ async def create_appointment_endpoint(
             company_id=company_id,
             booking_method=appointment.booking_method
         )
+    except SlotConflictError as e:
+        free_slots = availability_engine.free_slots(company_id, employee_name, appointment.appointment_date, employee_id)
+        raise HTTPException(status_code=409, detail={"message": str(e), "free_slots": free_slots})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not appointment_id:
+        logger.error("Database create_appointment returned None")
+        raise HTTPException(status_code=500, detail="Failed to create appointment")
+    
+    logger.info("Appointment created with ID: %s", appointment_id)
+    
+    # Get the created appointment
+    appointment_data = get_appointment_by_id(appointment_id)
+    if not appointment_data:
+        logger.error("Failed to retrieve appointment with ID: %s", appointment_id)
+        raise HTTPException(status_code=500, detail="Failed to retrieve created appointment")
+    
+    
+    # Confirmation email with QR code goes out from the outbox threads, not this request
+    email_outbox.enqueue(appointment_data)
+    
+    # Convert to response model
+    try:
+        response_data = AppointmentResponse(**appointment_data)
+        return response_data
+    except Exception as e:
+        logger.error("Error creating AppointmentResponse: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error processing appointment data: {str(e)}")
+
+@app.post("/appointments", response_model=AppointmentResponse)
+async def create_appointment_endpoint(
+    appointment: AppointmentCreate,
+    current_user: dict = Depends(get_current_user)
+):
+    """Create a new appointment"""
+    try:
+        logger.info("Creating appointment for user: %s", current_user.get('email'))
         
-        if not appointment_id:
-            logger.error("❌ Database create_appointment returned None")
-            raise HTTPException(status_code=500, detail="Failed to create appointment")
-        
-        logger.info(f"✅ Appointment created with ID: {appointment_id}")
-        
-        # Get the created appointment
-        logger.info("📥 Retrieving created appointment...")
-        appointment_data = get_appointment_by_id(appointment_id)
-        if not appointment_data:
-            logger.error(f"❌ Failed to retrieve appointment with ID: {appointment_id}")
-            raise HTTPException(status_code=500, detail="Failed to retrieve created appointment")
-        
-        logger.info(f"✅ Appointment retrieved: {appointment_data}")
+        company_id = current_user.get("company_id")
+        if not company_id:
+            logger.error("No company_id found in token")
+            raise HTTPException(status_code=400, detail="Company ID not found in token")
         
-        # Send confirmation email with QR code
-        try:
-            logger.info("📧 Sending confirmation email...")
-            email_sent = email_service.send_appointment_confirmation(appointment_data)
-            if email_sent:
-                mark_appointment_email_sent(appointment_id)
-                mark_appointment_qr_sent(appointment_id)
-                logger.info(f"✅ Appointment confirmation email sent for appointment {appointment_id}")
-            else:
-                logger.warning(f"⚠️ Failed to send appointment confirmation email for appointment {appointment_id}")
-        except Exception as e:
-            logger.error(f"❌ Error sending appointment confirmation email: {e}")
         
-        # Convert to response model
-        logger.info("🔄 Converting to AppointmentResponse...")
-        try:
-            # Convert date and time fields to string if needed
-            if "appointment_date" in appointment_data and not isinstance(appointment_data["appointment_date"], str):
-                appointment_data["appointment_date"] = str(appointment_data["appointment_date"])
-            if "appointment_time" in appointment_data and not isinstance(appointment_data["appointment_time"], str):
-                appointment_data["appointment_time"] = str(appointment_data["appointment_time"])
-            
-            response_data = AppointmentResponse(**appointment_data)
-            logger.info(f"✅ AppointmentResponse created successfully")
-            return response_data
-        except Exception as e:
-            logger.error(f"❌ Error creating AppointmentResponse: {e}")
-            logger.error(f"📋 Appointment data: {appointment_data}")
-            raise HTTPException(status_code=500, detail=f"Error processing appointment data: {str(e)}")
+        return book_appointment(appointment, company_id)
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ Create appointment error: {e}")
-        import traceback
-        logger.error(f"📋 Full traceback: {traceback.format_exc()}")
+        logger.exception("Create appointment error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.get("/appointments", response_model=List[AppointmentResponse])
@@ -715,36 +823,73 @@ async def get_appointments(current_user: dict = Depends(get_current_user)):
         if not company_id:
             raise HTTPException(status_code=400, detail="Company ID not found in token")
         
-        logger.info(f"Fetching appointments for company_id: {company_id}")
         appointments = get_appointments_by_company(company_id)
-        logger.info(f"Found {len(appointments)} appointments")
-        
-        # Convert to AppointmentResponse models with detailed error handling
-        response_appointments = []
-        for i, appointment in enumerate(appointments):
-            try:
-                # Convert date and time fields to string if needed
-                if "appointment_date" in appointment and not isinstance(appointment["appointment_date"], str):
-                    appointment["appointment_date"] = str(appointment["appointment_date"])
-                if "appointment_time" in appointment and not isinstance(appointment["appointment_time"], str):
-                    appointment["appointment_time"] = str(appointment["appointment_time"])
-                response_appointment = AppointmentResponse(**appointment)
-                response_appointments.append(response_appointment)
-            except Exception as e:
-                logger.error(f"Error converting appointment {i} to response model: {e}")
-                logger.error(f"Appointment data: {appointment}")
-                raise HTTPException(status_code=500, detail=f"Error processing appointment data: {str(e)}")
+        logger.info("Found %s appointments", len(appointments))
         
-        return response_appointments
+        # Rows already carry typed date/time values
+        return list_response(appointments, AppointmentResponse)
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Get appointments error: {e}")
-        import traceback
-        logger.error(f"Full traceback: {traceback.format_exc()}")
+        logger.exception("Get appointments error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@app.get("/appointments/availability", response_model=AvailabilityResponse)
+async def get_employee_availability(
+    date: date,
+    employee_name: Optional[str] = None,
+    employee_id: Optional[int] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Free appointment slots for an employee (by id, or by name for free-text bookings) on a date"""
+    company_id = current_user.get("company_id")
+    if not company_id:
+        raise HTTPException(status_code=400, detail="Company ID not found in token")
+    
+    if employee_id is not None:
+        employee = get_employee_by_id_and_company(employee_id, company_id)
+        if not employee:
+            raise HTTPException(status_code=404, detail="Employee not found")
+        employee_name = employee["name"]
+    elif employee_name:
+        employee = get_employee_by_name_and_company(employee_name, company_id)
+        employee_id = employee["id"] if employee else None
+    else:
+        raise HTTPException(status_code=400, detail="employee_id or employee_name is required")
+    
+    return AvailabilityResponse(
+        employee_id=employee_id,
+        employee_name=employee_name,
+        date=date,
+        slot_minutes=availability_engine.slot_minutes,
+        free_slots=availability_engine.free_slots(company_id, employee_name, date, employee_id)
+    )
+
+@app.get("/appointments/availability/department", response_model=DepartmentAvailabilityResponse)
+async def get_department_availability(
+    department: str,
+    date: date,
+    limit: int = 10,
+    offset: int = 0,
+    current_user: dict = Depends(get_current_user)
+):
+    """Earliest free slots across every active employee of a department"""
+    company_id = current_user.get("company_id")
+    if not company_id:
+        raise HTTPException(status_code=400, detail="Company ID not found in token")
+    if limit < 1 or limit > 100 or offset < 0:
+        raise HTTPException(status_code=400, detail="limit must be 1-100 and offset non-negative")
+    
+    result = availability_engine.department_free_slots(company_id, department, date, limit=limit, offset=offset)
+    return DepartmentAvailabilityResponse(
+        department=department,
+        date=date,
+        slot_minutes=availability_engine.slot_minutes,
+        total=result["total"],
+        slots=result["slots"]
+    )
+
 @app.get("/appointments/{appointment_id}", response_model=AppointmentResponse)
 async def get_appointment(
     appointment_id: int,
@@ -769,7 +914,37 @@ async def get_appointment(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Get appointment error: {e}")
+        logger.error("Get appointment error: %s", e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@app.get("/appointments/{appointment_id}/qr")
+async def get_appointment_qr(
+    appointment_id: int,
+    current_user: dict = Depends(get_current_user)
+):
+    """QR pass for an appointment as a PNG (for resending or printing)"""
+    try:
+        company_id = current_user.get("company_id")
+        if not company_id:
+            raise HTTPException(status_code=400, detail="Company ID not found in token")
+        
+        appointment = get_appointment_by_id(appointment_id)
+        if not appointment:
+            raise HTTPException(status_code=404, detail="Appointment not found")
+        
+        if appointment["company_id"] != company_id:
+            raise HTTPException(status_code=403, detail="Access denied")
+        
+        return Response(
+            content=qr_cache.png(appointment),
+            media_type="image/png",
+            headers={"Cache-Control": "private, max-age=300"}
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Get appointment QR error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.put("/appointments/{appointment_id}/status", response_model=AppointmentResponse)
@@ -796,6 +971,9 @@ async def update_appointment_status_endpoint(
         success = update_appointment_status(appointment_id, status_update.status)
         if not success:
             raise HTTPException(status_code=500, detail="Failed to update appointment status")
+        availability_engine.invalidate(company_id, appointment["appointment_date"])
+        qr_cache.invalidate(appointment_id)
+        checkin_service.forget(appointment_id)
         
         # Get updated appointment
         updated_appointment = get_appointment_by_id(appointment_id)
@@ -804,18 +982,148 @@ async def update_appointment_status_endpoint(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Update appointment status error: {e}")
+        logger.error("Update appointment status error: %s", e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@app.post("/checkin", response_model=CheckInResponse)
+def check_in_visitor(request: CheckInRequest, current_user: dict = Depends(get_current_user)):
+    """Check a visitor in from the pass token in their QR code (front desk)"""
+    # Plain def: the scan waits for its batch to be written, so it runs in the threadpool
+    try:
+        company_id = current_user.get("company_id")
+        if not company_id:
+            raise HTTPException(status_code=400, detail="Company ID not found in token")
+        
+        return CheckInResponse(**checkin_service.check_in(request.token, company_id))
+        
+    except CheckInError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Check-in error: %s", e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+def record_visit_event(appointment_id: int, event_type: str, current_user: dict) -> dict:
+    """Append a check-out/badge event for one of the company's appointments"""
+    company_id = current_user.get("company_id")
+    if not company_id:
+        raise HTTPException(status_code=400, detail="Company ID not found in token")
+    
+    appointment = get_appointment_by_id(appointment_id)
+    if not appointment:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+    if appointment["company_id"] != company_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+    if not occupancy_index.is_on_site(company_id, appointment_id):
+        raise HTTPException(status_code=409, detail="Visitor is not checked in")
+    
+    recorded = occupancy_index.record([{
+        "company_id": company_id,
+        "appointment_id": appointment_id,
+        "event_type": event_type,
+        "visitor_name": appointment["visitor_name"],
+        "employee_name": appointment["employee_name"],
+    }])
+    if not recorded:
+        raise HTTPException(status_code=500, detail="Failed to record visit event")
+    return {"message": "Visit event recorded", "appointment_id": appointment_id, "event_type": event_type}
+
+@app.post("/visits/{appointment_id}/check-out")
+def check_out_visitor(appointment_id: int, current_user: dict = Depends(get_current_user)):
+    """Record that a checked-in visitor has left the building"""
+    try:
+        return record_visit_event(appointment_id, "check_out", current_user)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Check-out error: %s", e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@app.post("/visits/{appointment_id}/badge-printed")
+def badge_printed(appointment_id: int, current_user: dict = Depends(get_current_user)):
+    """Record that a visitor badge was printed for a checked-in visitor"""
+    try:
+        return record_visit_event(appointment_id, "badge_printed", current_user)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Badge event error: %s", e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@app.get("/visits/on-site", response_model=OnSiteResponse)
+def get_on_site_visitors(current_user: dict = Depends(get_current_user)):
+    """Visitors currently in the building (fire-safety roll call)"""
+    try:
+        company_id = current_user.get("company_id")
+        if not company_id:
+            raise HTTPException(status_code=400, detail="Company ID not found in token")
+        
+        visitors = occupancy_index.visitors(company_id)
+        return OnSiteResponse(count=len(visitors), visitors=[OnSiteVisitor(**v) for v in visitors])
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("On-site visitors error: %s", e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+def analytics_bucket(bucket: str, row: dict) -> AnalyticsBucket:
+    counts = {status: int(row.get(status) or 0) for status in ("bookings", "confirmed", "cancelled", "completed", "rescheduled")}
+    rate = counts["cancelled"] / counts["bookings"] if counts["bookings"] else 0.0
+    return AnalyticsBucket(bucket=bucket, cancellation_rate=round(rate, 4), **counts)
+
+@app.get("/analytics/appointments", response_model=AnalyticsResponse)
+async def get_appointment_analytics(
+    group_by: str = "day",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Bookings and status counts per day, department or booking method (Admin only, from the daily rollups)"""
+    try:
+        if current_user.get("role") != "admin":
+            raise HTTPException(status_code=403, detail="Access denied")
+        if group_by not in ROLLUP_GROUPS:
+            raise HTTPException(status_code=400, detail=f"group_by must be one of {', '.join(ROLLUP_GROUPS)}")
+        
+        date_to = date_to or date.today()
+        date_from = date_from or date_to - timedelta(days=29)
+        if date_from > date_to:
+            raise HTTPException(status_code=400, detail="date_from must not be after date_to")
+        
+        rows = get_appointment_stats(current_user.get("company_id"), date_from.isoformat(), date_to.isoformat(), group_by)
+        buckets = [analytics_bucket(str(row["bucket"]), row) for row in rows]
+        totals = {
+            key: sum(getattr(b, key) for b in buckets)
+            for key in ("bookings", "confirmed", "cancelled", "completed", "rescheduled")
+        }
+        return AnalyticsResponse(
+            group_by=group_by,
+            date_from=date_from,
+            date_to=date_to,
+            totals=analytics_bucket("total", totals),
+            buckets=buckets
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Appointment analytics error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.get("/appointments/visitor/{visitor_email}", response_model=List[AppointmentResponse])
-async def get_visitor_appointments(visitor_email: str):
-    """Get appointments for a visitor by email (public endpoint)"""
+async def get_visitor_appointments(visitor_email: str, http_request: Request):
+    """Get appointments for a visitor by email (public endpoint, rate limited per address and email)"""
     try:
+        enforce_rate_limit("visitor_lookup", http_request, email=visitor_email)
         appointments = get_appointments_by_visitor_email(visitor_email)
         return [AppointmentResponse(**appointment) for appointment in appointments]
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Get visitor appointments error: {e}")
+        logger.error("Get visitor appointments error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 # Employee endpoints for users (authenticated but not admin-only)
@@ -830,18 +1138,213 @@ async def get_company_employees(current_user: dict = Depends(get_current_user)):
         # Get employees for the user's company
         employees = get_employees_by_company(company_id)
         
-        return [EmployeeResponse(**employee) for employee in employees]
+        return list_response(employees, EmployeeResponse)
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Get company employees error: {e}")
+        logger.error("Get company employees error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
-# Health check
+@app.get("/employees/{employee_id}/appointments", response_model=List[AppointmentResponse])
+async def get_employee_appointments(
+    employee_id: int,
+    date_from: Optional[date] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get an employee's appointments, optionally from a date onwards"""
+    try:
+        company_id = current_user.get("company_id")
+        if not company_id:
+            raise HTTPException(status_code=400, detail="Company ID not found in token")
+        
+        if not get_employee_by_id_and_company(employee_id, company_id):
+            raise HTTPException(status_code=404, detail="Employee not found")
+        
+        appointments = get_appointments_by_employee(company_id, employee_id, date_from.isoformat() if date_from else None)
+        if appointments is None:
+            raise HTTPException(status_code=500, detail="Failed to load appointments")
+        return appointments
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Get employee appointments error: %s", e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+# Assistant endpoints
+def book_assistant_appointment(booking: dict, company_id: int) -> AppointmentResponse:
+    """Book the assistant's confirmed state through the regular appointment path"""
+    from assistant_core import parse_appointment_time
+    
+    appointment_time = parse_appointment_time(booking.get("appointment_time"))
+    if not appointment_time:
+        raise HTTPException(status_code=400, detail="Could not understand the appointment time")
+    
+    appointment = AppointmentCreate(
+        employee_id=booking.get("employee_id"),
+        employee_name=booking["employee_name"],
+        department=booking["department"],
+        reason=booking.get("reason"),
+        appointment_date=booking["appointment_date"],
+        appointment_time=appointment_time,
+        visitor_name=booking["visitor_name"],
+        visitor_email=booking["email"],
+        visitor_phone=booking.get("phone"),
+        booking_method="voice"
+    )
+    return book_appointment(appointment, company_id)
+
+def run_assistant_turn(request: AssistantTurnRequest, company_id: int, owner: str) -> AssistantTurnResponse:
+    """Run one assistant turn against the shared conversation store (blocking; runs on assistant_executor)"""
+    from assistant_core import run_assistant, is_confirmation_reply
+    
+    store = get_conversation_store()
+    session_id = request.session_id
+    session = store.get(session_id) if session_id else None
+    if not session or session.get("owner") != owner:
+        session_id, session = new_session_id(), new_session(owner)
+    
+    if is_confirmation_reply(session["messages"], request.message):
+        session["confirmed"] = True
+    session["messages"].append({"role": "user", "content": request.message})
+    
+    reply, session["state"], booking, ask_confirm = run_assistant(
+        session["messages"], session["state"], session["confirmed"], company_id=company_id
+    )
+    
+    appointment = None
+    if booking:
+        try:
+            appointment = book_assistant_appointment(booking, company_id)
+            reply = f"Appointment booked successfully! Your appointment ID is {appointment.id}."
+        except HTTPException as e:
+            # Keep what the visitor told us and ask again for the time
+            session["state"] = dict(booking, appointment_time=None)
+            if e.status_code == 409:
+                free = ", ".join(e.detail["free_slots"][:6]) or "none today"
+                reply = f"Sorry, {booking['employee_name']} is already booked at that time. Free slots: {free}. Which time works for you?"
+            else:
+                reply = f"Sorry, I couldn't book that appointment: {e.detail}. Which time works for you?"
+        except ValueError as e:
+            logger.warning("Assistant booking rejected: %s", e)
+            session["state"] = dict(booking, email=None)
+            reply = "Sorry, some of the booking details look invalid. Please check your email address and try again."
+    
+    session["messages"].append({"role": "assistant", "content": reply})
+    session["confirmed"] = ask_confirm
+    store.save(session_id, session)
+    
+    return AssistantTurnResponse(
+        session_id=session_id,
+        reply=reply,
+        awaiting_confirmation=ask_confirm,
+        appointment=appointment
+    )
+
+@app.post("/assistant/turn", response_model=AssistantTurnResponse)
+async def assistant_turn(
+    request: AssistantTurnRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """Send one message to the appointment assistant for the caller's company"""
+    try:
+        company_id = current_user.get("company_id")
+        if not company_id:
+            raise HTTPException(status_code=400, detail="Company ID not found in token")
+        if not request.message.strip():
+            raise HTTPException(status_code=400, detail="Message is required")
+        
+        owner = f"{company_id}:{current_user.get('user_id')}"
+        loop = asyncio.get_running_loop()
+        # Copy the context so DB/LLM time on the worker thread is attributed to this request
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(assistant_executor, context.run, run_assistant_turn, request, company_id, owner)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Assistant turn error: %s", e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@app.on_event("startup")
+async def load_occupancy_index():
+    """Replay the recent visit event log so the on-site view is complete from the first request"""
+    loaded = await asyncio.get_running_loop().run_in_executor(None, occupancy_index.rebuild)
+    if not loaded:
+        logger.warning("Occupancy index not loaded at startup; it will be rebuilt on first use")
+
+@app.on_event("startup")
+async def preload_assistant():
+    """With ASSISTANT_PRELOAD, load the assistant's models before this worker reports ready"""
+    if not ASSISTANT_PRELOAD:
+        return
+    try:
+        from assistant_core import warm_up
+        await asyncio.get_running_loop().run_in_executor(assistant_executor, warm_up)
+    except Exception as e:
+        logger.error("Assistant preload failed: %s", e)
+
+@app.on_event("startup")
+async def mark_ready():
+    """Registered last: the worker takes traffic once the startup hooks above have run"""
+    server_state["ready"] = True
+
+@app.on_event("shutdown")
+async def drain_on_shutdown():
+    """uvicorn has stopped accepting and finished in-flight requests; flush queued confirmation emails"""
+    server_state["ready"] = False
+    server_state["draining"] = True
+    left = await asyncio.get_running_loop().run_in_executor(None, email_outbox.drain, EMAIL_DRAIN_SECONDS)
+    logger.info("Shutdown complete (%s confirmation emails left unsent)", left)
+
+# Liveness: in-process checks only, so a database outage doesn't get workers restarted
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "message": "Voice Assistant SaaS API is running"}
+    report = health_monitor.liveness()
+    status_text = {"ok": "healthy", "degraded": "degraded", "fail": "unhealthy"}[report["status"]]
+    content = {**report, "status": status_text, "message": "Voice Assistant SaaS API is running"}
+    return JSONResponse(status_code=503 if report["status"] == "fail" else 200, content=content)
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness for load balancers: 503 while starting, draining or failing; degraded answers HEALTH_DEGRADED_STATUS_CODE"""
+    if server_state["draining"]:
+        return JSONResponse(status_code=503, content={"status": "draining"})
+    if not server_state["ready"]:
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    report = await asyncio.get_running_loop().run_in_executor(None, health_monitor.readiness)
+    if report["status"] == "fail":
+        return JSONResponse(status_code=503, content={**report, "status": "unavailable"})
+    if report["status"] == "degraded":
+        return JSONResponse(status_code=HEALTH_DEGRADED_STATUS_CODE, content=report)
+    return JSONResponse(status_code=200, content={**report, "status": "ready"})
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus scrape endpoint: request latency, DB/SMTP/LLM time and pool usage"""
+    pool = pool_stats()
+    qr = qr_cache.stats()
+    checkin = checkin_service.stats()
+    outbox = email_outbox.stats()
+    limits = rate_limiter.stats()
+    return PlainTextResponse(
+        metrics.render({
+            "db_pool_in_use": pool["in_use"],
+            "db_pool_size": pool["size"],
+            "qr_cache_entries": qr["entries"],
+            "qr_cache_hits_total": qr["hits"],
+            "qr_cache_misses_total": qr["misses"],
+            "checkin_batches_total": checkin["batches"],
+            "checkin_scans_total": checkin["scans"],
+            "email_outbox_queued": outbox["queued"],
+            "email_outbox_sent_total": outbox["sent"],
+            "email_outbox_failed_total": outbox["failed"],
+            "rate_limit_allowed_total": limits["allowed"],
+            "rate_limit_limited_total": limits["limited"],
+        }),
+        media_type="text/plain; version=0.0.4"
+    )
 
 if __name__ == "__main__":
     import uvicorn
@@ -65,11 +65,11 @@ def main():
     if not run_command(f"pip install -r {requirements_file}", f"Installing dependencies from {requirements_file}"):
         print("\n🔧 Alternative installation methods:")
         print("1. Try installing dependencies one by one:")
-        print("   pip install fastapi uvicorn pymysql python-multipart python-jose[cryptography] passlib[bcrypt] python-dotenv email-validator requests")
+        print("   pip install fastapi uvicorn mysql-connector-python python-multipart python-jose[cryptography] passlib[bcrypt] python-dotenv email-validator requests")
         print("\n2. If you need Streamlit and OpenAI, install them separately:")
         print("   pip install streamlit openai")
         print("\n3. Use conda instead of pip:")
-        print("   conda install fastapi uvicorn pymysql python-multipart python-jose passlib python-dotenv email-validator requests")
+        print("   conda install fastapi uvicorn mysql-connector-python python-multipart python-jose passlib python-dotenv email-validator requests")
         return False
     
     # Create .env file
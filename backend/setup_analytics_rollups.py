@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Setup the appointment_daily_stats rollup table and rebuild it from appointments
+
+The API keeps the rollups current on every appointment insert and status
+change; this script creates the table and (re)computes it from the
+appointments table, one company per transaction, for existing databases or
+after data was written outside the API (e.g. benchmark_seed.py).
+
+Usage: python setup_analytics_rollups.py [--company-id ID]
+"""
+
+import argparse
+import os
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import get_connection
+
+CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS appointment_daily_stats (
+        company_id INT NOT NULL,
+        stat_date DATE NOT NULL,
+        department VARCHAR(255) NOT NULL,
+        booking_method ENUM('manual', 'voice') NOT NULL,
+        bookings INT NOT NULL DEFAULT 0,
+        confirmed INT NOT NULL DEFAULT 0,
+        cancelled INT NOT NULL DEFAULT 0,
+        completed INT NOT NULL DEFAULT 0,
+        rescheduled INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (company_id, stat_date, department, booking_method),
+        FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE
+    )
+"""
+
+REBUILD_QUERY = """
+    INSERT INTO appointment_daily_stats
+    (company_id, stat_date, department, booking_method, bookings, confirmed, cancelled, completed, rescheduled)
+    SELECT company_id, appointment_date, department, booking_method, COUNT(*),
+           SUM(status = 'confirmed'), SUM(status = 'cancelled'), SUM(status = 'completed'), SUM(status = 'rescheduled')
+    FROM appointments
+    WHERE company_id = %s
+    GROUP BY company_id, appointment_date, department, booking_method
+"""
+
+
+def rebuild(connection, cursor, company_id):
+    """Recompute one company's rollups atomically"""
+    connection.start_transaction()
+    cursor.execute("DELETE FROM appointment_daily_stats WHERE company_id = %s", (company_id,))
+    cursor.execute(REBUILD_QUERY, (company_id,))
+    rows = cursor.rowcount
+    connection.commit()
+    return rows
+
+
+def setup_analytics_rollups(company_id=None):
+    try:
+        connection = get_connection()
+        if not connection:
+            print("❌ Failed to connect to database")
+            return False
+
+        cursor = connection.cursor()
+        cursor.execute(CREATE_TABLE)
+        connection.commit()
+        print("✅ appointment_daily_stats table ready")
+
+        if company_id:
+            company_ids = [company_id]
+        else:
+            cursor.execute("SELECT id FROM companies ORDER BY id")
+            company_ids = [row[0] for row in cursor.fetchall()]
+
+        for cid in company_ids:
+            print(f"   company {cid}: {rebuild(connection, cursor, cid)} rollup rows")
+
+        cursor.close()
+        connection.close()
+        return True
+
+    except Exception as e:
+        print(f"❌ Error setting up analytics rollups: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--company-id", type=int, help="rebuild only this company")
+    args = parser.parse_args()
+
+    print("Setting up analytics rollups...")
+    if setup_analytics_rollups(args.company_id):
+        print("🎉 Analytics rollups setup completed successfully!")
+    else:
+        print("💥 Analytics rollups setup failed!")
+        sys.exit(1)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Setup the append-only visit_events table (check-in, check-out and badge events)"""
+
+import os
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import get_connection
+
+def setup_visit_events_table():
+    """Create the visit_events table if it doesn't exist"""
+    try:
+        connection = get_connection()
+        if not connection:
+            print("❌ Failed to connect to database")
+            return False
+
+        cursor = connection.cursor()
+
+        create_table_query = """
+        CREATE TABLE IF NOT EXISTS visit_events (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            company_id INT NOT NULL,
+            appointment_id INT NULL,
+            event_type ENUM('check_in', 'check_out', 'badge_printed') NOT NULL,
+            visitor_name VARCHAR(255) NOT NULL,
+            employee_name VARCHAR(255),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE,
+            FOREIGN KEY (appointment_id) REFERENCES appointments(id) ON DELETE SET NULL,
+            INDEX idx_created_at (created_at),
+            INDEX idx_company_created (company_id, created_at),
+            INDEX idx_appointment (appointment_id)
+        )
+        """
+
+        cursor.execute(create_table_query)
+        connection.commit()
+
+        print("✅ Visit events table created successfully")
+
+        cursor.close()
+        connection.close()
+
+        return True
+
+    except Exception as e:
+        print(f"❌ Error setting up visit events table: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("Setting up visit events table...")
+    if setup_visit_events_table():
+        print("🎉 Visit events table setup completed successfully!")
+    else:
+        print("💥 Visit events table setup failed!")
+        sys.exit(1)
@@ -1,8 +1,27 @@
 #!/usr/bin/env python3
 """
 Startup script for the Voice Assistant SaaS API
+
+Development (default): one auto-reloading process on 127.0.0.1.
+
+Production (--production or SERVER_MODE=production): reload off, bound to
+0.0.0.0 and WEB_CONCURRENCY worker processes (default: one per CPU). On Unix
+the app is imported once in this supervisor process and the workers are
+forked from it, so they share the loaded modules instead of each importing
+them again. SIGTERM/SIGINT are forwarded to the workers. Each worker stops
+accepting connections, gives in-flight requests up to
+GRACEFUL_TIMEOUT_SECONDS, then flushes its email outbox. Load balancers
+should probe /ready (503 while starting or draining) rather than /health.
+
+Usage: python start_server.py [--production] [--workers N]
 """
 
+import argparse
+import gc
+import signal
+import socket
+import sys
+import time
 import uvicorn
 import os
 from dotenv import load_dotenv
@@ -10,7 +29,116 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+
+def preload_app():
+    """Import the app and build everything workers would otherwise each build on first use"""
+    import saas_api
+    saas_api.app.openapi()
+    # Keep the collector from touching (and so copying) the parent's objects in every worker
+    gc.freeze()
+    return saas_api.app
+
+
+def run_preforked(host, port, workers, graceful_timeout):
+    """Fork workers sharing one listening socket; restart any that die until asked to stop"""
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    app = preload_app()
+    children = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid:
+            children.add(pid)
+            return
+        # Worker: uvicorn installs its own SIGINT/SIGTERM handlers for graceful shutdown
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        code = 0
+        try:
+            config = uvicorn.Config(app, log_level="info", timeout_graceful_shutdown=graceful_timeout)
+            uvicorn.Server(config).run(sockets=[sock])
+        except Exception as e:
+            print(f"❌ Worker {os.getpid()} failed: {e}")
+            code = 1
+        finally:
+            from logging_setup import stop_logging
+            stop_logging()
+            os._exit(code)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        spawn()
+    print(f"👷 {workers} workers started (supervisor pid {os.getpid()})")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            print(f"⚠️  Worker {pid} exited (status {status}); starting a replacement")
+            time.sleep(1)
+            spawn()
+    sock.close()
+    print("👋 All workers stopped")
+
+
+def run_production(host, port, workers):
+    from config import GRACEFUL_TIMEOUT_SECONDS, CONVERSATION_STORE
+
+    print(f"🚀 Starting Voice Assistant SaaS API (production)...")
+    print(f"📍 Host: {host}")
+    print(f"🔌 Port: {port}")
+    print(f"👷 Workers: {workers}")
+    print(f"✅ Readiness: http://{host}:{port}/ready")
+    if workers > 1 and CONVERSATION_STORE == "memory":
+        print("⚠️  CONVERSATION_STORE=memory keeps assistant sessions per worker; conversations will break when")
+        print("   turns land on different workers. Set CONVERSATION_STORE=sqlite for multi-worker deployments")
+
+    if hasattr(os, "fork"):
+        run_preforked(host, port, workers, GRACEFUL_TIMEOUT_SECONDS)
+    else:
+        # No fork() (Windows): uvicorn spawns the workers, each importing the app itself
+        uvicorn.run(
+            "saas_api:app",
+            host=host,
+            port=port,
+            workers=workers,
+            timeout_graceful_shutdown=GRACEFUL_TIMEOUT_SECONDS,
+            log_level="info"
+        )
+
+
 if __name__ == "__main__":
+    from config import SERVER_MODE, WEB_CONCURRENCY
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--production", action="store_true", help="multi-worker mode without reload")
+    parser.add_argument("--workers", type=int, default=WEB_CONCURRENCY or os.cpu_count() or 1,
+                        help="worker processes in production mode (default: WEB_CONCURRENCY or CPU count)")
+    args = parser.parse_args()
+
+    if args.production or SERVER_MODE == "production":
+        sys.exit(run_production(os.getenv("HOST", "0.0.0.0"), int(os.getenv("PORT", "8001")), max(1, args.workers)))
+
     # Get configuration from environment
     host = os.getenv("HOST", "127.0.0.1")  # Changed from 0.0.0.0 to 127.0.0.1
     port = int(os.getenv("PORT", "8001"))   # Changed from 8000 to 8001
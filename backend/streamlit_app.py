@@ -1,5 +1,6 @@
 import streamlit as st
-from assistant_core import run_assistant
+from assistant_core import run_assistant, is_confirmation_reply
+from conversation_store import get_conversation_store, new_session, new_session_id
 import time
 
 # Page configuration
@@ -92,13 +93,9 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Initialize session state
-if "messages" not in st.session_state:
-    st.session_state.messages = []
-if "state" not in st.session_state:
-    st.session_state.state = None
-if "confirmed" not in st.session_state:
-    st.session_state.confirmed = False
+# Initialize session state (conversation state itself lives in the server-side store)
+if "session_id" not in st.session_state:
+    st.session_state.session_id = new_session_id()
 if "booking_json" not in st.session_state:
     st.session_state.booking_json = None
 if "processing" not in st.session_state:
@@ -106,6 +103,9 @@ if "processing" not in st.session_state:
 if "clear_input" not in st.session_state:
     st.session_state.clear_input = False
 
+store = get_conversation_store()
+conversation = store.get(st.session_state.session_id) or new_session()
+
 # Header
 st.markdown("""
 <div class="main-header">
@@ -121,7 +121,7 @@ with chat_container:
     st.markdown('<div class="chat-container">', unsafe_allow_html=True)
     
     # Display chat messages
-    for i, msg in enumerate(st.session_state.messages):
+    for i, msg in enumerate(conversation["messages"]):
         if msg["role"] == "user":
             st.markdown(f"""
             <div class="chat-message user-message">
@@ -179,9 +179,7 @@ with col2:
 
 with col3:
     if st.button("Clear Chat", key="clear_button"):
-        st.session_state.messages = []
-        st.session_state.state = None
-        st.session_state.confirmed = False
+        store.delete(st.session_state.session_id)
         st.session_state.booking_json = None
         st.session_state.processing = False
         st.session_state.clear_input = True
@@ -243,38 +241,34 @@ if send_button and user_input.strip() and not st.session_state.processing:
     # Clear the input field by changing the key
     st.session_state.clear_input = True
     
-    # Add user message
-    st.session_state.messages.append({"role": "user", "content": message_content})
-    
     # Check for confirmation
-    if (len(st.session_state.messages) >= 2 and 
-        st.session_state.messages[-2]["content"].lower().endswith("type yes to confirm") and 
-        message_content.lower() in {"yes", "haan", "ho", "chalega", "done", "ok", "okay", "yup", "sure", "si", "oui", "да", "はい", "evet", "correct", "confirm"}):
-        st.session_state.confirmed = True
+    if is_confirmation_reply(conversation["messages"], message_content):
+        conversation["confirmed"] = True
+    
+    # Add user message
+    conversation["messages"].append({"role": "user", "content": message_content})
     
     # Get assistant response
     try:
         with st.spinner("🤖 Assistant is thinking..."):
-            assistant_response, st.session_state.state, booking_json, ask_confirm = run_assistant(
-                st.session_state.messages, st.session_state.state, st.session_state.confirmed
+            assistant_response, conversation["state"], booking_json, ask_confirm = run_assistant(
+                conversation["messages"], conversation["state"], conversation["confirmed"]
             )
         
         # Add assistant response
-        st.session_state.messages.append({"role": "assistant", "content": assistant_response})
+        conversation["messages"].append({"role": "assistant", "content": assistant_response})
+        conversation["confirmed"] = ask_confirm
         
         # Handle booking completion
         if booking_json:
             st.session_state.booking_json = booking_json
-            st.session_state.processing = False
-            st.rerun()
-        
-        st.session_state.confirmed = ask_confirm
         
     except Exception as e:
         st.error(f"An error occurred: {str(e)}")
-        st.session_state.messages.append({"role": "assistant", "content": "I apologize, but I encountered an error. Please try again."})
+        conversation["messages"].append({"role": "assistant", "content": "I apologize, but I encountered an error. Please try again."})
     
     finally:
+        store.save(st.session_state.session_id, conversation)
         st.session_state.processing = False
         st.rerun()
 
@@ -0,0 +1,63 @@
+"""
+Cross-tenant usage for the superadmin dashboard.
+
+One aggregate query (database.get_tenant_usage) returns active users vs.
+max_users, active employees and this month's appointments (from the daily
+rollups) for every company at once. The result is cached for
+USAGE_CACHE_SECONDS and dropped early whenever this process creates a user,
+so the dashboard never costs more than one query per interval however many
+tenants there are.
+"""
+
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional, Dict, Any
+
+from config import USAGE_CACHE_SECONDS
+from database import get_tenant_usage
+
+logger = logging.getLogger(__name__)
+
+
+def month_bounds(today: date) -> tuple:
+    first = today.replace(day=1)
+    last = (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return first, last
+
+
+class TenantUsageCache:
+    def __init__(self, ttl_seconds: float = USAGE_CACHE_SECONDS):
+        self.ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._loaded_at = 0.0
+
+    def get(self, refresh: bool = False) -> Optional[Dict[str, Any]]:
+        """Usage for all tenants, from cache unless stale or refresh is requested; None on database errors"""
+        with self._lock:
+            if not refresh and self._snapshot is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return self._snapshot
+
+            first, last = month_bounds(date.today())
+            rows = get_tenant_usage(first.isoformat(), last.isoformat())
+            if rows is None:
+                return None
+            for row in rows:
+                max_users = row["max_users"]
+                row["user_utilization"] = round(row["users"] / max_users, 4) if max_users else None
+            self._snapshot = {
+                "generated_at": datetime.now().replace(microsecond=0),
+                "month": first.strftime("%Y-%m"),
+                "companies": rows,
+            }
+            self._loaded_at = time.monotonic()
+            return self._snapshot
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
+
+
+tenant_usage = TenantUsageCache()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test that the assistant routes full sentences naming a department ("I want to
+meet someone in HR") to that department, using the sample employee directory
+(data/employees.csv) and an empty schedule, so no database or Gemini key is needed
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import assistant_core
+import availability
+
+CASES = [
+    # (visitor message, expected department, expected employee or None for "whoever is free")
+    ("I want to meet someone in HR", "HR", None),
+    ("Can I see somebody from the developers please?", "Developers", None),
+    ("I would like to book a meeting with the directing team", "Directing team", None),
+    ("I want to meet Priya Sharma from HR", "HR", "Priya Sharma"),
+]
+
+
+def test_department_routing():
+    """Each message should pick an employee of the named department without asking the LLM"""
+    print("🔍 Testing department routing for full sentences...")
+
+    # Nobody is booked and the whole business day is still ahead
+    availability.get_booked_slots = lambda company_id, appointment_date: []
+    assistant_core.availability_engine._not_before = lambda appointment_date: 0
+    assistant_core.send_to_gemini = lambda conversation: ("<LLM fallback>", None, None)
+
+    failures = 0
+    for message, department, employee in CASES:
+        reply, state, _, _ = assistant_core.run_assistant([{"role": "user", "content": message}])
+        ok = state["department"] == department and (employee is None or state["employee_name"] == employee)
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {message!r} -> {state['employee_name']} ({state['department']})")
+        if not ok:
+            print(f"   expected {employee or 'anyone'} ({department}); reply: {reply[:80]}")
+
+    if failures:
+        print(f"\n❌ {failures} of {len(CASES)} messages were not routed to their department")
+        return False
+    print(f"\n✅ All {len(CASES)} messages routed to their department")
+    return True
+
+
+if __name__ == "__main__":
+    print("🚀 Assistant Department Routing Test")
+    print("=" * 50)
+
+    sys.exit(0 if test_department_routing() else 1)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test the signed visitor pass tokens (qr_codes.pass_token / verify_pass_token)
+and the front-desk checks built on them (checkin.CheckInService.verify).
+
+Pure functions only: no database, server or QR rendering is needed.
+"""
+
+import sys
+import os
+import base64
+from datetime import date, timedelta
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import qr_codes
+from qr_codes import pass_token, verify_pass_token
+from checkin import CheckInService, CheckInError
+
+APPOINTMENT = {
+    "id": 48213,
+    "company_id": 7,
+    "appointment_date": date(2026, 10, 19),
+    "appointment_time": "14:30",
+}
+
+failures = 0
+
+
+def check(condition, message):
+    global failures
+    if condition:
+        print(f"✅ {message}")
+    else:
+        failures += 1
+        print(f"❌ {message}")
+
+
+def flip_bit(token: str, byte_index: int) -> str:
+    raw = bytearray(base64.b32decode(token))
+    raw[byte_index] ^= 0x01
+    return base64.b32encode(bytes(raw)).decode("ascii")
+
+
+def test_round_trip():
+    """A fresh token is 32 base32 characters and decodes to the appointment's fields"""
+    print("\n🔍 Round trip...")
+    token = pass_token(APPOINTMENT)
+    check(len(token) == 32, f"token is 32 characters ({token})")
+    check(set(token) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZ234567"), "token only uses base32 (QR alphanumeric) characters")
+    claims = verify_pass_token(token)
+    check(claims == {
+        "appointment_id": 48213,
+        "company_id": 7,
+        "appointment_date": date(2026, 10, 19),
+        "appointment_minutes": 14 * 60 + 30,
+    }, "verified claims match the appointment")
+    check(verify_pass_token(" " + token.lower() + "\n") == claims, "scanner whitespace and lower case are tolerated")
+
+
+def test_tampered_tokens():
+    """Any changed payload or signature byte is rejected, as are malformed tokens"""
+    print("\n🔍 Tampered and malformed tokens...")
+    token = pass_token(APPOINTMENT)
+    payload_size = qr_codes._PAYLOAD.size
+    check(verify_pass_token(flip_bit(token, 1)) is None, "changed appointment id is rejected")
+    check(verify_pass_token(flip_bit(token, payload_size - 1)) is None, "changed start time is rejected")
+    check(verify_pass_token(flip_bit(token, payload_size)) is None, "changed signature is rejected")
+    check(
+        all(verify_pass_token(flip_bit(token, i)) is None for i in range(payload_size + qr_codes._MAC_BYTES)),
+        "a flipped bit anywhere in the 20 bytes is rejected"
+    )
+    check(verify_pass_token(token[:-8]) is None, "truncated token is rejected")
+    check(verify_pass_token("not a token!") is None, "non-base32 text is rejected")
+    check(verify_pass_token("") is None, "empty token is rejected")
+
+
+def test_wrong_key():
+    """A token signed with another key (another deployment) doesn't verify"""
+    print("\n🔍 Wrong signing key...")
+    token = pass_token(APPOINTMENT)
+    original_key = qr_codes._signing_key
+    try:
+        qr_codes._signing_key = b"some-other-deployment-key"
+        check(verify_pass_token(token) is None, "token signed with the original key is rejected")
+        forged = pass_token(APPOINTMENT)
+    finally:
+        qr_codes._signing_key = original_key
+    check(verify_pass_token(forged) is None, "token signed with a foreign key is rejected")
+    check(verify_pass_token(token) is not None, "token verifies again under its own key")
+
+
+def test_expired_and_foreign_passes():
+    """Passes are only valid on their appointment date and at their own company"""
+    print("\n🔍 Expired, early and foreign passes...")
+    service = CheckInService()
+    token = pass_token(APPOINTMENT)
+    day = APPOINTMENT["appointment_date"]
+
+    def status(company_id, today):
+        try:
+            service.verify(token, company_id, today=today)
+            return 200
+        except CheckInError as e:
+            return e.status_code
+
+    check(status(7, day) == 200, "pass is accepted on its appointment date")
+    check(status(7, day + timedelta(days=1)) == 409, "expired pass (day after) is rejected with 409")
+    check(status(7, day - timedelta(days=1)) == 409, "early pass (day before) is rejected with 409")
+    check(status(8, day) == 403, "pass from another company is rejected with 403")
+    try:
+        service.verify(flip_bit(token, 0), 7, today=day)
+        tampered = 200
+    except CheckInError as e:
+        tampered = e.status_code
+    check(tampered == 400, "tampered pass is rejected with 400")
+
+
+if __name__ == "__main__":
+    print("🚀 Visitor Pass Token Test")
+    print("=" * 50)
+
+    test_round_trip()
+    test_tampered_tokens()
+    test_wrong_key()
+    test_expired_and_foreign_passes()
+
+    print()
+    print("❌ Some pass token checks failed" if failures else "✅ All pass token checks passed")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test the token-bucket rate limiter (rate_limit.py) against both bucket
+stores: refill over time, check(consume=False) only looking, and a
+multi-scope take that consumes nothing when one scope is empty.
+
+Runs on a fake clock and a temporary SQLite file, so no database, server or
+waiting is needed.
+"""
+
+import sys
+import os
+import tempfile
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import rate_limit
+from rate_limit import RateLimiter, RateLimitExceeded, MemoryBucketStore, SQLiteBucketStore, parse_limits
+
+failures = 0
+
+
+def check(condition, message):
+    global failures
+    if condition:
+        print(f"✅ {message}")
+    else:
+        failures += 1
+        print(f"❌ {message}")
+
+
+class FakeClock:
+    """Stands in for the time module inside rate_limit (both monotonic() and time())"""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def allowed(limiter, **keys):
+    try:
+        limiter.check("login", **keys)
+        return True
+    except RateLimitExceeded:
+        return False
+
+
+def allowed_peek(limiter, **keys):
+    try:
+        limiter.check("login", consume=False, **keys)
+        return True
+    except RateLimitExceeded:
+        return False
+
+
+def denied_scope(limiter, **keys):
+    try:
+        limiter.check("login", **keys)
+        return None
+    except RateLimitExceeded as e:
+        return e.scope
+
+
+def test_parse_limits():
+    print("\n🔍 Limit specs...")
+    check(parse_limits("ip:20/60, email:5/300") == {"ip": (20.0, 20 / 60), "email": (5.0, 5 / 300)}, "spec parses to capacity and rate")
+    for bad in ("host:5/60", "ip:5", "ip:/60"):
+        try:
+            parse_limits(bad)
+            check(False, f"invalid spec {bad!r} is rejected")
+        except ValueError:
+            check(True, f"invalid spec {bad!r} is rejected")
+
+
+def test_store(name, make_store, clock):
+    print(f"\n🔍 {name}...")
+
+    # Refill: 2 tokens, one back every 30 seconds
+    limiter = RateLimiter({"login": "ip:2/60"}, store=make_store())
+    check(allowed(limiter, ip="10.0.0.1") and allowed(limiter, ip="10.0.0.1"), "burst up to capacity is allowed")
+    try:
+        limiter.check("login", ip="10.0.0.1")
+        check(False, "third request is limited")
+    except RateLimitExceeded as e:
+        check(e.scope == "ip" and 29 < e.retry_after <= 30, f"third request is limited (retry after {e.retry_after:.1f}s)")
+    clock.advance(29)
+    check(not allowed(limiter, ip="10.0.0.1"), "still limited before a token has refilled")
+    clock.advance(1)
+    check(allowed(limiter, ip="10.0.0.1"), "allowed again once a token has refilled")
+    check(not allowed(limiter, ip="10.0.0.1"), "refill gives back one token, not the whole bucket")
+    clock.advance(3600)
+    check(allowed(limiter, ip="10.0.0.1") and allowed(limiter, ip="10.0.0.1") and not allowed(limiter, ip="10.0.0.1"),
+          "a long idle refills to capacity and no further")
+    check(allowed(limiter, ip="10.0.0.2"), "another address has its own bucket")
+
+    # Peek: consume=False never takes a token
+    limiter = RateLimiter({"login": "ip:1/60,email:1/60"}, store=make_store())
+    peeks = [allowed_peek(limiter, ip="10.0.0.3", email="a@example.com") for _ in range(5)]
+    check(all(peeks), "repeated peeks on a fresh bucket are all allowed")
+    check(allowed(limiter, ip="10.0.0.3", email="A@Example.com "), "the one real token is still there after the peeks")
+    check(not allowed_peek(limiter, ip="10.0.0.3", email="a@example.com"), "a peek at an empty bucket is limited")
+    check(limiter.stats() == {"allowed": 1, "limited": 1}, f"peeks don't count as allowed requests ({limiter.stats()})")
+
+    # All or nothing: an empty company bucket leaves the ip and email tokens alone
+    limiter = RateLimiter({"login": "ip:3/600,email:3/600,company:1/600"}, store=make_store())
+    keys = {"ip": "10.0.0.4", "email": "b@example.com"}
+    check(allowed(limiter, company=7, **keys), "first request takes ip, email and company tokens")
+    check(all(denied_scope(limiter, company=7, **keys) == "company" for _ in range(5)),
+          "requests against the empty company bucket are limited by company")
+    check(allowed(limiter, company=8, **keys) and allowed(limiter, company=9, **keys),
+          "the rejected requests took no ip/email tokens (two left for other companies)")
+    check(denied_scope(limiter, company=10, **keys) == "ip", "and only two: the ip bucket is empty now")
+
+
+if __name__ == "__main__":
+    print("🚀 Rate Limiter Test")
+    print("=" * 50)
+
+    clock = FakeClock()
+    rate_limit.time = clock
+    rate_limit.RATE_LIMIT_ENABLED = True
+    test_parse_limits()
+    test_store("Memory store", MemoryBucketStore, clock)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = iter(range(100))
+        test_store("SQLite store", lambda: SQLiteBucketStore(path=os.path.join(tmp, f"buckets-{next(paths)}.db")), clock)
+
+    print()
+    print("❌ Some rate limit checks failed" if failures else "✅ All rate limit checks passed")
+    sys.exit(1 if failures else 0)
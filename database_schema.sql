@@ -80,6 +80,7 @@ CREATE TABLE employees (
 -- 5. APPOINTMENTS TABLE (Store all appointment bookings)
 CREATE TABLE appointments (
     id INT AUTO_INCREMENT PRIMARY KEY,
+    employee_id INT NULL,
     employee_name VARCHAR(255) NOT NULL,
     department VARCHAR(255) NOT NULL,
     reason TEXT,
@@ -93,16 +94,52 @@ CREATE TABLE appointments (
     status ENUM('confirmed', 'cancelled', 'completed', 'rescheduled') DEFAULT 'confirmed',
     qr_code_sent BOOLEAN DEFAULT FALSE,
     email_sent BOOLEAN DEFAULT FALSE,
+    checked_in_at TIMESTAMP NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE,
+    FOREIGN KEY (employee_id) REFERENCES employees(id) ON DELETE SET NULL,
     INDEX idx_visitor_email (visitor_email),
     INDEX idx_appointment_date (appointment_date),
     INDEX idx_company_id (company_id),
     INDEX idx_status (status),
     INDEX idx_booking_method (booking_method),
     INDEX idx_employee_name (employee_name),
-    INDEX idx_department (department)
+    INDEX idx_department (department),
+    INDEX idx_company_date (company_id, appointment_date),
+    INDEX idx_company_employee_date (company_id, employee_name, appointment_date),
+    INDEX idx_company_employee_slot (company_id, employee_id, appointment_date, appointment_time)
+);
+
+-- 6. VISIT EVENTS TABLE (Append-only check-in / check-out / badge log)
+CREATE TABLE visit_events (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    company_id INT NOT NULL,
+    appointment_id INT NULL,
+    event_type ENUM('check_in', 'check_out', 'badge_printed') NOT NULL,
+    visitor_name VARCHAR(255) NOT NULL,
+    employee_name VARCHAR(255),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE,
+    FOREIGN KEY (appointment_id) REFERENCES appointments(id) ON DELETE SET NULL,
+    INDEX idx_created_at (created_at),
+    INDEX idx_company_created (company_id, created_at),
+    INDEX idx_appointment (appointment_id)
+);
+
+-- 7. APPOINTMENT DAILY STATS (Analytics rollups, maintained with every appointment write)
+CREATE TABLE appointment_daily_stats (
+    company_id INT NOT NULL,
+    stat_date DATE NOT NULL,
+    department VARCHAR(255) NOT NULL,
+    booking_method ENUM('manual', 'voice') NOT NULL,
+    bookings INT NOT NULL DEFAULT 0,
+    confirmed INT NOT NULL DEFAULT 0,
+    cancelled INT NOT NULL DEFAULT 0,
+    completed INT NOT NULL DEFAULT 0,
+    rescheduled INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (company_id, stat_date, department, booking_method),
+    FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE
 );
 
 -- Insert default superadmin
@@ -29,6 +29,7 @@ def create_appointments_table():
         create_table_sql = """
         CREATE TABLE IF NOT EXISTS appointments (
             id INT AUTO_INCREMENT PRIMARY KEY,
+            employee_id INT NULL,
             employee_name VARCHAR(255) NOT NULL,
             department VARCHAR(255) NOT NULL,
             reason TEXT,
@@ -42,16 +43,21 @@ def create_appointments_table():
             status ENUM('confirmed', 'cancelled', 'completed', 'rescheduled') DEFAULT 'confirmed',
             qr_code_sent BOOLEAN DEFAULT FALSE,
             email_sent BOOLEAN DEFAULT FALSE,
+            checked_in_at TIMESTAMP NULL,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
             FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE,
+            FOREIGN KEY (employee_id) REFERENCES employees(id) ON DELETE SET NULL,
             INDEX idx_visitor_email (visitor_email),
             INDEX idx_appointment_date (appointment_date),
             INDEX idx_company_id (company_id),
             INDEX idx_status (status),
             INDEX idx_booking_method (booking_method),
             INDEX idx_employee_name (employee_name),
-            INDEX idx_department (department)
+            INDEX idx_department (department),
+            INDEX idx_company_date (company_id, appointment_date),
+            INDEX idx_company_employee_date (company_id, employee_name, appointment_date),
+            INDEX idx_company_employee_slot (company_id, employee_id, appointment_date, appointment_time)
         );
         """
         